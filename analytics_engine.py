@@ -0,0 +1,194 @@
+"""
+Analytics Engine Module
+Hourly and daily scan/sales counters per store and product, written as server-side
+increments alongside scans and orders, and aggregated over a date range with NumPy
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import config
+
+# analytics_buckets/<store_id>/<h|d>/<bucket>/...
+#   bucket: YYYYMMDDHH (hourly) or YYYYMMDD (daily), so key order is time order
+#   s/<product_id>: scans   u/<product_id>: units sold   r/<product_id>: revenue in paise
+#   o: orders containing the store
+BUCKET_NODE = "analytics_buckets"
+GRANULARITIES = {
+    'hour': ('h', '%Y%m%d%H', timedelta(hours=1)),
+    'day': ('d', '%Y%m%d', timedelta(days=1)),
+}
+LABEL_FORMATS = {'hour': '%Y-%m-%d %H:00', 'day': '%Y-%m-%d'}
+MAX_BUCKETS = {'hour': 24 * 31, 'day': 366}
+RANGES = {'24h': timedelta(hours=24), '7d': timedelta(days=7), '30d': timedelta(days=30), '90d': timedelta(days=90)}
+METRIC_CODES = ('s', 'u', 'r')
+# Top products named in a timeseries (default and upper bound; each costs one name read)
+TOP_PRODUCTS = 10
+MAX_TOP_PRODUCTS = 50
+
+
+def bucket_timezone():
+    """Buckets follow ANALYTICS_UTC_OFFSET_MINUTES (e.g. 330 for IST) so days end at local midnight"""
+    return timezone(timedelta(minutes=getattr(config, 'ANALYTICS_UTC_OFFSET_MINUTES', 0)))
+
+
+def local_now():
+    return datetime.now(bucket_timezone())
+
+
+def _bucket_paths(store_id, when=None):
+    """The hourly and daily bucket a write at `when` lands in"""
+    when = (when or local_now()).astimezone(bucket_timezone())
+    return [f"{BUCKET_NODE}/{store_id}/{code}/{when.strftime(fmt)}" for code, fmt, _ in GRANULARITIES.values()]
+
+
+def _increment(amount):
+    return {".sv": {"increment": amount}}
+
+
+# ========== WRITE SIDE ==========
+
+def scan_bucket_updates(counts, when=None):
+    """Multi-path increments recording {(store_id, product_id): scans} in the current buckets"""
+    updates = {}
+    for (store_id, product_id), count in counts.items():
+        for base in _bucket_paths(store_id, when):
+            updates[f"{base}/s/{product_id}"] = _increment(count)
+    return updates
+
+
+def order_bucket_updates(store_id, items, when=None):
+    """Multi-path increments recording one store's share of an order (units and revenue per product)"""
+    units, revenue = Counter(), Counter()
+    for item in items or []:
+        if not isinstance(item, dict) or not item.get('product_id'):
+            continue
+        quantity = int(item.get('quantity', 1))
+        units[item['product_id']] += quantity
+        revenue[item['product_id']] += int(round(float(item.get('price', 0)) * quantity * 100))
+
+    updates = {}
+    for base in _bucket_paths(store_id, when):
+        updates[f"{base}/o"] = _increment(1)
+        for product_id in units:
+            updates[f"{base}/u/{product_id}"] = _increment(units[product_id])
+            updates[f"{base}/r/{product_id}"] = _increment(revenue[product_id])
+    return updates
+
+
+# ========== QUERY SIDE ==========
+
+def parse_range(args, now=None):
+    """
+    Turn request args into (granularity, start, end):
+      range=24h|7d|30d|90d ending now, or from=YYYY-MM-DD[&to=YYYY-MM-DD] (inclusive days)
+      granularity=hour|day, defaulting to hour for ranges of up to two days
+    Raises ValueError for malformed or oversized ranges.
+    """
+    now = now or local_now()
+    if args.get('from'):
+        try:
+            start = datetime.strptime(args['from'], '%Y-%m-%d').replace(tzinfo=now.tzinfo)
+            end = datetime.strptime(args['to'], '%Y-%m-%d').replace(tzinfo=now.tzinfo) if args.get('to') else now
+        except ValueError:
+            raise ValueError("from/to must be dates in YYYY-MM-DD format")
+        if args.get('to'):
+            end += timedelta(days=1) - timedelta(microseconds=1)
+    else:
+        span = RANGES.get(args.get('range', '7d'))
+        if span is None:
+            raise ValueError(f"range must be one of {', '.join(RANGES)}")
+        start, end = now - span, now
+    if start > end:
+        raise ValueError("from must not be after to")
+
+    granularity = args.get('granularity') or ('hour' if end - start <= timedelta(days=2) else 'day')
+    if granularity not in GRANULARITIES:
+        raise ValueError("granularity must be hour or day")
+    if len(bucket_keys(granularity, start, end)) > MAX_BUCKETS[granularity]:
+        raise ValueError(f"at most {MAX_BUCKETS[granularity]} {granularity} buckets per query")
+    return granularity, start, end
+
+
+def _floor(when, granularity):
+    when = when.replace(minute=0, second=0, microsecond=0)
+    return when.replace(hour=0) if granularity == 'day' else when
+
+
+def bucket_keys(granularity, start, end):
+    """Every bucket key from start to end inclusive, oldest first"""
+    _, fmt, step = GRANULARITIES[granularity]
+    keys, when = [], _floor(start, granularity)
+    while when <= end:
+        keys.append(when.strftime(fmt))
+        when += step
+    return keys
+
+
+def aggregate(buckets, granularity, keys, limit=TOP_PRODUCTS):
+    """
+    Sum a {bucket_key: {'s': {...}, 'u': {...}, 'r': {...}, 'o': n}} slice into per-bucket
+    series and per-product totals. Entries are gathered into flat index arrays and
+    summed with NumPy, so large stores do not pay per-cell Python arithmetic.
+    """
+    buckets = buckets if isinstance(buckets, dict) else {}
+    row_of = {key: i for i, key in enumerate(keys)}
+    column_of = {}
+    metrics, cells, columns, values = [], [], [], []
+    orders = np.zeros(len(keys), dtype=np.int64)
+
+    for key, bucket in buckets.items():
+        row = row_of.get(key)
+        if row is None or not isinstance(bucket, dict):
+            continue
+        if isinstance(bucket.get('o'), (int, float)):
+            orders[row] = bucket['o']
+        for metric, code in enumerate(METRIC_CODES):
+            counts = bucket.get(code)
+            if not isinstance(counts, dict):
+                continue
+            metrics.extend([metric] * len(counts))
+            cells.extend([metric * len(keys) + row] * len(counts))
+            columns.extend([column_of.setdefault(product_id, len(column_of)) for product_id in counts])
+            values.extend(counts.values())
+
+    # Two bincounts, over (metric, bucket) and (metric, product) cells; a dense
+    # metric x bucket x product cube would grow with buckets times catalogue size
+    weights = np.array(values, dtype=np.float64)
+    series = np.bincount(np.array(cells, dtype=np.int64), weights=weights, minlength=len(METRIC_CODES) * len(keys))
+    series = series.astype(np.int64).reshape(len(METRIC_CODES), len(keys))
+    flat = np.array(metrics, dtype=np.int64) * len(column_of) + np.array(columns, dtype=np.int64)
+    per_product = np.bincount(flat, weights=weights, minlength=len(METRIC_CODES) * len(column_of))
+    per_product = per_product.astype(np.int64).reshape(len(METRIC_CODES), len(column_of))
+
+    product_ids = list(column_of)
+    # Highest revenue first, then units, then scans
+    ranking = np.lexsort((per_product[0], per_product[1], per_product[2]))[::-1][:limit]
+    label_format = LABEL_FORMATS[granularity]
+    _, key_format, _ = GRANULARITIES[granularity]
+
+    return {
+        'granularity': granularity,
+        'labels': [datetime.strptime(key, key_format).strftime(label_format) for key in keys],
+        'scans': series[0].tolist(),
+        'units': series[1].tolist(),
+        'revenue': (series[2] / 100).tolist(),
+        'orders': orders.tolist(),
+        'totals': {
+            'scans': int(series[0].sum()),
+            'units': int(series[1].sum()),
+            'revenue': float(series[2].sum()) / 100,
+            'orders': int(orders.sum()),
+        },
+        'products': [
+            {
+                'product_id': product_ids[j],
+                'scans': int(per_product[0, j]),
+                'units': int(per_product[1, j]),
+                'revenue': float(per_product[2, j]) / 100,
+            }
+            for j in ranking
+        ],
+    }
@@ -3,8 +3,21 @@ Smart QR Shopping Website - Flask Application
 Main application file with all routes and API endpoints
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
-from firebase_service import FirebaseService
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
+from firebase_service import FirebaseService, EMAIL_TAKEN, PRODUCT_PAGE_SIZE, MAX_PRODUCT_PAGE_SIZE
+from read_cache import ReadCache
+from store_mirror import StoreMirror
+from scan_counter import ScanCounter
+from background_tasks import BackgroundTasks
+from firebase_async import AsyncFirebaseService, ASYNC_AVAILABLE
+from analytics_engine import MAX_TOP_PRODUCTS, TOP_PRODUCTS, parse_range
+from search_index import ProductSearch
+from scan_history import HISTORY_PAGE_SIZE, MAX_HISTORY_PAGE_SIZE, history_key
+from qr_cache import QRImageCache, cache_key, render_params
+import request_tracing
+import qr_sheets
+import hmac
+import math
 import uuid
 from datetime import datetime
 import config
@@ -13,7 +26,26 @@ app = Flask(__name__)
 app.secret_key = config.SECRET_KEY
 
 # Initialize services
-firebase = FirebaseService()
+read_cache = ReadCache(config.READ_CACHE_SIZE, config.READ_CACHE_TTLS) if config.READ_CACHE_SIZE else None
+store_mirror = None
+if config.STORE_MIRROR_ENABLED:
+    store_mirror = StoreMirror(config.FIREBASE_CONFIG['databaseURL'],
+                               max_staleness=config.STORE_MIRROR_MAX_STALENESS).start()
+firebase = FirebaseService(cache=read_cache, mirror=store_mirror)
+if config.SCAN_FLUSH_INTERVAL > 0:
+    firebase.scan_counter = ScanCounter(firebase.apply_scan_increments, config.SCAN_FLUSH_INTERVAL).start()
+firebase.history_limit = config.SCAN_HISTORY_LIMIT
+firebase.history_compact_every = config.SCAN_HISTORY_COMPACT_EVERY
+firebase.scan_rollup_interval = config.SCAN_ROLLUP_INTERVAL
+# Handlers with independent reads use the concurrent async client when httpx is installed
+firebase_async = None
+if config.ASYNC_FANOUT and ASYNC_AVAILABLE:
+    firebase_async = AsyncFirebaseService(firebase, config.FIREBASE_POOL_SIZE, config.FIREBASE_TIMEOUT)
+fanout = firebase_async.sync if firebase_async else firebase
+qr_cache = QRImageCache(config.QR_CACHE_SIZE, config.QR_CACHE_DIR)
+background = BackgroundTasks(config.BACKGROUND_WORKERS, config.BACKGROUND_QUEUE_SIZE, config.BACKGROUND_RETRIES)
+if config.SEARCH_INDEX_ENABLED:
+    firebase.search = ProductSearch(firebase, config.SEARCH_INDEX_REFRESH).start()
 
 # ========== HELPER FUNCTIONS ==========
 
@@ -41,6 +73,44 @@ def role_required(role):
         return decorated_function
     return decorator
 
+def metrics_token_required(f):
+    """Decorator for the monitoring endpoints: needs "Authorization: Bearer <METRICS_TOKEN>" """
+    from functools import wraps
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not config.METRICS_TOKEN:
+            return jsonify({'error': 'Monitoring disabled'}), 404
+        expected = f"Bearer {config.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected.encode()):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+# ========== INSTRUMENTATION ==========
+
+@app.before_request
+def start_request_trace():
+    """Collect the Firebase calls made while serving this request"""
+    route = request.url_rule.rule if request.url_rule else '(unmatched)'
+    request.environ['trace_token'] = request_tracing.start_trace(route, request.method)
+
+@app.after_request
+def finish_request_trace(response):
+    """Count the request per route and optionally report its backend time"""
+    trace = request_tracing.current_trace()
+    if trace is not None:
+        if config.METRICS_ENABLED:
+            request_tracing.metrics.observe_request(trace, response.status_code)
+        if config.SERVER_TIMING:
+            response.headers['Server-Timing'] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def reset_request_trace(exc):
+    token = request.environ.pop('trace_token', None)
+    if token is not None:
+        request_tracing.finish_trace(token)
+
 # ========== MAIN ROUTES ==========
 
 @app.route('/')
@@ -89,7 +159,9 @@ def register():
     user_id = str(uuid.uuid4())
     
     # Create user in Firebase
-    firebase.create_user(user_id, email, role)
+    result = firebase.create_user(user_id, email, role)
+    if isinstance(result, dict) and result.get('error') == EMAIL_TAKEN:
+        return jsonify(result), 409
     
     # Set session
     session['user_id'] = user_id
@@ -137,6 +209,12 @@ def api_login():
         session['email'] = email
         session['role'] = role
         
+        # Cache the owner's store_id so the dashboard never scans stores
+        if role == 'store_owner':
+            store_id = firebase.get_store_id_by_owner(user_id)
+            if store_id:
+                session['store_id'] = store_id
+        
         return jsonify({
             'success': True,
             'user_id': user_id,
@@ -255,9 +333,9 @@ def favicon():
 @app.route('/api/stores', methods=['GET', 'POST'])
 @login_required
 def stores_api():
-    """Get all stores or create a new store"""
+    """Get all store summaries or create a new store"""
     if request.method == 'GET':
-        stores = firebase.get_all_stores()
+        stores = firebase.get_store_summaries()
         return jsonify(stores)
     
     elif request.method == 'POST':
@@ -290,6 +368,19 @@ def get_store_api(store_id):
     store = firebase.get_store(store_id)
     return jsonify(store)
 
+@app.route('/api/stores/<store_id>/summary', methods=['GET'])
+@login_required
+def store_summary_api(store_id):
+    """Name and description of a store, without its products or orders"""
+    summary = firebase.get_store_summary(store_id)
+    if summary is None:
+        # Stores that predate store_summaries (rebuild_indexes.py adds them)
+        name = firebase.get_store_name(store_id)
+        if not isinstance(name, str):
+            return jsonify({'error': 'Store not found'}), 404
+        summary = {'name': name}
+    return jsonify(summary)
+
 @app.route('/api/my-store', methods=['GET'])
 @login_required
 @role_required('store_owner')
@@ -305,18 +396,16 @@ def get_my_store_api():
             store_data['id'] = cached_store_id
             return jsonify(store_data)
     
-    # Fallback: scan all stores
-    stores = firebase.get_all_stores()
-    if not stores or not isinstance(stores, dict):
+    # Fallback: owner_index lookup (never downloads the stores tree)
+    store_id = firebase.get_store_id_by_owner(user_id)
+    if not store_id or store_id == cached_store_id:
         return jsonify(None)
-        
-    for store_id, store_data in stores.items():
-        if not isinstance(store_data, dict):
-            continue
-        if store_data.get('owner_id') == user_id:
-            store_data['id'] = store_id
-            session['store_id'] = store_id  # cache it
-            return jsonify(store_data)
+    
+    store_data = firebase.get_store(store_id)
+    if isinstance(store_data, dict) and store_data.get('owner_id') == user_id:
+        store_data['id'] = store_id
+        session['store_id'] = store_id  # cache it
+        return jsonify(store_data)
             
     return jsonify(None)
 
@@ -324,10 +413,32 @@ def get_my_store_api():
 @app.route('/api/stores/<store_id>/products', methods=['GET', 'POST'])
 @login_required
 def products_api(store_id):
-    """Get all products for a store or add a new one"""
+    """
+    Get a store's products or add a new one. With any of limit, cursor, category,
+    min_price, max_price or in_stock the GET returns one page:
+    {products, next_cursor}; pass next_cursor back as cursor for the next page
+    """
     if request.method == 'GET':
-        products = firebase.get_products(store_id)
-        return jsonify(products)
+        args = request.args
+        if not any(arg in args for arg in ('limit', 'cursor', 'category', 'min_price', 'max_price', 'in_stock')):
+            products = firebase.get_products(store_id)
+            return jsonify(products)
+
+        try:
+            limit = max(1, min(int(args.get('limit', PRODUCT_PAGE_SIZE)), MAX_PRODUCT_PAGE_SIZE))
+            min_price = float(args['min_price']) if args.get('min_price') else None
+            max_price = float(args['max_price']) if args.get('max_price') else None
+            if not all(math.isfinite(price) for price in (min_price, max_price) if price is not None):
+                raise ValueError("non-finite price bound")
+        except ValueError:
+            return jsonify({'error': 'limit, min_price and max_price must be numbers'}), 400
+
+        products, next_cursor = firebase.get_products_page(
+            store_id, limit, args.get('cursor') or None, args.get('category') or None,
+            min_price, max_price, args.get('in_stock') in ('1', 'true'))
+        if isinstance(products.get('error'), str):
+            return jsonify(products), 502
+        return jsonify({'products': products, 'next_cursor': next_cursor})
 
     elif request.method == 'POST':
         data = request.json
@@ -373,16 +484,14 @@ def product_api(store_id, product_id):
     if request.method == 'GET':
         product = firebase.get_product(store_id, product_id)
         
-        # Increment scan count
-        firebase.increment_scan_count(store_id, product_id)
+        # Analytics and history are written off the request path
+        background.submit(firebase.increment_scan_count, store_id, product_id)
         
         # Add to scanned history if customer
-        if session.get('role') == 'customer':
-            firebase.add_to_history(session['user_id'], product_id, {
-                'store_id': store_id,
-                'product_name': product.get('name'),
-                'scanned_at': datetime.now().isoformat()
-            })
+        if session.get('role') == 'customer' and isinstance(product, dict):
+            # The key (and so the scan time) is fixed now; a retried write then cannot append twice
+            background.submit(firebase.add_to_history, session['user_id'], store_id, product_id,
+                              product.get('name'), history_key())
         
         return jsonify(product)
 
@@ -395,11 +504,45 @@ def product_api(store_id, product_id):
         firebase.delete_product(store_id, product_id)
         return jsonify({'success': True})
 
+@app.route('/api/search', methods=['GET'])
+@login_required
+def search_api():
+    """
+    Ranked product search across all stores: ?q=...[&limit=&cursor=&store_id=].
+    Returns {results, total, next_cursor}; pass next_cursor back as cursor for the next page
+    """
+    if firebase.search is None:
+        return jsonify({'error': 'Search is disabled'}), 503
+    if not firebase.search.ready:
+        return jsonify({'error': 'Search index is still loading, try again shortly'}), 503
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', PRODUCT_PAGE_SIZE)), MAX_PRODUCT_PAGE_SIZE))
+        offset = max(0, int(request.args.get('cursor') or 0))
+    except ValueError:
+        return jsonify({'error': 'limit and cursor must be numbers'}), 400
+
+    matches, total = firebase.search.search(request.args.get('q', ''), limit, offset,
+                                            request.args.get('store_id') or None)
+    summaries = firebase.get_store_summaries() if matches else {}
+    results = [{
+        'product_id': product_id,
+        'store_id': store_id,
+        'store_name': (summaries.get(store_id) or {}).get('name') if isinstance(summaries, dict) else None,
+        'name': name,
+        'category': category,
+        'price': price,
+        'score': score
+    } for product_id, store_id, name, category, price, score in matches]
+    next_offset = offset + len(matches)
+    return jsonify({'results': results, 'total': total,
+                    'next_cursor': str(next_offset) if next_offset < total else None})
+
 @app.route('/api/products/<product_id>', methods=['GET'])
 def get_global_product(product_id):
-    """Get product by ID only (searches all stores)"""
-    # 1. Search all stores for this ID
-    store_id, product = firebase.get_product_by_global_id(product_id)
+    """Get product by ID only (resolved through product_index)"""
+    # Find the owning store, then read the product and store name together
+    store_id, product, store_name = fanout.get_product_with_store_name(product_id)
     
     if not product:
         return jsonify({'error': 'Product not found'}), 404
@@ -407,37 +550,62 @@ def get_global_product(product_id):
     # Inject store_id for frontend
     product['store_id'] = store_id
     
-    # Try to get store name too
-    store = firebase.get_store(store_id)
-    if store:
-        product['store_name'] = store.get('name')
+    # Add the store name too
+    if store_name:
+        product['store_name'] = store_name
         
     return jsonify(product)
 
+# A product's QR image depends only on its id and the render parameters, so it never changes
+QR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
 @app.route('/api/qr-code/<product_id>', methods=['GET'])
 def get_id_qr_code(product_id):
-    """Generate a QR code image in-memory for a given product_id and stream it back"""
+    """
+    Serve the QR code PNG for a product_id (optional box_size/border query parameters).
+    Images are rendered once and cached; conditional requests get 304 without rendering.
+    """
     try:
-        import qrcode
-        import io
-        
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(product_id)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        buf = io.BytesIO()
-        img.save(buf, format='PNG')
-        buf.seek(0)
-        
-        return send_file(buf, mimetype='image/png', as_attachment=False)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        params = render_params({name: request.args[name] for name in ('box_size', 'border') if name in request.args})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The ETag is the cache key, so a revalidation is answered before any lookup or render
+    etag = cache_key(product_id, params)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            png, etag = qr_cache.get(product_id, params)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        response = Response(png, mimetype='image/png')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = QR_CACHE_CONTROL
+    return response
+
+@app.route('/api/stores/<store_id>/qr-sheet', methods=['GET'])
+@login_required
+@role_required('store_owner')
+def qr_sheet_api(store_id):
+    """Download every product QR of a store as one printable label sheet (format=pdf|png)"""
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in qr_sheets.FORMATS:
+        return jsonify({'error': 'format must be pdf or png'}), 400
+    
+    products = firebase.get_products(store_id)
+    if isinstance(products, dict) and isinstance(products.get('error'), str):
+        return jsonify(products), 502
+    
+    mimetype, extension = qr_sheets.FORMATS[fmt]
+    try:
+        sheet = qr_sheets.render_sheet(products, fmt, config.QR_SHEET_WORKERS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_with_context(sheet), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{store_id}-qr-labels.{extension}"'
+    })
 
 
 # Cart APIs
@@ -540,11 +708,14 @@ def create_order_api():
         'created_at': datetime.now().isoformat()
     }
     
+    # Everything below is committed as one atomic multi-location write
+    batch = firebase.batch()
+    
     # Create order
-    firebase.create_order(order_id, order_data)
+    batch.create_order(order_id, order_data)
     
     # Add to user's orders
-    firebase.add_order_to_user(user_id, order_id, {
+    batch.add_order_to_user(user_id, order_id, {
         'total': data.get('total'),
         'created_at': datetime.now().isoformat()
     })
@@ -572,7 +743,7 @@ def create_order_api():
     customer_email = session.get('email', 'Unknown')
 
     for store_id, store_data in store_orders.items():
-        firebase.add_order_to_store(store_id, order_id, {
+        batch.add_order_to_store(store_id, order_id, {
             'user_id': user_id,
             'customer_email': customer_email,
             'items': store_data['items'],
@@ -582,7 +753,11 @@ def create_order_api():
         })
     
     # Clear cart
-    firebase.clear_cart(user_id)
+    batch.clear_cart(user_id)
+    
+    result = batch.commit()
+    if isinstance(result, dict) and 'error' in result:
+        return jsonify({'error': 'Could not place order'}), 500
     
     return jsonify({
         'success': True,
@@ -594,10 +769,7 @@ def create_order_api():
 def get_order_api(order_id):
     """Get order details"""
     # In a real app, verify user owns this order
-    order_url = f"orders/{order_id}"
-    response = firebase._get_url(order_url)
-    import requests
-    order = requests.get(response).json()
+    order = firebase.get_order(order_id)
     return jsonify(order)
 
 @app.route('/api/stores/<store_id>/orders', methods=['GET'])
@@ -613,12 +785,19 @@ def get_store_orders_api(store_id):
 @login_required
 @role_required('customer')
 def history_api():
-    """Get scanned history"""
-    user_id = session['user_id']
-    history = firebase.get_history(user_id)
-    if isinstance(history, dict) and 'error' in history:
-        history = {}
-    return jsonify(history)
+    """
+    Scanned history, newest first, a page at a time: ?limit=&cursor=.
+    Returns {history, next_cursor}; pass next_cursor back as cursor for the next page
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit', HISTORY_PAGE_SIZE)), MAX_HISTORY_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+
+    history, next_cursor = firebase.get_history_page(session['user_id'], limit, request.args.get('cursor') or None)
+    if isinstance(history, dict):
+        return jsonify(history), 502
+    return jsonify({'history': history, 'next_cursor': next_cursor})
 
 # Product Request APIs
 @app.route('/api/requests', methods=['POST'])
@@ -647,10 +826,51 @@ def get_requests_api(store_id):
 @login_required
 @role_required('store_owner')
 def analytics_api(store_id):
-    """Get analytics for a store"""
-    analytics = firebase.get_store_analytics(store_id)
+    """
+    Get analytics for a store. With range=24h|7d|30d|90d or from=YYYY-MM-DD&to=YYYY-MM-DD
+    (and optionally granularity=hour|day) a bucketed timeseries is included.
+    """
+    analytics = fanout.get_store_analytics(store_id)
+    if request.args.get('range') or request.args.get('from'):
+        try:
+            granularity, start, end = parse_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Every top product costs a name read, so the list is bounded
+        limit = max(1, min(request.args.get('limit', TOP_PRODUCTS, type=int), MAX_TOP_PRODUCTS))
+        analytics['timeseries'] = fanout.get_store_timeseries(store_id, granularity, start, end, limit)
     return jsonify(analytics)
 
+# Monitoring APIs
+@app.route('/api/cache-stats', methods=['GET'])
+@metrics_token_required
+def cache_stats_api():
+    """Read cache counters, store mirror health, scan counter, background queue, QR cache and search index"""
+    return jsonify({
+        'read_cache': read_cache.stats() if read_cache else None,
+        'store_mirror': store_mirror.stats() if store_mirror else None,
+        'scan_counter': firebase.scan_counter.stats() if firebase.scan_counter else None,
+        'background_tasks': background.stats(),
+        'qr_cache': qr_cache.stats(),
+        'search_index': firebase.search.stats() if firebase.search else None
+    })
+
+@app.route('/metrics', methods=['GET'])
+@metrics_token_required
+def prometheus_metrics():
+    """Prometheus text: requests, latency histogram and Firebase calls/bytes per route"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics disabled'}), 404
+    return Response(request_tracing.metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/trace-summary', methods=['GET'])
+@metrics_token_required
+def trace_summary_api():
+    """Requests, Firebase calls, time and bytes per route since startup"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'Metrics disabled'}), 404
+    return jsonify(request_tracing.metrics.summary())
+
 # ========== RUN APPLICATION ==========
 
 
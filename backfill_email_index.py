@@ -0,0 +1,52 @@
+"""
+Backfill of the email_index node for users created before it existed, or indexed
+under an older key encoding. Downloads /users once, builds email -> {user_id, role},
+writes it in chunked multi-location PATCHes and removes entries under any other
+key. Safe to re-run.
+
+Usage: python backfill_email_index.py [--dry-run]
+"""
+
+import sys
+from firebase_service import FirebaseService, email_index_key
+
+CHUNK_SIZE = 500
+
+def build_email_index(users):
+    """Map encoded email -> index entry. The first user (in key order) wins, like the old scan."""
+    index = {}
+    if not isinstance(users, dict):
+        return index
+    for user_id in sorted(users):
+        user_data = users[user_id]
+        if not isinstance(user_data, dict) or not user_data.get('email'):
+            continue
+        key = email_index_key(user_data['email'])
+        if key not in index:
+            index[key] = {'user_id': user_id, 'role': user_data.get('role')}
+    return index
+
+def backfill_email_index(firebase, dry_run=False):
+    """Build and write the index, returning the number of entries"""
+    users = firebase.http.get(firebase._get_url("users")).json()
+    index = build_email_index(users)
+    
+    if dry_run:
+        return len(index)
+    
+    # Stale keys (e.g. from the encoding that left '_' unescaped) could match another email
+    stale = {key: None for key in firebase.get_keys("email_index") if key not in index}
+    items = list(index.items()) + list(stale.items())
+    for start in range(0, len(items), CHUNK_SIZE):
+        chunk = items[start:start + CHUNK_SIZE]
+        firebase.http.patch(firebase._get_url("email_index"), json=dict(chunk))
+    return len(index)
+
+if __name__ == "__main__":
+    dry_run = '--dry-run' in sys.argv
+    print("Building email index from /users...")
+    count = backfill_email_index(FirebaseService(), dry_run=dry_run)
+    if dry_run:
+        print(f"Dry run: {count} index entries would be written.")
+    else:
+        print(f"Backfill complete. Wrote {count} index entries.")
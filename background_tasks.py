@@ -0,0 +1,119 @@
+"""
+Background Tasks Module
+Small bounded thread-pool queue for side effects that should not delay a response
+(scan analytics, history writes)
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTasks:
+    """
+    Bounded work queue drained by worker threads.
+    - submit() never blocks: when the queue is full the task is dropped and counted.
+    - A failing task is retried up to `retries` times with linear backoff.
+    - shutdown() stops accepting work and drains what is queued.
+    With workers=0 tasks run inline, for hosts where background threads do not survive
+    the request (serverless).
+    """
+
+    def __init__(self, workers=2, max_queue=1000, retries=2, retry_backoff=0.5):
+        self.workers = workers
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._accepting = True
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.retried = 0
+        self.failed = 0
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f'background-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if workers:
+            atexit.register(self.shutdown)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs); returns False if it was dropped"""
+        if not self._accepting:
+            self._count('dropped')
+            return False
+        if not self.workers:
+            self._count('submitted')
+            self._execute(fn, args, kwargs)
+            return True
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            self._count('dropped')
+            logger.warning("Background queue full, dropped %s", getattr(fn, '__name__', fn))
+            return False
+        self._count('submitted')
+        return True
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _execute(self, fn, args, kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                fn(*args, **kwargs)
+                self._count('completed')
+                return
+            except Exception:
+                if attempt == self.retries:
+                    self._count('failed')
+                    logger.exception("Background task %s failed", getattr(fn, '__name__', fn))
+                    return
+                self._count('retried')
+                time.sleep(self.retry_backoff * (attempt + 1))
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._execute(*item)
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Block until every queued task has run (tasks keep being accepted)"""
+        if self.workers:
+            self._queue.join()
+
+    def shutdown(self, timeout=10.0):
+        """Stop accepting tasks, drain the queue and stop the workers"""
+        if not self._accepting:
+            return
+        self._accepting = False
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._queue.qsize(),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'retried': self.retried,
+                'failed': self.failed,
+            }
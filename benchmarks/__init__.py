@@ -0,0 +1,4 @@
+"""
+Benchmarks that measure single features against the local RTDB stand-in.
+Run them from the repository root as modules: python -m benchmarks.bench_<name>
+"""
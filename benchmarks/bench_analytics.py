@@ -0,0 +1,96 @@
+"""
+Store Analytics Benchmark
+Compares the old analytics computation (download every product, request and order,
+then sort) with one read of the precomputed analytics/<store_id> rollup, and checks
+that the rollups maintained at write time match a rebuild from raw data.
+
+Usage: python -m benchmarks.bench_analytics [products] [orders] [latency_ms]
+"""
+
+import json
+import statistics
+import sys
+import time
+
+from local_rtdb import start_local_rtdb
+from firebase_service import FirebaseService, build_store_analytics
+from rebuild_analytics import expected_analytics, expected_scan_counts, rebuild_analytics
+
+# Roughly the size of the base64 data URLs written by convert_qrs.py
+QR_BLOB = 'data:image/png;base64,' + 'A' * 1400
+
+
+def make_store(products, orders):
+    return {
+        'name': 'Bench Store',
+        'products': {
+            f"p{j:05d}": {'name': f"Product {j}", 'price': 10, 'stock': 5, 'qr_code': QR_BLOB, 'scan_count': j % 97}
+            for j in range(products)
+        },
+        'orders': {
+            f"o{k:05d}": {'total': 20, 'status': 'confirmed',
+                          'items': [{'product_name': 'Product', 'price': 10, 'quantity': 2}]}
+            for k in range(orders)
+        },
+    }
+
+
+def raw_analytics(firebase, store_id):
+    """The previous get_store_analytics: three full downloads"""
+    return build_store_analytics(
+        firebase.get_products(store_id), firebase.get_store_requests(store_id), firebase.get_store_orders(store_id))
+
+
+def measure(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    orders = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 5.0) / 1000
+
+    stores = {'s1': make_store(products, orders)}
+    requests_data = {'s1': {f"Wish {i}": {'count': i % 13} for i in range(100)}}
+    server = start_local_rtdb({
+        'stores': stores,
+        'requests': requests_data,
+        'analytics': expected_analytics(stores, requests_data),
+        'scan_counts': expected_scan_counts(stores),
+    }, latency=latency)
+    firebase = FirebaseService(server.url)
+
+    raw_bytes = sum(len(json.dumps(server.db.get(path))) for path in
+                    ('stores/s1/products', 'requests/s1', 'stores/s1/orders'))
+    rollup_bytes = len(json.dumps(server.db.get('analytics/s1')))
+    assert raw_analytics(firebase, 's1') == firebase.get_store_analytics('s1')
+
+    print(f"Store with {products} products, {orders} orders, {latency * 1000:.0f} ms latency\n")
+    print(f"{'':<22}{'bytes read':>12}{'time (ms)':>12}")
+    print(f"{'raw (old)':<22}{raw_bytes:>12}{measure(lambda: raw_analytics(firebase, 's1')):>12.1f}")
+    print(f"{'analytics rollup':<22}{rollup_bytes:>12}{measure(lambda: firebase.get_store_analytics('s1')):>12.1f}")
+
+    # Writes keep the rollups current without a rebuild
+    for j in range(20):
+        firebase.apply_scan_increments({('s1', f"p{j:05d}"): 200 + j})
+    firebase.add_product_request('s1', 'Brand new wish')
+    batch = firebase.batch()
+    batch.add_order_to_store('s1', 'o_new', {'total': 5})
+    batch.commit()
+    firebase.delete_product('s1', 'p00019')
+
+    analytics = firebase.get_store_analytics('s1')
+    assert analytics['total_orders'] == orders + 1
+    assert analytics['most_scanned'][0] == {'name': 'Product 18', 'count': 18 % 97 + 218}
+    print("\nRollups after writes:", json.dumps(analytics['most_scanned'][:2]))
+    print("Verify against raw data:", "ok" if rebuild_analytics(firebase, verify_only=True) else "DRIFT")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
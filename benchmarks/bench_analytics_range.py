@@ -0,0 +1,109 @@
+"""
+Analytics Range Query Benchmark
+"Revenue by product this week" and "scans per day over the last 30/90 days" for a busy
+store, answered from raw orders (the only option before buckets existed) and from the
+daily analytics buckets, plus the NumPy aggregation against a plain-Python loop.
+
+Usage: python -m benchmarks.bench_analytics_range [products] [orders_per_day] [days]
+"""
+
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from analytics_engine import aggregate, bucket_keys, local_now, order_bucket_updates, scan_bucket_updates
+from firebase_service import FirebaseService
+from local_rtdb import LocalRTDB, start_local_rtdb
+
+
+def make_history(products, orders_per_day, days):
+    """Raw orders for `days` days, and the same history written through the bucket updates"""
+    rng = random.Random(7)
+    db = LocalRTDB({'stores': {'s1': {'name': 'Bench Store'}}})
+    orders = {}
+    now = local_now()
+    for day in range(days):
+        when = now - timedelta(days=day, hours=rng.randrange(12))
+        db.update('', scan_bucket_updates(
+            {('s1', f"p{rng.randrange(products):05d}"): rng.randrange(1, 5) for _ in range(orders_per_day * 3)}, when))
+        for k in range(orders_per_day):
+            items = [{'product_id': f"p{rng.randrange(products):05d}", 'price': rng.randrange(10, 500), 'quantity': rng.randrange(1, 4)}
+                     for _ in range(3)]
+            orders[f"o{day:03d}_{k:04d}"] = {'items': items, 'created_at': when.isoformat(), 'status': 'confirmed'}
+            db.update('', order_bucket_updates('s1', items, when))
+    db.set('stores/s1/orders', orders)
+    return db.root
+
+
+def raw_revenue_by_product(firebase, start):
+    """Without buckets: download every order and filter by created_at"""
+    revenue = Counter()
+    for order in firebase.get_store_orders('s1').values():
+        if order['created_at'] >= start.isoformat():
+            for item in order['items']:
+                revenue[item['product_id']] += item['price'] * item['quantity']
+    return revenue
+
+
+def python_aggregate(buckets, keys):
+    """Reference per-cell loop computing the same series and per-product totals"""
+    series, per_product = defaultdict(int), defaultdict(int)
+    for key in keys:
+        bucket = buckets.get(key) or {}
+        for code in ('s', 'u', 'r'):
+            for product_id, value in bucket.get(code, {}).items():
+                series[code, key] += value
+                per_product[code, product_id] += value
+    return series, per_product
+
+
+def median_ms(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    orders_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 90
+
+    server = start_local_rtdb(make_history(products, orders_per_day, days))
+    firebase = FirebaseService(server.url)
+    now = local_now()
+    week_start = (now - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Both answers must agree before timing them
+    raw = raw_revenue_by_product(firebase, week_start)
+    bucketed = firebase.get_store_timeseries('s1', 'day', week_start, now, limit=products)
+    assert {p['product_id']: round(p['revenue'] * 100) for p in bucketed['products'] if p['revenue']} == \
+        {pid: value * 100 for pid, value in raw.items()}
+
+    raw_bytes = len(json.dumps(server.db.get('stores/s1/orders')))
+    print(f"{products} products, {orders_per_day} orders/day, {days} days of history\n")
+    print(f"{'query':<38}{'raw orders (ms)':>16}{'buckets (ms)':>14}")
+    print(f"{'revenue by product, this week':<38}"
+          f"{median_ms(lambda: raw_revenue_by_product(firebase, week_start)):>16.1f}"
+          f"{median_ms(lambda: firebase.get_store_timeseries('s1', 'day', week_start, now)):>14.1f}")
+    for span in (30, 90):
+        start = now - timedelta(days=span)
+        print(f"{f'scans per day, last {span} days':<38}{'n/a':>16}"
+              f"{median_ms(lambda: firebase.get_store_timeseries('s1', 'day', start, now)):>14.1f}")
+    print(f"\nRaw orders download: {raw_bytes / 1e6:.1f} MB (and no per-scan timestamps at all)")
+
+    keys = bucket_keys('day', now - timedelta(days=days), now)
+    buckets = firebase.get_analytics_buckets('s1', 'day', keys[0], keys[-1])
+    print(f"Aggregating {len(keys)} daily buckets: NumPy {median_ms(lambda: aggregate(buckets, 'day', keys)):.1f} ms, "
+          f"plain Python {median_ms(lambda: python_aggregate(buckets, keys)):.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Async Fan-out Benchmark
+Wall-clock time of the handlers that make several independent reads, using the
+sync FirebaseService and the async client (through its sync wrapper), against a
+local RTDB stand-in with injected per-request latency.
+
+Usage: python -m benchmarks.bench_async [latency_ms] [runs]
+"""
+
+import statistics
+import sys
+import time
+
+from analytics_engine import parse_range, scan_bucket_updates
+from firebase_async import AsyncFirebaseService
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+
+
+def seed():
+    products = {f"p{i}": {'name': f"Product {i}", 'price': 10, 'scan_count': i} for i in range(50)}
+    return {
+        'stores': {'s1': {'name': 'Store 1', 'products': products,
+                          'orders': {f"o{i}": {'total': 10} for i in range(20)}}},
+        'requests': {'s1': {f"Wish {i}": {'count': i} for i in range(10)}},
+        'product_index': {pid: 's1' for pid in products},
+    }
+
+
+def median_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    server = start_local_rtdb(seed(), latency=latency_ms / 1000)
+
+    firebase = FirebaseService(server.url)
+    async_client = AsyncFirebaseService(firebase)
+    fanout = async_client.sync
+    # This week's buckets, so the timeseries has top products to name
+    firebase.update_paths(scan_bucket_updates({('s1', f"p{i}"): i + 1 for i in range(50)}))
+    granularity, start, end = parse_range({'range': '7d'})
+
+    cases = [
+        ('global product + store name', lambda: firebase.get_product_with_store_name('p7'),
+         lambda: fanout.get_product_with_store_name('p7')),
+        ('store analytics', lambda: firebase.get_store_analytics('s1'),
+         lambda: fanout.get_store_analytics('s1')),
+        ('timeseries, top 10 named', lambda: firebase.get_store_timeseries('s1', granularity, start, end),
+         lambda: fanout.get_store_timeseries('s1', granularity, start, end)),
+    ]
+
+    print(f"Injected latency {latency_ms:.0f} ms per request\n")
+    print(f"{'handler':<30}{'sync (ms)':>12}{'async (ms)':>12}")
+    for label, sync_fn, async_fn in cases:
+        assert sync_fn() == async_fn()
+        print(f"{label:<30}{median_ms(sync_fn, runs):>12.1f}{median_ms(async_fn, runs):>12.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Bulk Delete Benchmark
+Deletes most stores of a seeded local RTDB stand-in (with simulated network latency)
+the old cleanup_stores.py way, one DELETE per store, and with bulk_maintenance's
+chunked concurrent PATCH-to-null, reporting calls, time and the orphaned entries
+each approach leaves behind. Then resets the whole database both ways.
+
+Usage: python -m benchmarks.bench_bulk_delete [stores] [latency_ms]
+"""
+
+import random
+import sys
+import time
+
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+from populate_db import generate_store_specs
+from rebuild_analytics import expected_scan_counts
+from rebuild_indexes import diff_index, expected_owner_index, expected_product_index, expected_store_summaries
+from seed_engine import build_dataset
+import bulk_maintenance
+
+KEEP = 5
+
+
+def dataset(stores):
+    rng = random.Random(1)
+    updates = build_dataset(generate_store_specs(stores, 10, rng), stores, stores * 5, rng)
+    server = start_local_rtdb(latency=0)
+    server.db.update('', updates)
+    return server
+
+
+def orphans(firebase):
+    """Entries of derived nodes whose store no longer exists"""
+    stores = firebase.get_all_stores()
+    count = 0
+    for node, expected in (('product_index', expected_product_index(stores)),
+                           ('owner_index', expected_owner_index(stores)),
+                           ('store_summaries', expected_store_summaries(stores)),
+                           ('scan_counts', expected_scan_counts(stores))):
+        count += len(diff_index(expected, firebase.http.get(firebase._get_url(node)).json())[2])
+    for node in ('requests', 'analytics', 'analytics_buckets'):
+        count += len([key for key in firebase.get_keys(node) if key not in stores])
+    return count
+
+
+def timed(server, latency, fn):
+    server.latency = latency
+    server.db.request_count = 0
+    start = time.perf_counter()
+    fn()
+    elapsed, calls = time.perf_counter() - start, server.db.request_count
+    server.latency = 0
+    return elapsed, calls
+
+
+def main():
+    stores = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    rows = []
+
+    server = dataset(stores)
+    firebase = FirebaseService(server.url)
+
+    def old_cleanup():
+        for store_id in sorted(firebase.get_all_stores())[KEEP:]:
+            firebase.http.delete(firebase._get_url(f"stores/{store_id}"))
+
+    rows.append(('stores: DELETE per store (old)', *timed(server, latency, old_cleanup), orphans(firebase)))
+    server.shutdown()
+
+    server = dataset(stores)
+    firebase = FirebaseService(server.url)
+
+    def new_cleanup():
+        store_ids = sorted(firebase.get_keys("stores"))[KEEP:]
+        bulk_maintenance.delete_paths(firebase, bulk_maintenance.store_paths(firebase, store_ids))
+
+    rows.append(('stores: bulk_maintenance', *timed(server, latency, new_cleanup), orphans(firebase)))
+
+    def old_reset():
+        for node in ('users', 'stores', 'orders', 'requests'):
+            firebase.http.delete(firebase._get_url(node))
+
+    def new_reset():
+        bulk_maintenance.delete_paths(firebase, bulk_maintenance.reset_paths(firebase))
+
+    server.db.root = {}
+    server.db.update('', build_dataset(generate_store_specs(stores, 10, random.Random(2)), stores, stores * 5,
+                                       random.Random(2)))
+    elapsed, calls = timed(server, latency, old_reset)
+    rows.append(('reset: DELETE per root node (old)', elapsed, calls, len(server.db.get('') or {})))
+    server.db.update('', build_dataset(generate_store_specs(stores, 10, random.Random(2)), stores, stores * 5,
+                                       random.Random(2)))
+    elapsed, calls = timed(server, latency, new_reset)
+    rows.append(('reset: bulk_maintenance', elapsed, calls, len(server.db.get('') or {})))
+    server.shutdown()
+
+    print(f"{stores} stores x 10 products (keep {KEEP}), {latency * 1000:.0f} ms per request\n")
+    print(f"{'':<36}{'calls':>8}{'seconds':>10}{'left behind':>13}")
+    for label, elapsed, calls, left in rows:
+        print(f"{label:<36}{calls:>8}{elapsed:>10.2f}{left:>13}")
+    print("\n'left behind' counts orphaned index/rollup entries for store deletes and")
+    print("root nodes still present after a reset.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Checkout Benchmark
+Times order creation for carts spanning 1, 5 and 20 stores against a local RTDB
+stand-in with injected per-request latency: the old N+3 sequential writes versus
+the single multi-location PATCH used by /api/orders.
+
+Usage: python -m benchmarks.bench_checkout [latency_ms] [runs]
+"""
+
+import statistics
+import sys
+import time
+
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+
+
+def make_order(order_id, stores):
+    items = [{'store_id': f"store{i}", 'product_name': 'Item', 'price': 10, 'quantity': 1} for i in range(stores)]
+    order = {'order_id': order_id, 'user_id': 'u1', 'items': items, 'total': 10 * stores, 'status': 'confirmed'}
+    store_orders = {f"store{i}": {'user_id': 'u1', 'items': [items[i]], 'total': 10, 'status': 'confirmed'}
+                    for i in range(stores)}
+    return order, store_orders
+
+
+def sequential(firebase, order_id, order, store_orders):
+    """The previous create_order_api write sequence"""
+    firebase.create_order(order_id, order)
+    firebase.add_order_to_user('u1', order_id, {'total': order['total']})
+    for store_id, store_order in store_orders.items():
+        firebase.add_order_to_store(store_id, order_id, store_order)
+    firebase.clear_cart('u1')
+
+
+def batched(firebase, order_id, order, store_orders):
+    batch = firebase.batch()
+    batch.create_order(order_id, order)
+    batch.add_order_to_user('u1', order_id, {'total': order['total']})
+    for store_id, store_order in store_orders.items():
+        batch.add_order_to_store(store_id, order_id, store_order)
+    batch.clear_cart('u1')
+    batch.commit()
+
+
+def median_ms(fn, firebase, stores, runs):
+    timings = []
+    for run in range(runs):
+        order_id = f"order_{fn.__name__}_{stores}_{run}"
+        order, store_orders = make_order(order_id, stores)
+        start = time.perf_counter()
+        fn(firebase, order_id, order, store_orders)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    server = start_local_rtdb(latency=latency_ms / 1000)
+    firebase = FirebaseService(server.url)
+
+    print(f"Injected latency {latency_ms:.0f} ms per request\n")
+    print(f"{'stores':>7}  {'sequential (ms)':>16}  {'batched (ms)':>13}")
+    for stores in (1, 5, 20):
+        seq = median_ms(sequential, firebase, stores, runs)
+        bat = median_ms(batched, firebase, stores, runs)
+        print(f"{stores:>7}  {seq:>16.1f}  {bat:>13.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Store Dashboard Cold-Load Benchmark
+Times a store owner's first dashboard load (login + /api/my-store with no cached
+store_id) against a local RTDB stand-in as the number of stores grows.
+The full-scan column reproduces the old get_all_stores() fallback for comparison.
+
+Usage: python -m benchmarks.bench_dashboard [max_stores] [loads]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+# app.py would otherwise start indexing the configured database for search in the background
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from local_rtdb import start_local_rtdb
+from firebase_service import FirebaseService
+from rebuild_indexes import expected_owner_index
+import app as app_module
+
+
+def make_stores(count):
+    stores, users = {}, {}
+    for i in range(count):
+        owner_id = f"owner{i:06d}"
+        users[owner_id] = {'email': f"owner{i}@example.com", 'role': 'store_owner'}
+        stores[f"store{i:06d}"] = {
+            'name': f"Store {i}",
+            'owner_id': owner_id,
+            'description': 'Benchmark store',
+            'products': {
+                f"s{i}p{j}": {'name': f"Product {j}", 'price': 10 + j, 'stock': 5, 'scan_count': j}
+                for j in range(5)
+            },
+        }
+    return stores, users
+
+
+def full_scan(firebase, owner_id):
+    """The previous /api/my-store fallback"""
+    for store_id, store_data in firebase.get_all_stores().items():
+        if isinstance(store_data, dict) and store_data.get('owner_id') == owner_id:
+            return store_id
+    return None
+
+
+def cold_load(client, index):
+    client.post('/api/login', json={'email': f"owner{index}@example.com", 'password': 'x'})
+    with client.session_transaction() as sess:
+        sess.pop('store_id', None)  # simulate another device / expired cookie
+    store = client.get('/api/my-store').get_json()
+    assert store and store['id'] == f"store{index:06d}"
+
+
+def median_ms(fn, runs):
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    max_stores = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    loads = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app_module.app.config['TESTING'] = True
+
+    print(f"{'stores':>8}  {'full scan (ms)':>15}  {'indexed cold load (ms)':>23}")
+    size = 100
+    while size <= max_stores:
+        stores, users = make_stores(size)
+        email_index = {f"owner{i}@example,com": {'user_id': f"owner{i:06d}", 'role': 'store_owner'} for i in range(size)}
+        server = start_local_rtdb({'stores': stores, 'users': users, 'email_index': email_index,
+                                   'owner_index': expected_owner_index(stores)})
+        firebase = FirebaseService(server.url)
+        app_module.firebase = firebase
+        client = app_module.app.test_client()
+        picks = [(i * 7919) % size for i in range(loads)]
+
+        scan_ms = median_ms(lambda i: full_scan(firebase, f"owner{picks[i]:06d}"), loads)
+        index_ms = median_ms(lambda i: cold_load(client, picks[i]), loads)
+        print(f"{size:>8}  {scan_ms:>15.2f}  {index_ms:>23.2f}")
+
+        server.shutdown()
+        server.server_close()
+        size *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Scan History Benchmark
+Seeds a local RTDB stand-in with users carrying the old users/<id>/scanned_history
+maps, then compares before and after migrate_scan_history.py: bytes and time to
+read one user record, the whole /users node and the first /api/history page. Then
+scans keep coming and the log size is sampled, to show compaction holding it near
+SCAN_HISTORY_LIMIT.
+
+Usage: python -m benchmarks.bench_history [users] [history_per_user] [appends]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# app.py would otherwise start indexing the configured database for search in the background
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+from migrate_scan_history import migrate_all_history
+from scan_history import HISTORY_NODE, history_key
+import app as app_module
+import config
+
+
+def make_users(count, history):
+    start = datetime(2026, 1, 1)
+    return {f"user{i:05d}": {
+        'email': f"user{i}@example.com",
+        'role': 'customer',
+        'cart': {'p1': {'product_name': 'Item', 'price': 10, 'quantity': 1, 'store_id': 's1'}},
+        'scanned_history': {
+            f"product{j:06d}": {'store_id': f"store{j % 50}", 'product_name': f"Product {j} 500 g",
+                                'scanned_at': (start + timedelta(minutes=j)).isoformat()}
+            for j in range(history)
+        },
+    } for i in range(count)}
+
+
+def read(firebase, path, **params):
+    """(bytes, ms) of one GET"""
+    start = time.perf_counter()
+    response = firebase.http.get(firebase._get_url(path), params=params or None)
+    return len(response.content), (time.perf_counter() - start) * 1000
+
+
+def history_page(client):
+    start = time.perf_counter()
+    response = client.get('/api/history?limit=20')
+    return len(response.data), (time.perf_counter() - start) * 1000
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    history = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    appends = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    server = start_local_rtdb({'users': make_users(users, history)})
+    firebase = FirebaseService(server.url)
+    firebase.history_limit = config.SCAN_HISTORY_LIMIT
+    firebase.history_compact_every = config.SCAN_HISTORY_COMPACT_EVERY
+
+    app_module.firebase = firebase
+    app = app_module.app
+    app.config['TESTING'] = True
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'user00000'
+        sess['role'] = 'customer'
+
+    print(f"{users} users with {history} scans each; SCAN_HISTORY_LIMIT={config.SCAN_HISTORY_LIMIT}, "
+          f"SCAN_HISTORY_COMPACT_EVERY={config.SCAN_HISTORY_COMPACT_EVERY}\n")
+    before = {
+        'one user record': read(firebase, 'users/user00000'),
+        'all of /users': read(firebase, 'users'),
+        'scan history': read(firebase, 'users/user00000/scanned_history'),
+    }
+
+    checkpoint = '.migration-bench_history.json'
+    migrate_all_history(firebase, restart=True, checkpoint=checkpoint)
+    os.remove(checkpoint)
+    print()
+
+    after = {
+        'one user record': read(firebase, 'users/user00000'),
+        'all of /users': read(firebase, 'users'),
+        'scan history': history_page(client),
+    }
+    print(f"{'read':<28}{'bytes before':>14}{'ms':>8}{'bytes after':>14}{'ms':>8}")
+    for name in before:
+        print(f"{name:<28}{before[name][0]:>14,}{before[name][1]:>8.1f}{after[name][0]:>14,}{after[name][1]:>8.1f}")
+    print("(scan history before: the whole map; after: the first 20-entry /api/history page)")
+
+    # Steady state: a heavy scanner keeps scanning
+    sizes, start = [], time.perf_counter()
+    for i in range(appends):
+        firebase.add_to_history('user00000', 'store0', f"new{i:06d}", 'Fresh scan', history_key())
+        if i % 10 == 9:
+            sizes.append(len(firebase.get_keys(f"{HISTORY_NODE}/user00000")))
+    elapsed = time.perf_counter() - start
+    print(f"\n{appends} appends: {elapsed * 1000 / appends:.2f} ms each (including compactions)")
+    print(f"log size while scanning: min {min(sizes)}, mean {sum(sizes) / len(sizes):.0f}, max {max(sizes)}")
+
+    page, cursor, seen = client.get('/api/history?limit=50').get_json(), None, 0
+    while True:
+        seen += len(page['history'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+        page = client.get(f"/api/history?limit=50&cursor={cursor}").get_json()
+    print(f"paged through {seen} entries, newest first")
+
+
+if __name__ == "__main__":
+    main()
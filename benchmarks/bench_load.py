@@ -0,0 +1,326 @@
+"""
+End-to-End Load Test
+Serves the real app.py over HTTP against a seeded local RTDB stand-in (with simulated
+network latency) and drives it with concurrent sessions through realistic scenarios:
+login storms, QR scan bursts, cart add/remove, checkout, store dashboard analytics
+and a weighted mix of all of them.
+
+For every scenario it reports p50/p95/p99 latency, throughput, error count and
+backend (database) calls per request, counted at the stand-in after background
+tasks and buffered scan counts have been flushed. Results can be written as JSON
+and compared against an earlier run, e.g. one taken on the previous commit.
+
+App settings come from the environment as usual (STORE_MIRROR=1, ASYNC_FANOUT=0,
+SCAN_FLUSH_INTERVAL=0, ...), so configurations can be compared the same way.
+
+Usage:
+  python -m benchmarks.bench_load [--scenarios scan,cart] [--requests 400] [--concurrency 8]
+                       [--latency-ms 5] [--stores 50] [--seed 1]
+                       [--output results.json] [--compare baseline.json] [--threshold 0.2]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from local_rtdb import start_local_rtdb
+
+SCENARIO_NAMES = ('login', 'scan', 'cart', 'checkout', 'dashboard', 'mixed')
+MIX_WEIGHTS = {'scan': 50, 'cart': 20, 'dashboard': 15, 'login': 10, 'checkout': 5}
+
+
+class Client:
+    """One browser session; records (route, ms, status) for every request it makes"""
+
+    def __init__(self, base_url, samples):
+        self.base_url = base_url
+        self.samples = samples
+        self.session = requests.Session()
+
+    def call(self, method, route, path, record=True, **kwargs):
+        start = time.perf_counter()
+        response = self.session.request(method, self.base_url + path, allow_redirects=False, **kwargs)
+        if record:
+            self.samples.append((route, (time.perf_counter() - start) * 1000, response.status_code))
+        return response
+
+    def login(self, email, record=False):
+        return self.call('POST', '/api/login', '/api/login', record, json={'email': email, 'password': 'load-test'})
+
+
+# ========== DATASET ==========
+
+def make_dataset(stores, customers, orders, seed):
+    """Seed data plus the ids the scenarios pick from"""
+    from populate_db import generate_store_specs
+    from seed_engine import build_dataset
+
+    rng = random.Random(seed)
+    updates = build_dataset(generate_store_specs(stores, 10, rng), customers, orders, rng)
+    customer_emails, owners, products = [], [], []
+    for path, value in updates.items():
+        if path.startswith('users/') and value['role'] == 'customer':
+            customer_emails.append(value['email'])
+        elif path.startswith('stores/'):
+            store_id = path.split('/', 1)[1]
+            owners.append((updates[f"users/{value['owner_id']}"]['email'], store_id))
+            for product_id, product in value['products'].items():
+                products.append({'product_id': product_id, 'store_id': store_id,
+                                 'product_name': product['name'], 'price': product['price']})
+    return updates, {'customers': customer_emails, 'owners': owners, 'products': products}
+
+
+# ========== SCENARIOS ==========
+
+def login(client, ids, rng):
+    fresh = Client(client.base_url, client.samples)
+    fresh.login(rng.choice(ids['customers'] + [email for email, _ in ids['owners']]), record=True)
+
+
+def scan(client, ids, rng):
+    """What customer.js does for a scanned code: resolve the product, then open it"""
+    product = rng.choice(ids['products'])
+    client.call('GET', '/api/products/<id>', f"/api/products/{product['product_id']}")
+    client.call('GET', '/api/stores/<sid>/products/<pid>',
+                f"/api/stores/{product['store_id']}/products/{product['product_id']}")
+
+
+def cart(client, ids, rng):
+    product = rng.choice(ids['products'])
+    client.call('POST', '/api/cart', '/api/cart', json=dict(product, quantity=1))
+    client.call('GET', '/api/cart', '/api/cart')
+    client.call('DELETE', '/api/cart/<pid>', f"/api/cart/{product['product_id']}")
+
+
+def checkout(client, ids, rng):
+    store_id = rng.choice(ids['products'])['store_id']
+    items = [dict(p, quantity=rng.randint(1, 3)) for p in ids['products'] if p['store_id'] == store_id][:2]
+    for item in items:
+        client.call('POST', '/api/cart', '/api/cart', json=item)
+    total = round(sum(item['price'] * item['quantity'] for item in items), 2)
+    client.call('POST', '/api/orders', '/api/orders',
+                json={'items': items, 'total': total, 'delivery_method': 'pickup'})
+
+
+def dashboard(client, ids, rng):
+    store_id = client.store_id
+    client.call('GET', '/api/stores/<sid>/analytics', f"/api/stores/{store_id}/analytics")
+    client.call('GET', '/api/stores/<sid>/analytics?range', f"/api/stores/{store_id}/analytics?range=7d")
+
+
+SCENARIOS = {'login': login, 'scan': scan, 'cart': cart, 'checkout': checkout, 'dashboard': dashboard}
+
+
+def mixed(client, ids, rng):
+    name = rng.choices(list(MIX_WEIGHTS), weights=list(MIX_WEIGHTS.values()))[0]
+    if name == 'dashboard':
+        # Customers have no dashboard; use the owner session every mixed client also holds
+        return dashboard(client.owner, ids, rng)
+    return SCENARIOS[name](client, ids, rng)
+
+
+SCENARIOS['mixed'] = mixed
+
+
+# ========== RUNNER ==========
+
+def drain(app_module):
+    """Run queued background writes and flush buffered scan counts"""
+    app_module.background.join()
+    if app_module.firebase.scan_counter is not None:
+        app_module.firebase.scan_counter.flush()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed, backend_calls):
+    latencies = sorted(ms for _, ms, _ in samples)
+    routes = {}
+    for route, ms, status in samples:
+        routes.setdefault(route, []).append(ms)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, status in samples if status >= 400),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        'backend_calls': backend_calls,
+        'backend_calls_per_request': round(backend_calls / len(samples), 2) if samples else 0.0,
+        'routes': {route: {'requests': len(values), 'p50_ms': round(percentile(sorted(values), 50), 2),
+                           'p95_ms': round(percentile(sorted(values), 95), 2)}
+                   for route, values in sorted(routes.items())},
+    }
+
+
+def run_scenario(name, base_url, server, app_module, ids, operations, concurrency, seed):
+    """Log in `concurrency` clients, then run `operations` scenario iterations across them"""
+    samples = []
+    clients = []
+    for index in range(concurrency):
+        client = Client(base_url, samples)
+        owner_email, client.store_id = ids['owners'][index % len(ids['owners'])]
+        if name == 'dashboard':
+            client.login(owner_email)
+        else:
+            client.login(ids['customers'][index % len(ids['customers'])])
+        if name == 'mixed':
+            client.owner = Client(base_url, samples)
+            client.owner.store_id = client.store_id
+            client.owner.login(owner_email)
+        clients.append(client)
+
+    drain(app_module)
+    calls_before = server.db.request_count
+    scenario = SCENARIOS[name]
+
+    def worker(index):
+        rng = random.Random(f"{seed}-{name}-{index}")
+        for _ in range(operations // concurrency + (1 if index < operations % concurrency else 0)):
+            scenario(clients[index], ids, rng)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    drain(app_module)
+    return summarize(samples, elapsed, server.db.request_count - calls_before)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ========== REPORTING ==========
+
+def print_results(results):
+    print(f"{'scenario':<12}{'reqs':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'calls/req':>11}")
+    for name, r in results['scenarios'].items():
+        print(f"{name:<12}{r['requests']:>7}{r['errors']:>5}{r['throughput_rps']:>9.1f}{r['p50_ms']:>9.1f}"
+              f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['backend_calls_per_request']:>11.2f}")
+
+    if results.get('traced_routes'):
+        print(f"\n{'route (traced in the app)':<52}{'reqs':>7}{'calls/req':>11}{'db ms/req':>11}{'KB/req':>9}")
+        for route, r in results['traced_routes'].items():
+            if r['requests']:
+                size_kb = (r['bytes_sent'] + r['bytes_received']) / 1024 / r['requests']
+                print(f"{route:<52}{r['requests']:>7}{r['backend_calls'] / r['requests']:>11.2f}"
+                      f"{r['backend_seconds'] * 1000 / r['requests']:>11.1f}{size_kb:>9.1f}")
+
+
+def compare(results, baseline, threshold):
+    """Print p95 and calls/request against a baseline; returns the regressed scenarios"""
+    regressions = []
+    print(f"\nAgainst {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    print(f"{'scenario':<12}{'p95 ms':>20}{'calls/req':>20}")
+    for name, r in results['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if not old:
+            continue
+        slower = r['p95_ms'] > old['p95_ms'] * (1 + threshold)
+        chattier = r['backend_calls_per_request'] > old['backend_calls_per_request'] + 0.01
+        flag = '  REGRESSION' if slower or chattier else ''
+        print(f"{name:<12}{old['p95_ms']:>9.1f} -> {r['p95_ms']:<7.1f}"
+              f"{old['backend_calls_per_request']:>9.2f} -> {r['backend_calls_per_request']:<7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end load test of the Flask API")
+    parser.add_argument('--scenarios', default=','.join(SCENARIO_NAMES))
+    parser.add_argument('--requests', type=int, default=400, help="scenario iterations per scenario")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="simulated database round-trip")
+    parser.add_argument('--stores', type=int, default=50)
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--compare', help="JSON results of an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed p95 slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    # config.py reads the database URL at import time, so nothing importing it may load before this
+    server = start_local_rtdb(latency=args.latency_ms / 1000)
+    os.environ['FIREBASE_DATABASE_URL'] = server.url
+    updates, ids = make_dataset(args.stores, args.customers, args.orders, args.seed)
+    server.db.update('', updates)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    import app as app_module
+    from werkzeug.serving import make_server
+
+    # The search index is built in the background at startup; keep its reads out of the scenarios
+    search = app_module.firebase.search
+    while search is not None and not search.ready and search.last_error is None:
+        time.sleep(0.05)
+
+    http_server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{http_server.server_port}"
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'env': {key: os.environ[key] for key in ('STORE_MIRROR', 'ASYNC_FANOUT', 'SCAN_FLUSH_INTERVAL',
+                                                   'BACKGROUND_WORKERS', 'READ_CACHE_SIZE') if key in os.environ},
+        },
+        'scenarios': {},
+    }
+    for name in names:
+        results['scenarios'][name] = run_scenario(name, base_url, server, app_module, ids,
+                                                  args.requests, args.concurrency, args.seed)
+    results['traced_routes'] = app_module.request_tracing.metrics.summary()
+
+    print(f"{args.stores} stores, {len(ids['products'])} products, {args.customers} customers; "
+          f"{args.concurrency} sessions, {args.latency_ms:g} ms database latency\n")
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    http_server.shutdown()
+    server.shutdown()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
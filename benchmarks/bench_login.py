@@ -0,0 +1,74 @@
+"""
+Login Load Test
+Times FirebaseService.get_user_by_email against a local RTDB stand-in as the
+user base grows, comparing the old full /users scan with the email_index lookup.
+
+Usage: python -m benchmarks.bench_login [max_users] [lookups]
+"""
+
+import statistics
+import sys
+import time
+
+from backfill_email_index import build_email_index
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+
+
+def make_users(count):
+    """Users carrying a realistic cart and scan history"""
+    users = {}
+    for i in range(count):
+        users[f"user{i:06d}"] = {
+            'email': f"user{i}@example.com",
+            'role': 'customer',
+            'cart': {'p1': {'product_name': 'Item', 'price': 10, 'quantity': 1, 'store_id': 's1'}},
+            'scanned_history': {
+                f"p{j}": {'product_name': 'Item', 'store_id': 's1', 'scanned_at': '2026-01-01T00:00:00'}
+                for j in range(5)
+            },
+        }
+    return users
+
+
+def scan_lookup(firebase, email):
+    """The previous implementation: download every user and scan"""
+    users = firebase.http.get(firebase._get_url("users")).json() or {}
+    for user_id, user_data in users.items():
+        if isinstance(user_data, dict) and user_data.get('email') == email:
+            return user_id
+    return None
+
+
+def time_lookups(fn, emails):
+    timings = []
+    for email in emails:
+        start = time.perf_counter()
+        assert fn(email)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    max_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"{'users':>8}  {'full scan (ms)':>15}  {'indexed (ms)':>13}")
+    size = 1000
+    while size <= max_users:
+        users = make_users(size)
+        server = start_local_rtdb({'users': users, 'email_index': build_email_index(users)})
+        firebase = FirebaseService(server.url)
+        emails = [f"user{(i * 7919) % size}@example.com" for i in range(lookups)]
+
+        scan_ms = time_lookups(lambda e: scan_lookup(firebase, e), emails)
+        index_ms = time_lookups(lambda e: firebase.get_user_by_email(e), emails)
+        print(f"{size:>8}  {scan_ms:>15.2f}  {index_ms:>13.2f}")
+
+        server.shutdown()
+        server.server_close()
+        size *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Migration Benchmark
+Runs the QR blob migration against a local RTDB stand-in (with simulated network
+latency) the old way, downloading every store and then each store's products again
+and rewriting whole products one call at a time, and with convert_qrs.py's paged,
+field-level, checkpointed runner. The new run is interrupted part-way and resumed.
+
+Usage: python -m benchmarks.bench_migration [stores] [products_per_store] [latency_ms]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_qr_blobs import make_stores
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+import convert_qrs
+
+
+class Interrupted(Exception):
+    pass
+
+
+def migrate_one_at_a_time(firebase):
+    """The old convert_all_qrs loop"""
+    for store_id in firebase.get_all_stores():
+        for product_id, product_data in (firebase.get_products(store_id) or {}).items():
+            if 'qr_code' in product_data:
+                firebase.add_product(store_id, product_id, product_data)
+
+
+def timed(server, fn):
+    server.db.request_count = 0
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, server.db.request_count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+    stores = make_stores(count, products)
+
+    server = start_local_rtdb({'stores': stores}, latency=latency)
+    old_s, old_calls = timed(server, lambda: migrate_one_at_a_time(FirebaseService(server.url)))
+    assert not convert_qrs.find_qr_blobs(server.db.get('stores'))
+    server.shutdown()
+
+    server = start_local_rtdb({'stores': stores}, latency=latency)
+    firebase = FirebaseService(server.url)
+    checkpoint = os.path.join(tempfile.mkdtemp(prefix='migration-'), 'checkpoint.json')
+    pages = []
+
+    def crash_after_two_pages(line):
+        pages.append(line)
+        if len(pages) == 2:
+            raise Interrupted()
+
+    def interrupted_then_resumed():
+        try:
+            convert_qrs.run_migration(firebase, 'bench', convert_qrs.migrate_store, page_size=10,
+                                      checkpoint=checkpoint, log=crash_after_two_pages)
+        except Interrupted:
+            pass
+        convert_qrs.run_migration(firebase, 'bench', convert_qrs.migrate_store, page_size=10,
+                                  checkpoint=checkpoint, log=lambda line: None)
+
+    new_s, new_calls = timed(server, interrupted_then_resumed)
+    assert not convert_qrs.find_qr_blobs(server.db.get('stores'))
+    server.shutdown()
+
+    print(f"{count} stores x {products} products with QR blobs, {latency * 1000:.0f} ms per request\n")
+    print(f"{'':<44}{'calls':>8}{'seconds':>10}")
+    print(f"{'re-read + whole-product PUTs (old)':<44}{old_calls:>8}{old_s:>10.2f}")
+    print(f"{'paged field patches, interrupted + resumed':<44}{new_calls:>8}{new_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Product Listing Pagination Benchmark
+Seeds a local RTDB stand-in (with database.rules.json) with one large store and
+compares the old full /api/stores/<id>/products response against the paginated
+listing: response bytes and database calls for the first page, for scrolling through
+every page and for a filtered listing, with a cold read cache and with a warm one.
+
+Usage: python -m benchmarks.bench_product_pages [products] [page_size]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+# app.py would otherwise start indexing the configured database for search in the background
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from local_rtdb import start_local_rtdb
+from firebase_service import FirebaseService
+from read_cache import ReadCache
+import app as app_module
+import config
+
+CATEGORIES = ('Snacks', 'Dairy', 'Bakery', 'Beverages', 'Household', 'Personal Care')
+
+
+def make_products(count, rng):
+    return {
+        f"p{i:06d}": {'name': f"Product {i}", 'price': round(rng.uniform(10, 500), 2),
+                      'stock': rng.choice([0, 5, 12, 40]), 'category': rng.choice(CATEGORIES),
+                      'size': '500 g', 'description': 'A well described product with a few words of copy.',
+                      'image': f"https://images.example.com/products/{i}.jpg", 'store_id': 'store0',
+                      'created_at': '2026-01-01T00:00:00', 'scan_count': rng.randint(0, 300)}
+        for i in range(count)
+    }
+
+
+def measure(client, server, url, scroll):
+    """(response bytes, database calls, ms) for one GET, or for every page when scrolling"""
+    size, before, start = 0, server.db.request_count, time.perf_counter()
+    cursor = None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ''))
+        size += len(response.data)
+        body = response.get_json()
+        cursor = body.get('next_cursor') if scroll and isinstance(body, dict) and 'products' in body else None
+        if not cursor:
+            break
+    return size, server.db.request_count - before, (time.perf_counter() - start) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    rng = random.Random(7)
+    with open('database.rules.json') as f:
+        rules = json.load(f)
+    server = start_local_rtdb({'stores': {'store0': {'name': 'Big Store', 'products': make_products(count, rng)}}},
+                              rules=rules)
+
+    app = app_module.app
+    app.config['TESTING'] = True
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'bench'
+        sess['role'] = 'customer'
+
+    base = '/api/stores/store0/products'
+    cases = [
+        ('full listing (before)', base, False),
+        ('first page', f"{base}?limit={page_size}", False),
+        ('all pages', f"{base}?limit={page_size}", True),
+        ('category first page', f"{base}?limit={page_size}&category=Dairy", False),
+        ('category + price + stock, all', f"{base}?limit={page_size}&category=Dairy&min_price=100&max_price=200&in_stock=1", True),
+    ]
+
+    print(f"1 store, {count} products, {page_size} per page\n")
+    print(f"{'':<34}{'cold cache':>30}{'warm cache':>30}")
+    print(f"{'request':<34}{'bytes':>12}{'calls':>8}{'ms':>10}{'bytes':>12}{'calls':>8}{'ms':>10}")
+    for name, url, scroll in cases:
+        row = []
+        for warm in (False, True):
+            app_module.firebase = FirebaseService(server.url, cache=ReadCache(config.READ_CACHE_SIZE, config.READ_CACHE_TTLS))
+            if warm:
+                app_module.firebase.get_products('store0')
+            row.append(measure(client, server, url, scroll))
+        print(f"{name:<34}" + ''.join(f"{size:>12,}{calls:>8}{ms:>10.1f}" for size, calls, ms in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+QR Endpoint Benchmark
+Requests per second of /api/qr-code/<product_id> through the Flask app with the QR
+image cache disabled (the old render-per-request behaviour), cold, warm in memory,
+warm on disk only (a fresh worker sharing QR_CACHE_DIR), and for browser revalidations.
+
+Usage: python -m benchmarks.bench_qr [products] [rounds]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# app.py would otherwise start indexing the configured database for search in the background
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from qr_cache import QRImageCache
+import app as app_module
+
+
+def throughput(client, product_ids, rounds=1, headers=None, expect=200):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for product_id in product_ids:
+            response = client.get(f'/api/qr-code/{product_id}', headers=(headers or {}).get(product_id))
+            assert response.status_code == expect, response.status_code
+    elapsed = time.perf_counter() - start
+    return rounds * len(product_ids) / elapsed
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    product_ids = [f"5b0f2c9e-{i:04d}-4a7e-9c1d-{i:012d}" for i in range(products)]
+    disk_dir = tempfile.mkdtemp(prefix='qr-bench-')
+
+    app = app_module.app
+    app.config['TESTING'] = True
+    client = app.test_client()
+
+    results = []
+    app_module.qr_cache = QRImageCache(max_items=0)
+    results.append(('no cache (old behaviour)', throughput(client, product_ids)))
+
+    app_module.qr_cache = QRImageCache(max_items=products, disk_dir=disk_dir)
+    results.append(('cold (render + disk write)', throughput(client, product_ids)))
+    results.append(('warm, memory', throughput(client, product_ids, rounds)))
+
+    app_module.qr_cache = QRImageCache(max_items=products, disk_dir=disk_dir)
+    results.append(('warm, disk only (new worker)', throughput(client, product_ids)))
+
+    etags = {pid: {'If-None-Match': client.get(f'/api/qr-code/{pid}').headers['ETag']} for pid in product_ids}
+    results.append(('revalidation (304)', throughput(client, product_ids, rounds, etags, expect=304)))
+
+    print(f"{products} distinct product QR codes\n")
+    print(f"{'':<32}{'req/s':>10}")
+    for label, rate in results:
+        print(f"{label:<32}{rate:>10.0f}")
+    print("\nBrowsers honouring 'immutable' skip the request entirely after the first load.")
+    print(app_module.qr_cache.stats())
+    shutil.rmtree(disk_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+QR Blob Benchmark
+Seeds a local RTDB stand-in with products carrying the base64 QR data URLs the old
+seeders embedded, runs convert_qrs.py against it and reports the payload of
+/api/stores, /api/stores/<id>/products, /api/products/<id> and the raw get_all_stores
+download before and after.
+
+Usage: python -m benchmarks.bench_qr_blobs [stores] [products_per_store]
+"""
+
+import base64
+import os
+import sys
+import tempfile
+
+# app.py would otherwise start indexing the configured database for search in the background
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from local_rtdb import start_local_rtdb
+from firebase_service import FirebaseService
+from qr_cache import DEFAULT_PARAMS, render_qr_png
+from rebuild_indexes import expected_product_index, expected_store_summaries
+import app as app_module
+import convert_qrs
+
+
+def qr_blob(store_id, product_id):
+    """The data URL the old QR generator produced for a product"""
+    png = render_qr_png(f"https://qr-store.vercel.app/product/{store_id}/{product_id}", DEFAULT_PARAMS)
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+
+
+def make_stores(count, products):
+    stores = {}
+    for i in range(count):
+        store_id = f"store{i:04d}"
+        stores[store_id] = {
+            'name': f"Store {i}",
+            'description': 'Fresh produce and daily essentials.',
+            'owner_id': f"owner{i}",
+            'created_at': '2026-01-01T00:00:00',
+            'products': {
+                f"{store_id}-p{j:04d}": {'name': f"Product {j}", 'price': 10 + j, 'stock': 5,
+                                        'description': 'A product', 'category': 'Grocery',
+                                        'qr_code': qr_blob(store_id, f"{store_id}-p{j:04d}"), 'scan_count': j}
+                for j in range(products)
+            },
+        }
+    return stores
+
+
+def payloads(client, firebase, store_id, product_id):
+    if firebase.cache is not None:
+        firebase.cache.clear()
+    return {
+        '/api/stores': len(client.get('/api/stores').data),
+        '/api/stores/<id>/products': len(client.get(f'/api/stores/{store_id}/products').data),
+        '/api/products/<id>': len(client.get(f'/api/products/{product_id}').data),
+        'get_all_stores (raw)': len(firebase.http.get(firebase._get_url('stores')).content),
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    stores = make_stores(count, products)
+    server = start_local_rtdb({
+        'stores': stores,
+        'store_summaries': expected_store_summaries(stores),
+        'product_index': expected_product_index(stores),
+    })
+    firebase = FirebaseService(server.url)
+    app_module.firebase = firebase
+    app_module.fanout = firebase
+    app = app_module.app
+    app.config['TESTING'] = True
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'bench'
+        sess['role'] = 'customer'
+
+    store_id = next(iter(stores))
+    product_id = next(iter(stores[store_id]['products']))
+    before = payloads(client, firebase, store_id, product_id)
+    checkpoint = os.path.join(tempfile.mkdtemp(prefix='qr-blobs-'), 'checkpoint.json')
+    convert_qrs.convert_all_qrs(firebase, checkpoint=checkpoint)
+    after = payloads(client, firebase, store_id, product_id)
+
+    print(f"\n{count} stores x {products} products\n")
+    print(f"{'':<30}{'before':>14}{'after':>14}{'ratio':>8}")
+    for name in before:
+        print(f"{name:<30}{before[name]:>14,}{after[name]:>14,}{before[name] / after[name]:>7.1f}x")
+    print("\n/api/stores already serves store_summaries, which never carried product blobs.")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
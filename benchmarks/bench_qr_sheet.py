@@ -0,0 +1,72 @@
+"""
+QR Sheet Benchmark
+Renders a label sheet for a large store and reports time to the first rendered page,
+total time, output size and peak memory (RSS of the serving process) for the streaming
+renderer with and without the process pool, against building every page in memory
+and saving one Pillow PDF.
+Each run happens in a fresh subprocess so peak RSS is per run.
+
+Usage: python -m benchmarks.bench_qr_sheet [products] [workers]
+"""
+
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Runs happen in subprocesses started from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_products(count):
+    return {f"{i:08d}-3f1c-4b2a-9d7e-5c6b4a3f2e1d": {'name': f"Product {i}", 'price': 10 + i % 90}
+            for i in range(count)}
+
+
+def run(mode, count, workers):
+    import qr_sheets
+
+    products = make_products(count)
+    start = time.perf_counter()
+    first_page, size = None, 0
+    if mode == 'in-memory pdf':
+        labels = qr_sheets.sheet_labels(products)
+        per_page = qr_sheets.PAGE_GRID[0] * qr_sheets.PAGE_GRID[1]
+        pages = [qr_sheets.render_grid(labels[i:i + per_page], *qr_sheets.PAGE_GRID, qr_sheets.PAGE_SIZE,
+                                       qr_sheets.PAGE_MARGIN) for i in range(0, len(labels), per_page)]
+        buf = io.BytesIO()
+        pages[0].save(buf, 'PDF', save_all=True, append_images=pages[1:], resolution=150)
+        first_page, size = time.perf_counter() - start, len(buf.getvalue())
+    else:
+        fmt = mode.split()[0]
+        for index, chunk in enumerate(qr_sheets.render_sheet(products, fmt, workers)):
+            if index == 1:  # the chunk after the file header
+                first_page = time.perf_counter() - start
+            size += len(chunk)
+    total = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {'first_page': first_page, 'total': total, 'size': size, 'peak_mb': peak_mb}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else min(4, os.cpu_count() or 1)
+    runs = [('in-memory pdf', 0), ('pdf streamed', 0), ('pdf streamed', workers), ('png streamed', workers)]
+
+    print(f"{count} products, {os.cpu_count()} CPUs\n")
+    print(f"{'mode':<26}{'workers':>8}{'1st page (s)':>13}{'total (s)':>11}{'MB out':>8}{'peak RSS MB':>13}")
+    for mode, n in runs:
+        command = [sys.executable, '-m', 'benchmarks.bench_qr_sheet', '--child', mode, str(count), str(n)]
+        out = subprocess.run(command, capture_output=True, text=True, check=True, cwd=ROOT)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:<26}{n:>8}{r['first_page']:>13.2f}{r['total']:>11.2f}{r['size'] / 1e6:>8.1f}{r['peak_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        print(json.dumps(run(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))))
+    else:
+        main()
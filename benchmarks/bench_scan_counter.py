@@ -0,0 +1,65 @@
+"""
+Scan Counter Check
+Hammers one product with concurrent scans against the local RTDB stand-in and
+compares the stored scan_count for: the old GET-then-PUT, one atomic server-side
+increment per scan, and the buffered ScanCounter. Exits non-zero on lost counts.
+
+Usage: python -m benchmarks.bench_scan_counter [threads] [scans_per_thread]
+"""
+
+import sys
+import threading
+import time
+
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+from scan_counter import ScanCounter
+
+
+def get_then_put(firebase, store_id, product_id):
+    """The previous increment_scan_count"""
+    url = firebase._get_url(f"stores/{store_id}/products/{product_id}/scan_count")
+    current = firebase.http.get(url).json() or 0
+    firebase.http.put(url, json=current + 1)
+
+
+def hammer(label, scan, threads, scans, server, firebase, finish=None):
+    server.db.set('stores/s1/products/p1/scan_count', 0)
+    calls_before = server.db.request_count
+    start = time.perf_counter()
+    workers = [threading.Thread(target=lambda: [scan() for _ in range(scans)]) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if finish:
+        finish()
+    elapsed = time.perf_counter() - start
+    stored = server.db.get('stores/s1/products/p1/scan_count')
+    expected = threads * scans
+    calls = server.db.request_count - calls_before
+    print(f"{label:<14} stored {stored:>6}/{expected}  lost {expected - stored:>5}  "
+          f"backend calls {calls:>6}  {elapsed * 1000:8.1f} ms")
+    return stored == expected
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    scans = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    server = start_local_rtdb({'stores': {'s1': {'products': {'p1': {'name': 'Scanned', 'scan_count': 0}}}}},
+                              latency=0.001)
+    firebase = FirebaseService(server.url)
+
+    hammer('get-then-put', lambda: get_then_put(firebase, 's1', 'p1'), threads, scans, server, firebase)
+    atomic_ok = hammer('atomic', lambda: firebase.increment_scan_count('s1', 'p1'), threads, scans, server, firebase)
+
+    firebase.scan_counter = ScanCounter(firebase.apply_scan_increments, flush_interval=0.05).start()
+    buffered_ok = hammer('buffered', lambda: firebase.increment_scan_count('s1', 'p1'), threads, scans,
+                         server, firebase, finish=firebase.scan_counter.stop)
+
+    server.shutdown()
+    sys.exit(0 if atomic_ok and buffered_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Product Search Benchmark
+Builds the search index over synthetic products and reports build time, memory,
+and query latency, against the naive approach of substring-scanning every product
+(what searching via get_all_stores() would do, before even counting the download).
+
+Usage: python -m benchmarks.bench_search [products] [stores]
+"""
+
+import gc
+import random
+import resource
+import sys
+import time
+import uuid
+
+from populate_db import PRODUCT_TEMPLATES
+from search_index import MEMORY_TARGET_MB_PER_MILLION, SearchIndex
+
+BRANDS = ('Amul', 'Tata', 'Patanjali', 'Haldiram', 'Britannia', 'Dabur', 'Nestle', 'Parle', 'Himalaya', 'Godrej',
+          'Aashirvaad', 'Fortune', 'Everest', 'MDH', 'Surf', 'Dettol', 'Lakme', 'Boat', 'Noise', 'Bata')
+SIZES = ('100 g', '250 g', '500 g', '1 kg', '1 L', 'Pack of 2', 'Pack of 6', 'Small', 'Medium', 'Large')
+ADJECTIVES = ('Fresh', 'Organic', 'Premium', 'Classic', 'Spicy', 'Sweet', 'Natural', 'Roasted', 'Crunchy', 'Herbal')
+QUERIES = ('headphones', 'organic', 'amul butter', 'pre', 'smart wat', 'running shoes', 'spicy roasted',
+           'tata', 'xyzzy', 'fresh organic premium')
+
+
+def products(count, stores, rng):
+    """(store_id, product_id, product) tuples, generated lazily"""
+    templates = [(category, template) for category, items in PRODUCT_TEMPLATES.items() for template in items]
+    store_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(stores)]
+    for _ in range(count):
+        category, template = rng.choice(templates)
+        name = f"{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {template['name']} {rng.choice(SIZES)}"
+        yield rng.choice(store_ids), str(uuid.UUID(int=rng.getrandbits(128), version=4)), {
+            'name': name,
+            'category': category,
+            'description': f"{rng.choice(ADJECTIVES)} {template['name'].lower()} by {rng.choice(BRANDS)}, "
+                           f"quality guaranteed.",
+            'price': round(rng.uniform(10, 2000), 2),
+            'stock': rng.randint(0, 50),
+        }
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    stores = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    gc.collect()
+    rss_before = rss_mb()
+    index = SearchIndex()
+    index.bulk_load()
+    start = time.perf_counter()
+    for store_id, product_id, product in products(count, stores, random.Random(1)):
+        index.add(store_id, product_id, product)
+    index.finish_load()
+    build = time.perf_counter() - start
+    gc.collect()
+    stats = index.stats()
+    print(f"{count:,} products in {stores:,} stores")
+    print(f"build: {build:.1f} s ({count / build:,.0f} products/s)")
+    print(f"index: {stats['terms']:,} terms, {stats['postings']:,} postings, "
+          f"{stats['memory_mb']} MB estimated, {rss_mb() - rss_before:.0f} MB peak RSS growth")
+    target = MEMORY_TARGET_MB_PER_MILLION * count / 1_000_000
+    print(f"memory target: {target:.0f} MB ({'within' if stats['memory_mb'] <= target else 'OVER'})\n")
+
+    # The naive alternative: lower-case substring match over every product
+    sample = min(count, 100_000)
+    naive = [(product['name'] + ' ' + product['category'] + ' ' + product['description']).lower()
+             for _, _, product in products(sample, stores, random.Random(1))]
+
+    print(f"{'query':<24}{'matches':>10}{'p50 ms':>9}{'p95 ms':>9}{'naive ms (' + format(sample, ',') + ')':>24}")
+    for query in QUERIES:
+        (results, total), p50, p95 = timed(lambda: index.search(query, limit=20), 20)
+        words = query.split()
+        _, naive_ms, _ = timed(lambda: [text for text in naive if all(word in text for word in words)], 3)
+        print(f"{query:<24}{total:>10,}{p50:>9.2f}{p95:>9.2f}{naive_ms:>24.1f}")
+
+    # Incremental updates: replace 1% of the products, then compact
+    ids = list(index.docs)[:count // 100]
+    start = time.perf_counter()
+    for product_id in ids:
+        index.add(index.store_ids[0], product_id, {'name': 'Renamed product', 'category': 'General'})
+    updates = time.perf_counter() - start
+    start = time.perf_counter()
+    index.compact()
+    print(f"\n{len(ids):,} updates: {updates * 1e6 / max(len(ids), 1):.1f} us each; "
+          f"compaction: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
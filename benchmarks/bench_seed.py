@@ -0,0 +1,72 @@
+"""
+Seeding Benchmark
+Seeds a local RTDB stand-in (with simulated network latency) the old way, one
+create_user / create_store / add_product call at a time, and with seed_engine's
+chunked concurrent PATCHes, then times an in-memory build of a large dataset.
+
+Usage: python -m benchmarks.bench_seed [stores] [latency_ms] [large_stores]
+"""
+
+import random
+import sys
+import time
+
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+from populate_db import generate_store_specs
+from seed_engine import build_dataset, seed
+
+
+def seed_one_at_a_time(firebase, specs, rng):
+    """The old populate_db loop (scan counts, orders and rollups were never written)"""
+    updates = build_dataset(specs, rng=rng)
+    users = {path.split('/')[1]: value for path, value in updates.items() if path.startswith('users/')}
+    for path, store_data in updates.items():
+        if not path.startswith('stores/'):
+            continue
+        store_id = path.split('/')[1]
+        owner_id = store_data['owner_id']
+        firebase.create_user(owner_id, users[owner_id]['email'], 'store_owner')
+        firebase.create_store(store_id, dict(store_data, products={}))
+        for product_id, product in store_data['products'].items():
+            firebase.add_product(store_id, product_id, product)
+
+
+def timed(server, fn):
+    server.db.request_count = 0
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start, server.db.request_count
+
+
+def main():
+    stores = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    large = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    specs = generate_store_specs(stores, 5, random.Random(1))
+
+    server = start_local_rtdb(latency=latency)
+    firebase = FirebaseService(server.url)
+    old_s, old_calls = timed(server, lambda: seed_one_at_a_time(firebase, specs, random.Random(2)))
+    server.shutdown()
+
+    server = start_local_rtdb(latency=latency)
+    firebase = FirebaseService(server.url)
+    new_s, new_calls = timed(server, lambda: seed(firebase, specs, stores, stores * 10, rng=random.Random(2)))
+    server.shutdown()
+
+    print(f"{stores} stores x 5 products, {latency * 1000:.0f} ms per request\n")
+    print(f"{'':<40}{'calls':>8}{'seconds':>10}")
+    print(f"{'one call per record (old)':<40}{old_calls:>8}{old_s:>10.2f}")
+    print(f"{'seed_engine (+ users, orders, rollups)':<40}{new_calls:>8}{new_s:>10.2f}")
+
+    start = time.perf_counter()
+    summary = seed(None, generate_store_specs(large, 20, random.Random(3)), large * 5, large * 20,
+                   rng=random.Random(4), dry_run=True)
+    print(f"\n{large} stores x 20 products, {large * 5} customers, {large * 20} orders (dry run):")
+    print(f"  built {summary['paths']} paths / {summary['bytes'] / 1e6:.0f} MB in {time.perf_counter() - start:.1f}s"
+          f" -> about {summary['bytes'] // (4 * 1024 * 1024) + 1} PATCHes of up to 4 MB")
+
+
+if __name__ == "__main__":
+    main()
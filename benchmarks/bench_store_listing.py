@@ -0,0 +1,94 @@
+"""
+Store Listing Benchmark
+Compares the /api/stores payload and time-to-first-render (response + JSON parse)
+of the old full stores download with the store_summaries read, on a local RTDB stand-in.
+
+Usage: python -m benchmarks.bench_store_listing [stores] [products_per_store]
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+# app.py would otherwise start indexing the configured database for search in the background
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from flask import jsonify
+
+from local_rtdb import start_local_rtdb
+from firebase_service import FirebaseService
+from rebuild_indexes import expected_store_summaries
+import app as app_module
+
+# Roughly the size of the base64 data URLs written by convert_qrs.py
+QR_BLOB = 'data:image/png;base64,' + 'A' * 1400
+
+
+def make_stores(count, products):
+    stores = {}
+    for i in range(count):
+        stores[f"store{i:05d}"] = {
+            'name': f"Store {i}",
+            'description': 'Fresh produce and daily essentials.',
+            'owner_id': f"owner{i}",
+            'created_at': '2026-01-01T00:00:00',
+            'products': {
+                f"s{i}p{j}": {'name': f"Product {j}", 'price': 10, 'stock': 5, 'qr_code': QR_BLOB,
+                              'description': 'A product', 'scan_count': j}
+                for j in range(products)
+            },
+            'orders': {
+                f"o{i}_{k}": {'total': 20, 'status': 'confirmed', 'items': [{'product_name': 'Product', 'price': 10, 'quantity': 2}]}
+                for k in range(10)
+            },
+        }
+    return stores
+
+
+def measure(client, runs=5):
+    sizes, timings = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = client.get('/api/stores').data
+        json.loads(body)  # the browser has to parse it before the first card renders
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(body))
+    return sizes[0], statistics.median(timings)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    stores = make_stores(count, products)
+    server = start_local_rtdb({'stores': stores, 'store_summaries': expected_store_summaries(stores)})
+    firebase = FirebaseService(server.url)
+    app_module.firebase = firebase
+    app = app_module.app
+    app.config['TESTING'] = True
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'bench'
+        sess['role'] = 'customer'
+
+    new_bytes, new_ms = measure(client)
+
+    # Swap the route back to the old full download for the comparison
+    original = app.view_functions['stores_api']
+    app.view_functions['stores_api'] = lambda: jsonify(firebase.get_all_stores())
+    old_bytes, old_ms = measure(client)
+    app.view_functions['stores_api'] = original
+
+    print(f"{count} stores x {products} products\n")
+    print(f"{'':<16}{'bytes':>14}{'first render (ms)':>20}")
+    print(f"{'full stores':<16}{old_bytes:>14,}{old_ms:>20.1f}")
+    print(f"{'summaries':<16}{new_bytes:>14,}{new_ms:>20.1f}")
+    print(f"\nPayload reduced {old_bytes / new_bytes:.0f}x, render {old_ms / new_ms:.0f}x faster")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Store Mirror Check and Benchmark
+Runs StoreMirror against the local RTDB stand-in's SSE endpoint: compares read latency
+with network reads, checks that writes from another client show up, and drops the
+stream to exercise reconnect + resync.
+
+Usage: python -m benchmarks.bench_store_mirror [reads]
+"""
+
+import statistics
+import sys
+import time
+
+from firebase_service import FirebaseService
+from local_rtdb import start_local_rtdb
+from store_mirror import StoreMirror
+
+
+def median_us(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def main():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    stores = {f"store{i}": {'name': f"Store {i}", 'products': {
+        f"s{i}p{j}": {'name': f"Product {j}", 'price': 10} for j in range(20)}} for i in range(100)}
+    server = start_local_rtdb({'stores': stores}, keepalive_interval=0.5)
+
+    mirror = StoreMirror(server.url, min_backoff=0.1).start()
+    assert mirror.wait_until_synced(), mirror.stats()
+    network = FirebaseService(server.url)
+    mirrored = FirebaseService(server.url, mirror=mirror)
+
+    net_us = median_us(lambda: network.get_product('store7', 's7p3'), reads)
+    mir_us = median_us(lambda: mirrored.get_product('store7', 's7p3'), reads)
+    print(f"get_product  network {net_us:8.1f} us   mirror {mir_us:8.1f} us")
+
+    # A write from another client reaches the mirror through the stream
+    start = time.perf_counter()
+    network.update_product('store7', 's7p3', {'price': 99})
+    assert wait_for(lambda: mirror.get('stores/store7/products/s7p3/price') == 99)
+    print(f"propagation  {(time.perf_counter() - start) * 1000:.1f} ms for an external update")
+
+    # Drop the stream, change data while disconnected, and check the resync
+    server.db.close_streams()
+    assert wait_for(lambda: not mirror.connected)
+    server.db.set('stores/store8/name', 'Renamed while offline')
+    assert wait_for(lambda: mirror.connected)
+    assert mirrored.get_store_name('store8') == 'Renamed while offline'
+    print(f"resync       ok after reconnect: {mirror.stats()}")
+
+    mirror.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
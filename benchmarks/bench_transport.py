@@ -0,0 +1,75 @@
+"""
+Transport Benchmark
+Per-call latency of FirebaseService against a local RTDB stand-in,
+comparing one-connection-per-call requests with the pooled keep-alive transport.
+
+Usage: python -m benchmarks.bench_transport [calls] [connect_latency_ms]
+"""
+
+import statistics
+import sys
+import time
+
+import requests
+
+from firebase_service import FirebaseService
+from firebase_transport import FirebaseTransport
+from local_rtdb import start_local_rtdb
+
+
+class UnpooledTransport:
+    """The old behaviour: module-level requests calls, a fresh connection every time"""
+
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return requests.put(url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return requests.patch(url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return requests.delete(url, **kwargs)
+
+
+def run(service, calls):
+    """Time a mix of reads and writes, returning per-call latencies in ms"""
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        if i % 4 == 0:
+            service.add_to_cart('bench_user', f'p{i % 10}', {'price': 10, 'quantity': 1})
+        else:
+            service.get_product('bench_store', 'bench_product')
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<12} mean {statistics.mean(timings):7.2f} ms   "
+          f"p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+    return statistics.mean(timings)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    connect_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+
+    seed = {'stores': {'bench_store': {'products': {'bench_product': {'name': 'Bench', 'price': 1}}}}}
+    server = start_local_rtdb(seed, connect_latency=connect_ms / 1000)
+    print(f"Local RTDB at {server.url} (emulated handshake {connect_ms:.0f} ms), {calls} calls each\n")
+
+    before = report('unpooled', run(FirebaseService(server.url, UnpooledTransport()), calls))
+    pooled = FirebaseTransport()
+    after = report('pooled', run(FirebaseService(server.url, pooled), calls))
+    pooled.close()
+
+    print(f"\nSpeed-up: {before / after:.1f}x per call")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
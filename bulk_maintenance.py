@@ -0,0 +1,211 @@
+"""
+Bulk Maintenance Module
+Deletes stores, users or the whole database together with every node derived from
+them, using chunked concurrent multi-location PATCHes that set paths to null.
+A dry run reports the paths and bytes that would be removed without writing.
+
+Usage:
+  python bulk_maintenance.py stores <store_id>... [--with-owners] [--dry-run]
+  python bulk_maintenance.py stores --keep-first 5 [--dry-run]
+  python bulk_maintenance.py users <user_id>... [--dry-run]
+  python bulk_maintenance.py history [<user_id>...] [--keep N] [--dry-run]
+  python bulk_maintenance.py reset [--force] [--dry-run]
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from analytics_engine import BUCKET_NODE
+from firebase_service import FirebaseService, email_index_key
+from scan_history import HISTORY_NODE, trim_updates
+
+# Every root node the app writes, in the order reset clears them
+ROOT_NODES = (
+    'stores', 'store_summaries', 'owner_index', 'product_index', 'requests',
+    'analytics', 'scan_counts', BUCKET_NODE, 'orders', HISTORY_NODE, 'users', 'email_index',
+)
+
+# Nodes keyed by store_id that belong to a store
+STORE_NODES = ('stores', 'store_summaries', 'requests', 'analytics', 'scan_counts', BUCKET_NODE)
+
+DEFAULT_WORKERS = 8
+
+# measure() reads the parent once instead of each child when this many children are unknown
+MEASURE_PARENT_THRESHOLD = 20
+
+
+def _fetch_all(fn, keys, workers=DEFAULT_WORKERS):
+    """{key: fn(key)} with the calls made concurrently"""
+    keys = list(keys)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(keys, pool.map(fn, keys)))
+
+
+# ========== PLANNING ==========
+
+def store_paths(firebase, store_ids, with_owners=False, workers=DEFAULT_WORKERS):
+    """
+    Paths to null for deleting stores: the store records and rollups, their product_index
+    and owner_index entries, and optionally the owners' accounts (found through
+    owner_index). Returns {path: known_size or None}
+    """
+    paths, store_set = {}, set(store_ids)
+    products = _fetch_all(lambda sid: firebase.get_keys(f"stores/{sid}/products"), store_ids, workers)
+
+    for store_id in store_ids:
+        for node in STORE_NODES:
+            paths[f"{node}/{store_id}"] = None
+        for product_id in products[store_id]:
+            paths[f"product_index/{product_id}"] = len(json.dumps(store_id))
+
+    # owner_index is one small id -> id map, cheaper to read whole than per store
+    owner_index = firebase.http.get(firebase._get_url("owner_index")).json()
+    owner_ids = [owner_id for owner_id, store_id in (owner_index or {}).items() if store_id in store_set]
+    for owner_id in owner_ids:
+        paths[f"owner_index/{owner_id}"] = len(json.dumps(owner_index[owner_id]))
+    if with_owners:
+        paths.update(user_paths(firebase, owner_ids, include_stores=False, workers=workers))
+    return paths
+
+
+def user_paths(firebase, user_ids, include_stores=True, workers=DEFAULT_WORKERS):
+    """
+    Paths to null for deleting users: the user records, their email_index entries,
+    top-level orders and scan_history logs, plus the stores they own unless
+    include_stores is False
+    """
+    paths = {}
+    emails = _fetch_all(lambda uid: firebase._read(f"users/{uid}/email"), user_ids, workers)
+    orders = _fetch_all(lambda uid: firebase.get_keys(f"users/{uid}/orders"), user_ids, workers)
+    for user_id in user_ids:
+        paths[f"users/{user_id}"] = None
+        paths[f"{HISTORY_NODE}/{user_id}"] = None
+        if isinstance(emails[user_id], str):
+            paths[f"email_index/{email_index_key(emails[user_id])}"] = None
+        for order_id in orders[user_id]:
+            paths[f"orders/{order_id}"] = None
+
+    if include_stores:
+        owned = _fetch_all(firebase.get_store_id_by_owner, user_ids, workers)
+        store_ids = [store_id for store_id in owned.values() if store_id]
+        if store_ids:
+            paths.update(store_paths(firebase, store_ids, workers=workers))
+    return paths
+
+
+def history_paths(firebase, user_ids=None, keep=config.SCAN_HISTORY_LIMIT, workers=DEFAULT_WORKERS):
+    """Entries beyond the newest `keep` of every scan_history log (or only the given users')"""
+    user_ids = firebase.get_keys(HISTORY_NODE) if user_ids is None else user_ids
+    logs = _fetch_all(lambda uid: firebase.get_keys(f"{HISTORY_NODE}/{uid}"), user_ids, workers)
+    paths = {}
+    for user_id, keys in logs.items():
+        paths.update(trim_updates(user_id, keys, keep))
+    return paths
+
+
+def reset_paths(firebase, nodes=ROOT_NODES, workers=DEFAULT_WORKERS):
+    """Every child of every root node, so a reset never sends one huge delete"""
+    children = _fetch_all(firebase.get_keys, nodes, workers)
+    return {f"{node}/{key}": None for node in nodes for key in children[node]}
+
+
+def measure(firebase, paths, workers=DEFAULT_WORKERS):
+    """Fill in the JSON size of every path whose size is not known yet; drops paths that do not exist"""
+    by_parent = {}
+    for path, size in paths.items():
+        if size is None:
+            parent, _, key = path.rpartition('/')
+            by_parent.setdefault(parent, []).append(key)
+
+    single = [f"{parent}/{key}" for parent, keys in by_parent.items()
+              if len(keys) < MEASURE_PARENT_THRESHOLD for key in keys]
+    parents = [parent for parent, keys in by_parent.items() if len(keys) >= MEASURE_PARENT_THRESHOLD]
+    bodies = _fetch_all(lambda path: firebase.http.get(firebase._get_url(path)).json(), single + parents, workers)
+
+    measured = dict(paths)
+    for path in single:
+        measured[path] = bodies[path]
+    for parent in parents:
+        children = bodies[parent] if isinstance(bodies[parent], dict) else {}
+        for key in by_parent[parent]:
+            measured[f"{parent}/{key}"] = children.get(key)
+    for path, value in list(measured.items()):
+        if paths[path] is not None:
+            continue
+        if value is None:
+            del measured[path]
+        else:
+            measured[path] = len(json.dumps(value, separators=(',', ':')))
+    return measured
+
+
+# ========== EXECUTION ==========
+
+def delete_paths(firebase, paths, dry_run=False, workers=DEFAULT_WORKERS):
+    """Null every path (or only report them with dry_run); returns (paths, bytes) for a dry run, (paths, chunks) otherwise"""
+    if dry_run:
+        measured = measure(firebase, paths, workers)
+        by_node = {}
+        for path, size in measured.items():
+            node = path.split('/', 1)[0]
+            count, total = by_node.get(node, (0, 0))
+            by_node[node] = (count + 1, total + size)
+        for node, (count, total) in sorted(by_node.items()):
+            print(f"  /{node:<20}{count:>8} paths{total:>14,} bytes")
+        return len(measured), sum(measured.values())
+
+    chunks = firebase.update_paths_chunked(dict.fromkeys(paths), workers)
+    if firebase.cache is not None:
+        firebase.cache.clear()
+    return len(paths), chunks
+
+
+def report(result, dry_run):
+    if dry_run:
+        print(f"Dry run: {result[0]} paths, {result[1]:,} bytes would be deleted.")
+    else:
+        print(f"Deleted {result[0]} paths in {result[1]} multi-location updates.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk delete stores, users, old scan history or the whole database")
+    parser.add_argument('target', choices=['stores', 'users', 'history', 'reset'])
+    parser.add_argument('ids', nargs='*', help="store or user ids")
+    parser.add_argument('--keep', type=int, default=config.SCAN_HISTORY_LIMIT,
+                        help="history: scans kept per user")
+    parser.add_argument('--keep-first', type=int, default=None, help="stores: delete all but the first N stores")
+    parser.add_argument('--with-owners', action='store_true', help="stores: also delete the owners' accounts")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="concurrent requests")
+    parser.add_argument('--force', action='store_true', help="reset: do not ask for confirmation")
+    parser.add_argument('--dry-run', action='store_true', help="report paths and bytes without deleting")
+    args = parser.parse_args(argv)
+
+    firebase = FirebaseService()
+    if args.target == 'stores':
+        store_ids = args.ids
+        if args.keep_first is not None:
+            store_ids = sorted(firebase.get_keys("stores"))[args.keep_first:]
+        print(f"Deleting {len(store_ids)} stores...")
+        paths = store_paths(firebase, store_ids, args.with_owners, args.workers)
+    elif args.target == 'users':
+        print(f"Deleting {len(args.ids)} users...")
+        paths = user_paths(firebase, args.ids, workers=args.workers)
+    elif args.target == 'history':
+        print(f"Trimming scan history to the newest {args.keep} scans per user...")
+        paths = history_paths(firebase, args.ids or None, args.keep, args.workers)
+    else:
+        print("⚠️  WARNING: This will DELETE ALL DATA from the database.")
+        print(f"Nodes to be deleted: {', '.join(ROOT_NODES)}")
+        if not (args.force or args.dry_run) and input("Are you sure you want to proceed? (yes/no): ").lower() != 'yes':
+            print("Operation cancelled.")
+            return
+        paths = reset_paths(firebase, workers=args.workers)
+
+    report(delete_paths(firebase, paths, args.dry_run, args.workers), args.dry_run)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,51 +1,37 @@
-
 import firebase_service
-import requests
 import sys
+from bulk_maintenance import delete_paths, report, store_paths
+
+KEEP_STORES = 5
 
-def cleanup_stores():
+def cleanup_stores(dry_run=False):
     print("Starting Store Cleanup...")
     firebase = firebase_service.FirebaseService()
-    stores = firebase.get_all_stores()
+    store_ids = sorted(firebase.get_keys("stores"))
     
-    if not stores:
+    if not store_ids:
         print("No stores found.")
         return
 
-    store_ids = list(stores.keys())
     print(f"Total stores found: {len(store_ids)}")
     
-    if len(store_ids) <= 5:
-        print("Less than or equal to 5 stores. No cleanup needed.")
+    if len(store_ids) <= KEEP_STORES:
+        print(f"Less than or equal to {KEEP_STORES} stores. No cleanup needed.")
         return
 
     # Keep first 5
-    keep_ids = store_ids[:5]
-    delete_ids = store_ids[5:]
+    keep_ids = store_ids[:KEEP_STORES]
+    delete_ids = store_ids[KEEP_STORES:]
     
     print("\nKeeping these stores:")
     for sid in keep_ids:
-        sdata = stores.get(sid, {})
-        print(f" - {sdata.get('name', sid)}")
+        print(f" - {firebase.get_store_name(sid) or sid}")
         
-    print(f"\nDeleting {len(delete_ids)} stores...")
+    print(f"\nDeleting {len(delete_ids)} stores and their index, request and analytics entries...")
     
-    count = 0
-    for sid in delete_ids:
-        try:
-            url = firebase._get_url(f"stores/{sid}")
-            response = requests.delete(url)
-            if response.status_code == 200:
-                count += 1
-                if count % 5 == 0:
-                    print(f"Deleted {count}/{len(delete_ids)}...")
-            else:
-                print(f"Failed to delete {sid}")
-        except Exception as e:
-            print(f"Error deleting {sid}: {e}")
-            
-    print(f"\nCleanup Finished! Deleted {count} stores.")
+    # One batch of multi-location deletes instead of a request per store
+    report(delete_paths(firebase, store_paths(firebase, delete_ids), dry_run), dry_run)
     print(f"Remaining stores: {len(keep_ids)}")
 
 if __name__ == "__main__":
-    cleanup_stores()
+    cleanup_stores(dry_run='--dry-run' in sys.argv)
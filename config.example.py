@@ -11,6 +11,77 @@ FIREBASE_CONFIG = {
     "appId": "YOUR_APP_ID"
 }
 
+# Firebase REST transport (connection pool, timeouts, retry/backoff)
+FIREBASE_POOL_SIZE = 20
+FIREBASE_TIMEOUT = 10
+FIREBASE_MAX_RETRIES = 3
+FIREBASE_BACKOFF = 0.3
+
+# In-process read cache in front of FirebaseService (0 disables it).
+# TTLs are per entity, in seconds; scan counts may lag by up to the product TTL.
+READ_CACHE_SIZE = 2048
+READ_CACHE_TTLS = {
+    "store": 60,
+    "store_name": 300,
+    "store_summaries": 60,
+    "store_summary": 60,
+    "products": 30,
+    "product_category": 30,
+    "product": 30,
+    "product_store": 300,
+    "product_name": 300,
+}
+
+# Optional streamed in-memory mirror of /stores (needs a long-running server, not serverless).
+# Reads fall back to the network once the stream has been down longer than the max staleness.
+STORE_MIRROR_ENABLED = False
+STORE_MIRROR_MAX_STALENESS = 5
+
+# Product scan counts are buffered and flushed as one batched increment every N seconds.
+# 0 writes each scan immediately (use 0 on serverless hosts, where background threads do not run).
+SCAN_FLUSH_INTERVAL = 2
+# A store's most_scanned dashboard list is rebuilt from its counters at most once per this
+# many seconds, so most scan writes cost one PATCH.
+SCAN_ROLLUP_INTERVAL = 30
+
+# Background work queue for request side effects (scan counts, history writes).
+# 0 workers runs them inline (use 0 on serverless hosts, where background threads do not run).
+BACKGROUND_WORKERS = 2
+BACKGROUND_QUEUE_SIZE = 1000
+BACKGROUND_RETRIES = 2
+
+# Use the httpx-based async client to fetch independent reads concurrently
+ASYNC_FANOUT = True
+
+# Hourly/daily analytics buckets use this UTC offset, so days end at local midnight (330 = IST)
+ANALYTICS_UTC_OFFSET_MINUTES = 330
+
+# Rendered QR code PNGs kept in memory per process, plus an optional shared on-disk cache
+QR_CACHE_SIZE = 512
+QR_CACHE_DIR = None  # e.g. "/var/cache/smartqr/qr"
+
+# Processes rendering bulk QR label sheets (0 renders in the request thread)
+QR_SHEET_WORKERS = 4
+
+# In-process product search index behind /api/search, built in the background at startup and
+# rebuilt every SEARCH_INDEX_REFRESH seconds to pick up writes from other processes (0 = never)
+SEARCH_INDEX_ENABLED = True
+SEARCH_INDEX_REFRESH = 600
+
+# Scans kept in each customer's scan_history log. A log is trimmed back to the limit on every
+# SCAN_HISTORY_COMPACT_EVERY-th scan a process records for that customer; other scans are one write.
+# "python bulk_maintenance.py history" trims every log.
+SCAN_HISTORY_LIMIT = 200
+SCAN_HISTORY_COMPACT_EVERY = 20
+
+# Per-route request and Firebase call metrics, and an optional Server-Timing header.
+# /metrics, /api/trace-summary and /api/cache-stats answer only requests sending
+# "Authorization: Bearer <METRICS_TOKEN>" (and are off while no token is set);
+# METRICS_ENABLED=0 stops collecting metrics altogether.
+METRICS_ENABLED = True
+SERVER_TIMING = False
+METRICS_TOKEN = None
+
 # Flask Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production"
 DEBUG = True
@@ -12,6 +12,78 @@ FIREBASE_CONFIG = {
     "appId": os.environ.get("FIREBASE_APP_ID", "1:142653765460:web:27c93d592eb345cb3f7ac1")
 }
 
+# Firebase REST transport (connection pool, timeouts, retry/backoff)
+FIREBASE_POOL_SIZE = int(os.environ.get("FIREBASE_POOL_SIZE", 20))
+FIREBASE_TIMEOUT = float(os.environ.get("FIREBASE_TIMEOUT", 10))
+FIREBASE_MAX_RETRIES = int(os.environ.get("FIREBASE_MAX_RETRIES", 3))
+FIREBASE_BACKOFF = float(os.environ.get("FIREBASE_BACKOFF", 0.3))
+
+# In-process read cache in front of FirebaseService (0 disables it).
+# TTLs are per entity, in seconds; scan counts may lag by up to the product TTL.
+READ_CACHE_SIZE = int(os.environ.get("READ_CACHE_SIZE", 2048))
+READ_CACHE_TTLS = {
+    "store": 60,
+    "store_name": 300,
+    "store_summaries": 60,
+    "store_summary": 60,
+    "products": 30,
+    "product_category": 30,
+    "product": 30,
+    "product_store": 300,
+    "product_name": 300,
+}
+
+# Optional streamed in-memory mirror of /stores (needs a long-running server, not serverless).
+# Reads fall back to the network once the stream has been down longer than the max staleness.
+STORE_MIRROR_ENABLED = os.environ.get("STORE_MIRROR", "0") == "1"
+STORE_MIRROR_MAX_STALENESS = float(os.environ.get("STORE_MIRROR_MAX_STALENESS", 5))
+
+# Product scan counts are buffered and flushed as one batched increment every N seconds.
+# 0 writes each scan immediately (the default on Vercel, where background threads do not run).
+SCAN_FLUSH_INTERVAL = float(os.environ.get("SCAN_FLUSH_INTERVAL", 0 if os.environ.get("VERCEL") else 2))
+# A store's most_scanned dashboard list is rebuilt from its counters at most once per this
+# many seconds, so most scan writes cost one PATCH.
+SCAN_ROLLUP_INTERVAL = float(os.environ.get("SCAN_ROLLUP_INTERVAL", 30))
+
+# Background work queue for request side effects (scan counts, history writes).
+# 0 workers runs them inline (the default on Vercel, where background threads do not run).
+BACKGROUND_WORKERS = int(os.environ.get("BACKGROUND_WORKERS", 0 if os.environ.get("VERCEL") else 2))
+BACKGROUND_QUEUE_SIZE = int(os.environ.get("BACKGROUND_QUEUE_SIZE", 1000))
+BACKGROUND_RETRIES = int(os.environ.get("BACKGROUND_RETRIES", 2))
+
+# Use the httpx-based async client to fetch independent reads concurrently
+ASYNC_FANOUT = os.environ.get("ASYNC_FANOUT", "1") == "1"
+
+# Hourly/daily analytics buckets use this UTC offset, so days end at local midnight (330 = IST)
+ANALYTICS_UTC_OFFSET_MINUTES = int(os.environ.get("ANALYTICS_UTC_OFFSET_MINUTES", 330))
+
+# Rendered QR code PNGs kept in memory per process, plus an optional shared on-disk cache
+QR_CACHE_SIZE = int(os.environ.get("QR_CACHE_SIZE", 512))
+QR_CACHE_DIR = os.environ.get("QR_CACHE_DIR") or None
+
+# Processes rendering bulk QR label sheets (0 renders in the request thread)
+QR_SHEET_WORKERS = int(os.environ.get("QR_SHEET_WORKERS", 0 if os.environ.get("VERCEL") else min(4, os.cpu_count() or 1)))
+
+# In-process product search index behind /api/search, built in the background at startup and
+# rebuilt every SEARCH_INDEX_REFRESH seconds to pick up writes from other processes (0 = never).
+# Off by default on Vercel, where every cold start would have to read all stores.
+SEARCH_INDEX_ENABLED = os.environ.get("SEARCH_INDEX", "0" if os.environ.get("VERCEL") else "1") == "1"
+SEARCH_INDEX_REFRESH = float(os.environ.get("SEARCH_INDEX_REFRESH", 600))
+
+# Scans kept in each customer's scan_history log. A log is trimmed back to the limit on every
+# SCAN_HISTORY_COMPACT_EVERY-th scan a process records for that customer; other scans are one write.
+# "python bulk_maintenance.py history" trims every log.
+SCAN_HISTORY_LIMIT = int(os.environ.get("SCAN_HISTORY_LIMIT", 200))
+SCAN_HISTORY_COMPACT_EVERY = int(os.environ.get("SCAN_HISTORY_COMPACT_EVERY", 20))
+
+# Per-route request and Firebase call metrics, and an optional Server-Timing header.
+# /metrics, /api/trace-summary and /api/cache-stats answer only requests sending
+# "Authorization: Bearer <METRICS_TOKEN>" (and are off while no token is set);
+# METRICS_ENABLED=0 stops collecting metrics altogether.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
 # Flask Configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-this-in-production")
 DEBUG = os.environ.get("VERCEL") is None # True locally, False on Vercel
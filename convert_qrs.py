@@ -1,63 +1,77 @@
+"""
+Remove the base64 QR data URLs that older versions embedded in every product record
+(stores/<store_id>/products/<product_id>/qr_code). QR images are now rendered on
+demand by /api/qr-code/<product_id>, so the blobs only inflate product reads.
 
-import firebase_service
-from qr_generator import QRGenerator
+Stores are read a page at a time and only the blob fields are patched (see
+migrations.py). Progress is checkpointed to .migration-convert_qrs.json, so an
+interrupted run picks up where it stopped. With --qr-cache-dir the QR of every
+product is also pre-rendered into QR_CACHE_DIR by a pool of worker processes.
+
+Usage:
+  python convert_qrs.py --dry-run   # report how many blobs and bytes would be removed
+  python convert_qrs.py [--page-size N] [--workers N] [--qr-cache-dir DIR] [--restart]
+"""
+
+import argparse
+import functools
+import json
 import sys
+import firebase_service
+from firebase_service import PRODUCT_BLOB_FIELDS
+from migrations import DEFAULT_PAGE_SIZE, run_migration
 
-def convert_all_qrs():
-    print("Starting QR Code Migration to Base64...")
-    
-    # Initialize services
-    firebase = firebase_service.FirebaseService()
-    qr_gen = QRGenerator() # Uses default Vercel URL
-    
-    # Get all stores
-    print("Fetching all stores...")
-    stores = firebase.get_all_stores()
-    
-    if not stores:
-        print("No stores found.")
-        return
-
-    total_updated = 0
-    
+MIGRATION_NAME = "convert_qrs"
+
+def find_qr_blobs(stores):
+    """Return {path: size_in_bytes} for every embedded blob field in the stores tree"""
+    blobs = {}
+    if not isinstance(stores, dict):
+        return blobs
     for store_id, store_data in stores.items():
-        print(f"Processing store: {store_data.get('name', store_id)}")
-        
-        # Get products for this store
-        products = firebase.get_products(store_id)
-        
-        if not products:
+        products = store_data.get('products') if isinstance(store_data, dict) else None
+        if not isinstance(products, dict):
             continue
-            
         for product_id, product_data in products.items():
-            # Check if already base64 (starts with data:)
-            current_qr = product_data.get('qr_code', '')
-            if current_qr.startswith('data:'):
+            if not isinstance(product_data, dict):
                 continue
-                
-            # Generate new Base64 QR
-            try:
-                # We need to preserve the store_id and product_id for the URL
-                new_qr_base64 = qr_gen.generate_product_qr(store_id, product_id)
-                
-                # Update product in Firebase
-                # We can't update just one field easily with the current service 
-                # unless we add a method or use the private _get_url/requests directly.
-                # But firebase.add_product overwrites/updates at the product path.
-                
-                # Update the specific field in memory
-                product_data['qr_code'] = new_qr_base64
-                
-                # Save back to Firebase
-                firebase.add_product(store_id, product_id, product_data)
-                
-                print(f"  - Updated QR for {product_data.get('name')}")
-                total_updated += 1
-                
-            except Exception as e:
-                print(f"  - Failed to update {product_id}: {e}")
-
-    print(f"Migration Complete. Updated {total_updated} products.")
+            for field in PRODUCT_BLOB_FIELDS:
+                if field in product_data:
+                    path = f"stores/{store_id}/products/{product_id}/{field}"
+                    blobs[path] = len(json.dumps(product_data[field]))
+    return blobs
+
+def migrate_store(store_id, store_data, qr_cache_dir=None):
+    """Patches nulling one store's blob fields; optionally renders its QRs into qr_cache_dir"""
+    if qr_cache_dir and isinstance(store_data, dict) and isinstance(store_data.get('products'), dict):
+        from qr_cache import QRImageCache
+        cache = QRImageCache(max_items=0, disk_dir=qr_cache_dir)
+        for product_id in store_data['products']:
+            cache.get(product_id)
+    return {path: None for path in find_qr_blobs({store_id: store_data})}
+
+def convert_all_qrs(firebase, dry_run=False, page_size=DEFAULT_PAGE_SIZE, workers=0, qr_cache_dir=None,
+                    restart=False, checkpoint=None):
+    print("Removing embedded QR blobs" + (" (dry run)" if dry_run else "") + "...")
+    state = run_migration(firebase, MIGRATION_NAME, functools.partial(migrate_store, qr_cache_dir=qr_cache_dir),
+                          page_size=page_size, workers=workers, checkpoint=checkpoint,
+                          restart=restart, dry_run=dry_run)
+
+    print(f"Stores scanned:    {state['records']}")
+    print(f"Embedded QR blobs: {state['patches']}")
+    print(f"Bytes read:        {state['bytes_read']}")
+    print(f"Elapsed:           {state['seconds']}s")
+    if not dry_run:
+        print(f"Migration Complete. Removed {state['patches']} blobs.")
+    return state['patches']
 
 if __name__ == "__main__":
-    convert_all_qrs()
+    parser = argparse.ArgumentParser(description="Remove embedded base64 QR blobs from product records")
+    parser.add_argument('--dry-run', action='store_true', help="report blobs and bytes without writing")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="stores per read")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes (useful with --qr-cache-dir)")
+    parser.add_argument('--qr-cache-dir', default=None, help="also pre-render every product QR into this QR_CACHE_DIR")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and start from the first store")
+    args = parser.parse_args(sys.argv[1:])
+    convert_all_qrs(firebase_service.FirebaseService(), args.dry_run, args.page_size, args.workers,
+                    args.qr_cache_dir, args.restart)
@@ -0,0 +1,189 @@
+"""
+Async Firebase Service Module
+httpx-based client for the handlers whose reads are independent of each other
+(global product lookup, store analytics): it issues those reads concurrently, and a
+sync wrapper lets Flask handlers call it. Every write and every other read goes
+through FirebaseService.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+
+try:
+    import httpx
+except ImportError:  # optional dependency, see requirements.txt
+    httpx = None
+
+from analytics_engine import BUCKET_NODE, GRANULARITIES, TOP_PRODUCTS, aggregate, bucket_keys
+from firebase_service import bucket_query, store_analytics
+from read_cache import MISSING
+from request_tracing import record_call
+
+ASYNC_AVAILABLE = httpx is not None
+
+
+class AsyncRunner:
+    """Event loop on a daemon thread; run() submits a coroutine from sync code and waits"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='firebase-async', daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout=None):
+        # The coroutine sees the caller's context variables (e.g. the request trace)
+        wrapped = _with_context(contextvars.copy_context(), coro)
+        return asyncio.run_coroutine_threadsafe(wrapped, self.loop).result(timeout)
+
+
+async def _with_context(context, coro):
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+class SyncWrapper:
+    """Exposes every coroutine method of an AsyncFirebaseService as a blocking call"""
+
+    def __init__(self, service, runner):
+        self._service = service
+        self._runner = runner
+
+    def __getattr__(self, name):
+        method = getattr(self._service, name)
+        if not asyncio.iscoroutinefunction(method):
+            return method
+
+        def call(*args, **kwargs):
+            return self._runner.run(method(*args, **kwargs))
+        call.__name__ = name
+        return call
+
+
+class AsyncFirebaseService:
+    """
+    The fan-out reads of FirebaseService, as coroutines.
+    Shares the sync service's database URL, read cache and store mirror, so both
+    clients see the same cached state and invalidations.
+    """
+
+    def __init__(self, firebase, pool_size=20, timeout=10.0, retries=3):
+        if httpx is None:
+            raise RuntimeError("AsyncFirebaseService needs httpx (pip install httpx)")
+        self.firebase = firebase
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self._client = None
+        self._client_loop = None
+        self._runner = None
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on this client's background event loop and wait for it"""
+        if self._runner is None:
+            self._runner = AsyncRunner()
+        return self._runner.run(coro, timeout)
+
+    @property
+    def sync(self):
+        """Blocking view of this client for Flask handlers"""
+        if self._runner is None:
+            self._runner = AsyncRunner()
+        return SyncWrapper(self, self._runner)
+
+    def _http(self):
+        """httpx client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            transport = httpx.AsyncHTTPTransport(retries=self.retries, limits=limits)
+            self._client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ========== REQUEST HELPERS ==========
+
+    async def _get(self, path, params=None):
+        url = self.firebase._get_url(path)
+        start = time.perf_counter()
+        try:
+            response = await self._http().get(url, params=params)
+        except httpx.HTTPError:
+            record_call('GET', url, 0, time.perf_counter() - start)
+            raise
+        record_call('GET', url, response.status_code, time.perf_counter() - start, 0, len(response.content))
+        return response
+
+    async def _read(self, path, cache_key=None):
+        """GET a path, served from the store mirror or read cache when possible"""
+        mirror, cache = self.firebase.mirror, self.firebase.cache
+        if mirror is not None:
+            value = mirror.get(path)
+            if value is not MISSING:
+                return value
+        use_cache = cache is not None and cache_key is not None
+        if use_cache:
+            value = cache.get(cache_key)
+            if value is not MISSING:
+                return value
+        value = (await self._get(path)).json()
+        if use_cache and not (isinstance(value, dict) and 'error' in value):
+            cache.set(cache_key, value)
+        return value
+
+    # ========== PRODUCT OPERATIONS ==========
+
+    async def get_product(self, store_id, product_id):
+        return await self._read(f"stores/{store_id}/products/{product_id}", ('product', store_id, product_id))
+
+    async def get_store_name(self, store_id):
+        return await self._read(f"stores/{store_id}/name", ('store_name', store_id))
+
+    async def get_product_name(self, store_id, product_id):
+        return await self._read(f"stores/{store_id}/products/{product_id}/name", ('product_name', store_id, product_id))
+
+    async def get_product_store_id(self, product_id):
+        store_id = await self._read(f"product_index/{product_id}", ('product_store', product_id))
+        return store_id if isinstance(store_id, str) else None
+
+    async def get_product_with_store_name(self, product_id):
+        """(store_id, product, store_name): the product and store name are fetched concurrently"""
+        store_id = await self.get_product_store_id(product_id)
+        if not store_id:
+            return None, None, None
+        product, store_name = await asyncio.gather(
+            self.get_product(store_id, product_id),
+            self.get_store_name(store_id)
+        )
+        if not product or not isinstance(product, dict):
+            return None, None, None
+        return store_id, product, store_name
+
+    # ========== ANALYTICS ==========
+
+    async def get_store_analytics(self, store_id):
+        return store_analytics((await self._get(f"analytics/{store_id}")).json())
+
+    async def get_analytics_buckets(self, store_id, granularity, first_key, last_key):
+        code = GRANULARITIES[granularity][0]
+        response = await self._get(f"{BUCKET_NODE}/{store_id}/{code}", params=bucket_query(first_key, last_key))
+        buckets = response.json()
+        return buckets if isinstance(buckets, dict) else {}
+
+    async def get_store_timeseries(self, store_id, granularity, start, end, limit=TOP_PRODUCTS):
+        """Top product names are fetched concurrently"""
+        keys = bucket_keys(granularity, start, end)
+        buckets = await self.get_analytics_buckets(store_id, granularity, keys[0], keys[-1])
+        result = aggregate(buckets, granularity, keys, limit)
+        names = await asyncio.gather(*(self.get_product_name(store_id, entry['product_id'])
+                                       for entry in result['products']))
+        for entry, name in zip(result['products'], names):
+            entry['name'] = name
+        return result
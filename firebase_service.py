@@ -3,293 +3,788 @@ Firebase Service Module
 Handles all Firebase Realtime Database operations using REST API
 """
 
-import requests
+import copy
 import json
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from config import FIREBASE_CONFIG
+from analytics_engine import (BUCKET_NODE, GRANULARITIES, TOP_PRODUCTS, aggregate, bucket_keys, order_bucket_updates,
+                              scan_bucket_updates)
+from firebase_transport import get_transport
+from read_cache import MISSING
+from scan_history import (HISTORY_COMPACT_EVERY, HISTORY_LIMIT, HISTORY_NODE, HISTORY_PAGE_SIZE, history_entry,
+                          history_key, history_page, page_query, trim_updates)
+
+logger = logging.getLogger(__name__)
+
+# Fields copied into store_summaries for the lightweight store listing
+STORE_SUMMARY_FIELDS = ('name', 'description', 'category', 'created_at')
+
+# Embedded blobs that older versions stored in product records; QR images are now
+# rendered on demand by /api/qr-code/<product_id> (convert_qrs.py removes old ones)
+PRODUCT_BLOB_FIELDS = ('qr_code',)
+
+# create_user's error when the email_index already has the address
+EMAIL_TAKEN = 'Email already registered'
+
+# Bounds of one multi-location PATCH sent by update_paths_chunked
+CHUNK_MAX_PATHS = 500
+CHUNK_MAX_BYTES = 4 * 1024 * 1024
+
+# Length of the most_scanned / most_requested lists kept in analytics/<store_id>
+ANALYTICS_TOP_N = 5
+
+# Seconds between most_scanned refreshes of one store; scans in between only increment counters
+SCAN_ROLLUP_INTERVAL = 30
+
+# Products per page of the paginated store listing (default and upper bound)
+PRODUCT_PAGE_SIZE = 24
+MAX_PRODUCT_PAGE_SIZE = 100
+
+def store_summary(store_data):
+    """Project a store record onto the fields the store listing renders"""
+    return {field: store_data[field] for field in STORE_SUMMARY_FIELDS if store_data.get(field) is not None}
+
+def product_record(product_data):
+    """Product data as stored, without embedded blob fields"""
+    return {field: value for field, value in product_data.items() if field not in PRODUCT_BLOB_FIELDS}
+
+def build_store_analytics(products, requests_data, orders):
+    """
+    Compute the analytics/<store_id> rollup from raw products, product requests and
+    orders (used by rebuild_analytics.py; the app keeps the rollup up to date itself)
+    """
+    products = products if isinstance(products, dict) else {}
+    scans, names = {}, {}
+    for prod_id, prod_data in products.items():
+        if isinstance(prod_data, dict):
+            scans[prod_id] = prod_data.get('scan_count', 0)
+            names[prod_id] = prod_data.get('name', 'Unknown')
+    
+    requests_data = requests_data if isinstance(requests_data, dict) else {}
+    requested = {prod_name: data.get('count', 0)
+                 for prod_name, data in requests_data.items() if isinstance(data, dict)}
+    
+    return {
+        'total_orders': len(orders) if orders else 0,
+        'most_scanned': top_entries(scans, names),
+        'most_requested': top_entries(requested)
+    }
+
+def top_entries(counts, names=None, limit=ANALYTICS_TOP_N):
+    """
+    Rank {key: count} into [{'name', 'count'}] (highest first, ties by key).
+    names maps keys to display names; keys without one are skipped.
+    """
+    ranked = sorted(
+        ((key, count) for key, count in (counts or {}).items()
+         if isinstance(count, (int, float)) and count > 0),
+        key=lambda item: (-item[1], item[0])
+    )
+    entries = []
+    for key, count in ranked:
+        name = names.get(key) if names is not None else key
+        if name is None:
+            continue
+        entries.append({'name': name, 'count': count})
+        if len(entries) == limit:
+            break
+    return entries
+
+def rollup_list(value):
+    """Firebase may hand a stored list back as {"0": ..., "1": ...}"""
+    if isinstance(value, dict):
+        return [value[key] for key in sorted(value, key=int)]
+    return value if isinstance(value, list) else []
+
+def store_analytics(rollup):
+    """Dashboard analytics from an analytics/<store_id> rollup as read"""
+    rollup = rollup if isinstance(rollup, dict) else {}
+    return {
+        'total_orders': rollup.get('total_orders', 0),
+        'most_scanned': rollup_list(rollup.get('most_scanned')),
+        'most_requested': rollup_list(rollup.get('most_requested'))
+    }
+
+def scan_increment_updates(counts):
+    """
+    Server-side increments of scan_count, the scan_counts rollup and the current
+    analytics buckets for {(store_id, product_id): n}
+    """
+    updates = scan_bucket_updates(counts)
+    for (store_id, product_id), count in counts.items():
+        increment = {".sv": {"increment": count}}
+        updates[f"stores/{store_id}/products/{product_id}/scan_count"] = increment
+        updates[f"scan_counts/{store_id}/{product_id}"] = increment
+    return updates
+
+def bucket_query(first_key, last_key):
+    """REST query parameters selecting bucket keys first_key..last_key"""
+    return {'orderBy': '"$key"', 'startAt': json.dumps(first_key), 'endAt': json.dumps(last_key)}
+
+def key_order(key):
+    """Sort key matching Firebase's $key order: 32-bit integer keys numerically, then strings"""
+    if key.lstrip('-').isdigit() and -2**31 <= int(key) < 2**31 and key == str(int(key)):
+        return (0, int(key), '')
+    return (1, 0, key)
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def product_filter(category=None, min_price=None, max_price=None, in_stock=False):
+    """Predicate for the store listing filters, or None when no filter is set"""
+    if category is None and min_price is None and max_price is None and not in_stock:
+        return None
+
+    def matches(product):
+        if category is not None and product.get('category') != category:
+            return False
+        if min_price is not None or max_price is not None:
+            price = _number(product.get('price'))
+            if price is None or (min_price is not None and price < min_price) or \
+                    (max_price is not None and price > max_price):
+                return False
+        return not in_stock or (_number(product.get('stock')) or 0) > 0
+    return matches
+
+def page_products(products, limit, cursor=None, matches=None):
+    """
+    One page of {product_id: product} in key order: the first `limit` matching products
+    after the cursor key. Returns (page, next_cursor); next_cursor is None on the last page
+    """
+    after = key_order(cursor) if cursor is not None else None
+    page = {}
+    for product_id in sorted(products, key=key_order):
+        product = products[product_id]
+        if (after is not None and key_order(product_id) <= after) or not isinstance(product, dict):
+            continue
+        if matches is not None and not matches(product):
+            continue
+        if len(page) == limit:
+            return page, next(reversed(page))
+        page[product_id] = product
+    return page, None
+
+def chunk_updates(updates, max_paths=CHUNK_MAX_PATHS, max_bytes=CHUNK_MAX_BYTES):
+    """Split {path: value} into PATCH bodies of at most max_paths paths / ~max_bytes of JSON"""
+    chunk, size = {}, 0
+    for path, value in updates.items():
+        item_size = len(path) + len(json.dumps(value, separators=(',', ':'))) + 4
+        if chunk and (len(chunk) >= max_paths or size + item_size > max_bytes):
+            yield chunk
+            chunk, size = {}, 0
+        chunk[path] = value
+        size += item_size
+    if chunk:
+        yield chunk
+
+def user_record(email, role):
+    """A new users/<user_id> record"""
+    return {
+        "email": email,
+        "role": role,
+        "cart": {},
+        "orders": {}
+    }
+
+def email_index_key(email):
+    """
+    Encode an email as a Firebase key ('.', '$', '#', '[', ']' and '/' are not allowed).
+    '_' and ',' are escaped as well, so two different emails never share a key
+    """
+    key = email.replace('_', '_5f')
+    for char in ',$#[]/':
+        key = key.replace(char, '_%02x' % ord(char))
+    return key.replace('.', ',')
 
 class FirebaseService:
-    def __init__(self):
-        self.db_url = FIREBASE_CONFIG['databaseURL']
+    def __init__(self, db_url=None, transport=None, cache=None, mirror=None):
+        self.db_url = (db_url or FIREBASE_CONFIG['databaseURL']).rstrip('/')
+        self._transport = transport
+        # Optional read-through cache (see read_cache.ReadCache); None disables caching
+        self.cache = cache
+        # Optional streamed in-memory copy of /stores (see store_mirror.StoreMirror)
+        self.mirror = mirror
+        # Optional scan increment buffer (see scan_counter.ScanCounter)
+        self.scan_counter = None
+        # Optional product search index kept current by product writes (see search_index.ProductSearch)
+        self.search = None
+        # Retention of each user's scan_history log (see scan_history.py): trimmed on
+        # every history_compact_every-th append a user makes through this process
+        self.history_limit = HISTORY_LIMIT
+        self.history_compact_every = HISTORY_COMPACT_EVERY
+        self._history_appends = Counter()
+        self._history_lock = threading.Lock()
+        # most_scanned is rebuilt at most once per interval per store (0 refreshes on every scan write)
+        self.scan_rollup_interval = SCAN_ROLLUP_INTERVAL
+        self._scan_rollup_at = {}
+        self._scan_rollup_lock = threading.Lock()
+    
+    @property
+    def http(self):
+        """Pooled HTTP transport (shared per process unless one was injected)"""
+        return self._transport or get_transport()
     
     def _get_url(self, path):
         """Construct Firebase REST API URL"""
         return f"{self.db_url}/{path}.json"
     
+    def _read(self, path, cache_key=None):
+        """GET a path, served from the store mirror or read cache when possible"""
+        if self.mirror is not None:
+            value = self.mirror.get(path)
+            if value is not MISSING:
+                return value
+        
+        use_cache = self.cache is not None and cache_key is not None
+        if use_cache:
+            value = self.cache.get(cache_key)
+            if value is not MISSING:
+                return value
+        
+        response = self.http.get(self._get_url(path))
+        value = response.json()
+        
+        # Never cache Firebase error payloads such as {"error": "Permission denied"}
+        if use_cache and not (isinstance(value, dict) and 'error' in value):
+            self.cache.set(cache_key, value)
+        return value
+    
+    def update_paths(self, updates):
+        """Write several locations in one atomic root-level multi-location PATCH"""
+        response = self.http.patch(self._get_url(""), json=updates)
+        if response.ok:
+            self._mirror_writes(updates)
+        return response.json()
+    
+    def update_paths_chunked(self, updates, workers=4, max_paths=CHUNK_MAX_PATHS, max_bytes=CHUNK_MAX_BYTES):
+        """
+        Write a large {path: value} dict as several concurrent update_paths calls.
+        Each chunk is atomic, the whole write is not. Returns the number of chunks;
+        raises RuntimeError if Firebase rejects one.
+        """
+        def send(chunk):
+            result = self.update_paths(chunk)
+            if isinstance(result, dict) and 'error' in result:
+                raise RuntimeError(f"Firebase rejected a {len(chunk)}-path update: {result['error']}")
+
+        chunks = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for _ in pool.map(send, chunk_updates(updates, max_paths, max_bytes)):
+                chunks += 1
+        return chunks
+    
+    def get_keys(self, path):
+        """Child keys of a path without their contents (shallow read)"""
+        response = self.http.get(self._get_url(path), params={'shallow': 'true'})
+        children = response.json()
+        if isinstance(children, list):
+            return [str(index) for index, child in enumerate(children) if child is not None]
+        return list(children) if isinstance(children, dict) and 'error' not in children else []
+    
+    def batch(self):
+        """Start a WriteBatch that commits several operations as one update_paths call"""
+        return WriteBatch(self)
+    
+    def _mirror_writes(self, updates, base=""):
+        """Apply writes to the store mirror immediately (read-your-writes)"""
+        if self.mirror is not None:
+            for path, value in updates.items():
+                self.mirror.apply_write(f"{base}/{path}" if base else path, value)
+    
+    def _invalidate_store(self, store_id):
+        """Drop cached reads that include a store's own fields"""
+        if self.cache is not None:
+            self.cache.invalidate(('store', store_id), ('store_name', store_id), ('store_summary', store_id),
+                                  ('store_summaries',))
+    
+    def _invalidate_product(self, store_id, product_id):
+        """Drop cached reads that include a product"""
+        if self.cache is not None:
+            self.cache.invalidate(
+                ('product', store_id, product_id),
+                ('products', store_id),
+                ('store', store_id),
+                ('product_store', product_id),
+                ('product_name', store_id, product_id)
+            )
+            self.cache.invalidate_prefix(('product_category', store_id))
+    
     # ========== USER OPERATIONS ==========
     
     def create_user(self, user_id, email, role):
-        """Create a new user in Firebase"""
-        user_data = {
-            "email": email,
-            "role": role,
-            "scanned_history": {},
-            "cart": {},
-            "orders": {}
-        }
-        url = self._get_url(f"users/{user_id}")
-        response = requests.put(url, json=user_data)
-        return response.json()
+        """
+        Create a new user in Firebase and index it by email. Returns an error dict
+        instead of writing when the email is already registered
+        """
+        existing = self.http.get(self._get_url(f"email_index/{email_index_key(email)}")).json()
+        if existing is not None:
+            return {'error': EMAIL_TAKEN}
+        user_data = user_record(email, role)
+        # One multi-location write keeps the user and its index entry in step
+        return self.update_paths({
+            f"users/{user_id}": user_data,
+            f"email_index/{email_index_key(email)}": {"user_id": user_id, "role": role}
+        })
     
     def get_user(self, user_id):
         """Get user data"""
         url = self._get_url(f"users/{user_id}")
-        response = requests.get(url)
+        response = self.http.get(url)
         return response.json()
     def get_user_by_email(self, email):
-        """Get user data by email (scan all users - inefficient but works for demo)"""
-        url = self._get_url("users")
-        response = requests.get(url)
-        users = response.json()
+        """
+        Get user data by email via the email_index node (one small keyed read).
+        Run backfill_email_index.py once for users created before the index existed.
+        """
+        url = self._get_url(f"email_index/{email_index_key(email)}")
+        response = self.http.get(url)
+        entry = response.json()
         
-        if not users or not isinstance(users, dict):
+        if not entry or not isinstance(entry, dict) or not entry.get('user_id'):
             return None
-            
-        for user_id, user_data in users.items():
-            # Skip non-dict entries (e.g. metadata strings)
-            if not isinstance(user_data, dict):
-                continue
-            if user_data.get('email') == email:
-                user_data['user_id'] = user_id
-                return user_data
         
-        return None
+        return {
+            'user_id': entry['user_id'],
+            'email': email,
+            'role': entry.get('role')
+        }
     
     def create_store(self, store_id, store_data):
-        """Create a new store"""
-        url = self._get_url(f"stores/{store_id}")
-        response = requests.put(url, json=store_data)
-        return response.json()
+        """Create a new store and record it in owner_index and store_summaries"""
+        updates = {
+            f"stores/{store_id}": store_data,
+            f"store_summaries/{store_id}": store_summary(store_data)
+        }
+        if store_data.get('owner_id'):
+            updates[f"owner_index/{store_data['owner_id']}"] = store_id
+        result = self.update_paths(updates)
+        self._invalidate_store(store_id)
+        return result
+    
+    def get_store_id_by_owner(self, owner_id):
+        """Look up the store owned by a user via owner_index"""
+        url = self._get_url(f"owner_index/{owner_id}")
+        response = self.http.get(url)
+        store_id = response.json()
+        return store_id if isinstance(store_id, str) else None
     
     def get_all_stores(self):
         """Get all stores"""
-        url = self._get_url("stores")
-        response = requests.get(url)
-        stores = response.json()
+        stores = self._read("stores")
         return stores if stores else {}
     
+    def get_store_summaries(self):
+        """Get name/description of every store without their products or orders (cached)"""
+        summaries = self._read("store_summaries", ('store_summaries',))
+        return summaries if summaries else {}
+    
+    def get_store_summary(self, store_id):
+        """Get one store's name/description without its products or orders (cached)"""
+        summary = self._read(f"store_summaries/{store_id}", ('store_summary', store_id))
+        return summary if isinstance(summary, dict) else None
+    
     def get_store(self, store_id):
-        """Get a specific store"""
-        url = self._get_url(f"stores/{store_id}")
-        response = requests.get(url)
-        return response.json()
+        """Get a specific store (cached)"""
+        return self._read(f"stores/{store_id}", ('store', store_id))
+    
+    def get_store_name(self, store_id):
+        """Get only a store's name, avoiding its products and orders (cached)"""
+        return self._read(f"stores/{store_id}/name", ('store_name', store_id))
     
     # ========== PRODUCT OPERATIONS ==========
     
     def add_product(self, store_id, product_id, product_data):
-        """Add a product to a store"""
-        url = self._get_url(f"stores/{store_id}/products/{product_id}")
-        response = requests.put(url, json=product_data)
-        return response.json()
+        """Add a product to a store and record it in product_index"""
+        updates = {
+            f"stores/{store_id}/products/{product_id}": product_record(product_data),
+            f"product_index/{product_id}": store_id
+        }
+        result = self.update_paths(updates)
+        self._invalidate_product(store_id, product_id)
+        if self.search is not None:
+            self.search.add(store_id, product_id, product_data)
+        return result
     
     def get_products(self, store_id):
-        """Get all products for a store"""
-        url = self._get_url(f"stores/{store_id}/products")
-        response = requests.get(url)
-        products = response.json()
+        """Get all products for a store (cached)"""
+        products = self._read(f"stores/{store_id}/products", ('products', store_id))
         return products if products else {}
     
+    def get_products_page(self, store_id, limit=PRODUCT_PAGE_SIZE, cursor=None, category=None,
+                          min_price=None, max_price=None, in_stock=False):
+        """
+        One page of a store's products in key order, optionally filtered: (products, next_cursor).
+        Served from the store mirror or a cached full read when there is one. Otherwise an
+        unfiltered page is a single orderBy="$key" limitToFirst query, a category filter reads
+        only that category (orderBy="category", needs the .indexOn in database.rules.json) and
+        other filters read the whole product list once into the cache.
+        """
+        path = f"stores/{store_id}/products"
+        matches = product_filter(category, min_price, max_price, in_stock)
+
+        products = MISSING
+        if self.mirror is not None:
+            products = self.mirror.get(path)
+        if products is MISSING and self.cache is not None:
+            # Only the page is copied below, not the whole cached product list
+            products = self.cache.get(('products', store_id), copy_value=False)
+        if products is MISSING:
+            if matches is None:
+                # The cursor itself comes back too (startAt is inclusive), plus one to detect more
+                params = {'orderBy': '"$key"', 'limitToFirst': limit + (2 if cursor is not None else 1)}
+                if cursor is not None:
+                    params['startAt'] = json.dumps(cursor)
+                products = self.http.get(self._get_url(path), params=params).json()
+            elif category is not None:
+                products = self._query_products_by_category(store_id, category)
+            else:
+                products = self.get_products(store_id)
+
+        if isinstance(products, dict) and isinstance(products.get('error'), str):
+            return products, None
+        page, next_cursor = page_products(products if isinstance(products, dict) else {}, limit, cursor, matches)
+        return copy.deepcopy(page), next_cursor
+
+    def _query_products_by_category(self, store_id, category):
+        """All products of one category (cached)"""
+        cache_key = ('product_category', store_id, category)
+        if self.cache is not None:
+            products = self.cache.get(cache_key, copy_value=False)
+            if products is not MISSING:
+                return products
+        params = {'orderBy': '"category"', 'equalTo': json.dumps(category)}
+        products = self.http.get(self._get_url(f"stores/{store_id}/products"), params=params).json()
+        if self.cache is not None and not (isinstance(products, dict) and 'error' in products):
+            self.cache.set(cache_key, products)
+        return products
+
     def get_product(self, store_id, product_id):
-        """Get a specific product"""
-        url = self._get_url(f"stores/{store_id}/products/{product_id}")
-        response = requests.get(url)
-        return response.json()
+        """Get a specific product (cached)"""
+        return self._read(f"stores/{store_id}/products/{product_id}", ('product', store_id, product_id))
     
     def update_product(self, store_id, product_id, product_data):
-        """Update a product"""
+        """Update a product (embedded blob fields are dropped, as in add_product)"""
+        product_data = product_record(product_data)
         url = self._get_url(f"stores/{store_id}/products/{product_id}")
-        response = requests.patch(url, json=product_data)
+        response = self.http.patch(url, json=product_data)
+        self._mirror_writes(product_data, base=f"stores/{store_id}/products/{product_id}")
+        self._invalidate_product(store_id, product_id)
+        if self.search is not None:
+            # A partial update: re-read the merged record so unchanged fields stay searchable
+            self.search.add(store_id, product_id, self.get_product(store_id, product_id))
         return response.json()
     
     def delete_product(self, store_id, product_id):
-        """Delete a product"""
-        url = self._get_url(f"stores/{store_id}/products/{product_id}")
-        response = requests.delete(url)
-        return response.status_code == 200
+        """Delete a product and its product_index entry"""
+        updates = {
+            f"stores/{store_id}/products/{product_id}": None,
+            f"product_index/{product_id}": None,
+            f"scan_counts/{store_id}/{product_id}": None
+        }
+        result = self.update_paths(updates)
+        self._invalidate_product(store_id, product_id)
+        if self.search is not None:
+            self.search.remove(product_id)
+        self._refresh_rollup(self.refresh_scan_rollup, store_id)
+        return not (isinstance(result, dict) and 'error' in result)
+
+    def get_product_name(self, store_id, product_id):
+        """Get only a product's name (cached)"""
+        return self._read(f"stores/{store_id}/products/{product_id}/name", ('product_name', store_id, product_id))
+
+    def get_product_store_id(self, product_id):
+        """Look up which store owns a product via product_index (cached)"""
+        store_id = self._read(f"product_index/{product_id}", ('product_store', product_id))
+        return store_id if isinstance(store_id, str) else None
 
     def get_product_by_global_id(self, product_id):
         """
-        Find a product by ID across ALL stores (inefficient but necessary for global ID lookup)
+        Find a product by ID across all stores using product_index (two keyed reads).
         Returns (store_id, product_data) or (None, None)
         """
-        all_stores = self.get_all_stores()
-        if not all_stores or not isinstance(all_stores, dict): return None, None
+        store_id = self.get_product_store_id(product_id)
+        if not store_id:
+            return None, None
         
-        for store_id, store_data in all_stores.items():
-            if not isinstance(store_data, dict):
-                continue
-            products = store_data.get('products', {})
-            if not isinstance(products, dict):
-                continue
-            if product_id in products:
-                # Found it!
-                return store_id, products[product_id]
+        product = self.get_product(store_id, product_id)
+        if not product or not isinstance(product, dict):
+            return None, None
         
-        return None, None
+        return store_id, product
+    
+    def get_product_with_store_name(self, product_id):
+        """Returns (store_id, product_data, store_name) or (None, None, None)"""
+        store_id, product = self.get_product_by_global_id(product_id)
+        if not product:
+            return None, None, None
+        return store_id, product, self.get_store_name(store_id)
     
     # ========== CART OPERATIONS ==========
     
     def add_to_cart(self, user_id, product_id, product_data):
         """Add item to user's cart"""
         url = self._get_url(f"users/{user_id}/cart/{product_id}")
-        response = requests.put(url, json=product_data)
+        response = self.http.put(url, json=product_data)
         return response.json()
     
     def get_cart(self, user_id):
         """Get user's cart"""
         url = self._get_url(f"users/{user_id}/cart")
-        response = requests.get(url)
+        response = self.http.get(url)
         cart = response.json()
         return cart if cart else {}
     
     def remove_from_cart(self, user_id, product_id):
         """Remove item from cart"""
         url = self._get_url(f"users/{user_id}/cart/{product_id}")
-        response = requests.delete(url)
+        response = self.http.delete(url)
         return response.status_code == 200
     
     def clear_cart(self, user_id):
         """Clear user's cart"""
         url = self._get_url(f"users/{user_id}/cart")
-        response = requests.delete(url)
+        response = self.http.delete(url)
         return response.status_code == 200
     
     # ========== SCANNED HISTORY ==========
     
-    def add_to_history(self, user_id, product_id, product_data):
-        """Add product to scanned history"""
-        url = self._get_url(f"users/{user_id}/scanned_history/{product_id}")
-        response = requests.put(url, json=product_data)
+    def add_to_history(self, user_id, store_id, product_id, product_name, key=None):
+        """
+        Append a scan to the user's scan_history log: one PUT, plus a compaction on
+        every history_compact_every-th append. Pass a history_key() made at scan time
+        so a retried call rewrites the same entry
+        """
+        url = self._get_url(f"{HISTORY_NODE}/{user_id}/{key or history_key()}")
+        response = self.http.put(url, json=history_entry(store_id, product_id, product_name))
+        if response.status_code == 200 and self._history_compaction_due(user_id):
+            self.compact_history(user_id)
         return response.json()
     
-    def get_history(self, user_id):
-        """Get user's scanned history"""
-        url = self._get_url(f"users/{user_id}/scanned_history")
-        response = requests.get(url)
-        history = response.json()
-        return history if history else {}
+    def _history_compaction_due(self, user_id):
+        with self._history_lock:
+            self._history_appends[user_id] += 1
+            if self._history_appends[user_id] < self.history_compact_every:
+                return False
+            del self._history_appends[user_id]
+            return True
+    
+    def get_history_page(self, user_id, limit=HISTORY_PAGE_SIZE, cursor=None):
+        """
+        Newest-first page of a user's scans: (entries, next_cursor). One limitToLast
+        query, however long the log is
+        """
+        response = self.http.get(self._get_url(f"{HISTORY_NODE}/{user_id}"), params=page_query(limit, cursor))
+        entries = response.json()
+        if isinstance(entries, dict) and isinstance(entries.get('error'), str):
+            return entries, None
+        return history_page(entries if isinstance(entries, dict) else {}, limit, cursor)
+    
+    def compact_history(self, user_id):
+        """
+        Trim a user's log to the newest history_limit entries; returns the number removed.
+        Reads only the keys, and writes only when the log is over the limit
+        """
+        updates = trim_updates(user_id, self.get_keys(f"{HISTORY_NODE}/{user_id}"), self.history_limit)
+        if updates:
+            self.update_paths(updates)
+        return len(updates)
     
     # ========== ORDER OPERATIONS ==========
     
+    def get_order(self, order_id):
+        """Get a specific order"""
+        url = self._get_url(f"orders/{order_id}")
+        response = self.http.get(url)
+        return response.json()
+    
     def create_order(self, order_id, order_data):
         """Create a new order"""
         url = self._get_url(f"orders/{order_id}")
-        response = requests.put(url, json=order_data)
+        response = self.http.put(url, json=order_data)
         return response.json()
     
     def get_user_orders(self, user_id):
         """Get all orders for a user"""
         url = self._get_url(f"users/{user_id}/orders")
-        response = requests.get(url)
+        response = self.http.get(url)
         orders = response.json()
         return orders if orders else {}
     
     def add_order_to_user(self, user_id, order_id, order_data):
         """Add order reference to user"""
         url = self._get_url(f"users/{user_id}/orders/{order_id}")
-        response = requests.put(url, json=order_data)
+        response = self.http.put(url, json=order_data)
         return response.json()
 
     def add_order_to_store(self, store_id, order_id, order_data):
-        """Add order reference to store"""
-        url = self._get_url(f"stores/{store_id}/orders/{order_id}")
-        response = requests.put(url, json=order_data)
-        return response.json()
+        """Add order reference to store and count it in analytics/<store_id>/total_orders"""
+        updates = order_bucket_updates(store_id, order_data.get('items'))
+        updates.update({
+            f"stores/{store_id}/orders/{order_id}": order_data,
+            f"analytics/{store_id}/total_orders": {".sv": {"increment": 1}}
+        })
+        result = self.update_paths(updates)
+        if self.cache is not None:
+            self.cache.invalidate(('store', store_id))
+        return result
         
     def get_store_orders(self, store_id):
         """Get all orders for a store"""
-        url = self._get_url(f"stores/{store_id}/orders")
-        response = requests.get(url)
-        orders = response.json()
+        orders = self._read(f"stores/{store_id}/orders")
         return orders if orders else {}
     
     # ========== PRODUCT REQUEST OPERATIONS ==========
     
     def add_product_request(self, store_id, product_name):
-        """Add or increment product request"""
-        url = self._get_url(f"requests/{store_id}/{product_name}")
-        
-        # Get current count
-        response = requests.get(url)
-        current_data = response.json()
-        
-        if current_data:
-            count = current_data.get('count', 0) + 1
-        else:
-            count = 1
-        
-        # Update count
-        request_data = {'count': count}
-        response = requests.put(url, json=request_data)
-        return response.json()
+        """Increment a product request count server-side and refresh the most_requested rollup"""
+        result = self.update_paths({
+            f"requests/{store_id}/{product_name}/count": {".sv": {"increment": 1}}
+        })
+        self._refresh_rollup(self.refresh_request_rollup, store_id)
+        return result
     
     def get_store_requests(self, store_id):
         """Get all product requests for a store"""
         url = self._get_url(f"requests/{store_id}")
-        response = requests.get(url)
+        response = self.http.get(url)
         requests_data = response.json()
         return requests_data if requests_data else {}
     
     # ========== ANALYTICS ==========
     
     def increment_scan_count(self, store_id, product_id):
-        """Increment scan count for a product"""
-        url = self._get_url(f"stores/{store_id}/products/{product_id}/scan_count")
-        
-        # Get current count
-        response = requests.get(url)
-        current_count = response.json() or 0
-        
-        # Increment
-        new_count = current_count + 1
-        response = requests.put(url, json=new_count)
+        """Increment scan count for a product (buffered when a scan counter is attached)"""
+        if self.scan_counter is not None:
+            self.scan_counter.increment(store_id, product_id)
+            return None
+        return self.apply_scan_increments({(store_id, product_id): 1})
+    
+    def apply_scan_increments(self, counts):
+        """
+        Add {(store_id, product_id): n} to scan_count and scan_counts/<store_id> with
+        server-side increments in one multi-path PATCH (no lost updates), then refresh
+        the most_scanned rollup of the stores touched that are due for one. Only a
+        failed PATCH raises, so a caller that retries on error never applies the
+        increments twice
+        """
+        response = self.http.patch(self._get_url(""), json=scan_increment_updates(counts))
+        response.raise_for_status()
+        if self.cache is not None:
+            for store_id, product_id in counts:
+                self.cache.invalidate(('product', store_id, product_id), ('products', store_id))
+        for store_id in {store_id for store_id, _ in counts}:
+            if self._scan_rollup_due(store_id):
+                self._refresh_rollup(self.refresh_scan_rollup, store_id)
         return response.json()
     
-    def get_store_analytics(self, store_id):
-        """Get analytics for a store"""
-        # Get all products
-        products = self.get_products(store_id)
-        
-        if not products:
-            return {
-                'total_orders': 0,
-                'most_scanned': [],
-                'most_requested': []
-            }
-        
-        # Calculate most scanned products
-        scanned_products = []
-        for prod_id, prod_data in products.items():
-            if not isinstance(prod_data, dict):
-                continue
-            scan_count = prod_data.get('scan_count', 0)
-            if scan_count > 0:
-                scanned_products.append({
-                    'name': prod_data.get('name', 'Unknown'),
-                    'count': scan_count
-                })
-        
-        scanned_products.sort(key=lambda x: x['count'], reverse=True)
-        
-        # Get product requests
+    def _scan_rollup_due(self, store_id):
+        """True at most once per scan_rollup_interval for a store (per process)"""
+        now = time.monotonic()
+        with self._scan_rollup_lock:
+            last = self._scan_rollup_at.get(store_id)
+            if last is not None and now - last < self.scan_rollup_interval:
+                return False
+            self._scan_rollup_at[store_id] = now
+            return True
+    
+    def _refresh_rollup(self, refresh, store_id):
+        """
+        Best-effort rollup refresh after a counter write: the counters are already
+        applied, and the next refresh or rebuild_analytics.py repairs a stale rollup
+        """
+        try:
+            refresh(store_id)
+        except Exception:
+            logger.exception("Refreshing analytics/%s failed after its counters were written", store_id)
+    
+    def refresh_scan_rollup(self, store_id):
+        """Recompute analytics/<store_id>/most_scanned from the small scan_counts/<store_id> node"""
+        counts = self.http.get(self._get_url(f"scan_counts/{store_id}")).json()
+        counts = counts if isinstance(counts, dict) else {}
+        # Only the leaders need a name, so look up a few more than ANALYTICS_TOP_N
+        # in case some of them were deleted since their last scan
+        leaders = sorted(counts, key=lambda product_id: (-counts[product_id], product_id))[:ANALYTICS_TOP_N * 2]
+        names = {product_id: self.get_product_name(store_id, product_id) for product_id in leaders}
+        most_scanned = top_entries(counts, names)
+        return self.http.put(self._get_url(f"analytics/{store_id}/most_scanned"), json=most_scanned).json()
+    
+    def refresh_request_rollup(self, store_id):
+        """Recompute analytics/<store_id>/most_requested from requests/<store_id>"""
         requests_data = self.get_store_requests(store_id)
-        requested_products = []
-        
-        if requests_data and isinstance(requests_data, dict):
-            for prod_name, data in requests_data.items():
-                if not isinstance(data, dict):
-                    continue
-                requested_products.append({
-                    'name': prod_name,
-                    'count': data.get('count', 0)
-                })
-        
-        requested_products.sort(key=lambda x: x['count'], reverse=True)
-        
-        # Get store orders
-        orders = self.get_store_orders(store_id)
-        
-        return {
-            'total_orders': len(orders) if orders else 0,
-            'most_scanned': scanned_products[:5],
-            'most_requested': requested_products[:5]
-        }
+        counts = {name: data.get('count', 0) for name, data in requests_data.items() if isinstance(data, dict)}
+        most_requested = top_entries(counts)
+        return self.http.put(self._get_url(f"analytics/{store_id}/most_requested"), json=most_requested).json()
+    
+    def get_store_analytics(self, store_id):
+        """
+        Get analytics for a store: one read of the analytics/<store_id> rollup.
+        Run rebuild_analytics.py once for stores that predate the rollups.
+        """
+        return store_analytics(self.http.get(self._get_url(f"analytics/{store_id}")).json())
+    
+    def get_analytics_buckets(self, store_id, granularity, first_key, last_key):
+        """Read one store's hourly or daily buckets between two bucket keys (inclusive)"""
+        code = GRANULARITIES[granularity][0]
+        url = self._get_url(f"{BUCKET_NODE}/{store_id}/{code}")
+        response = self.http.get(url, params=bucket_query(first_key, last_key))
+        buckets = response.json()
+        return buckets if isinstance(buckets, dict) else {}
+    
+    def get_store_timeseries(self, store_id, granularity, start, end, limit=TOP_PRODUCTS):
+        """Scans, units, revenue and orders per bucket from start to end, plus the top products"""
+        keys = bucket_keys(granularity, start, end)
+        buckets = self.get_analytics_buckets(store_id, granularity, keys[0], keys[-1])
+        result = aggregate(buckets, granularity, keys, limit)
+        for entry in result['products']:
+            entry['name'] = self.get_product_name(store_id, entry['product_id'])
+        return result
+
+
+class WriteBatch:
+    """
+    Collects writes from several service operations and commits them as one
+    multi-location PATCH, so either every path is written or none is.
+    """
+
+    def __init__(self, firebase):
+        self.firebase = firebase
+        self.updates = {}
+        self.invalidations = []
+
+    def set(self, path, value):
+        self.updates[path] = value
+        return self
+
+    def delete(self, path):
+        return self.set(path, None)
+
+    def create_order(self, order_id, order_data):
+        return self.set(f"orders/{order_id}", order_data)
+
+    def add_order_to_user(self, user_id, order_id, order_data):
+        return self.set(f"users/{user_id}/orders/{order_id}", order_data)
+
+    def add_order_to_store(self, store_id, order_id, order_data):
+        self.invalidations.append(('store', store_id))
+        self.set(f"analytics/{store_id}/total_orders", {".sv": {"increment": 1}})
+        self.updates.update(order_bucket_updates(store_id, order_data.get('items')))
+        return self.set(f"stores/{store_id}/orders/{order_id}", order_data)
+
+    def clear_cart(self, user_id):
+        return self.delete(f"users/{user_id}/cart")
+
+    def commit(self):
+        """Send all collected writes; returns the Firebase response body"""
+        if not self.updates:
+            return {}
+        result = self.firebase.update_paths(self.updates)
+        if self.firebase.cache is not None and self.invalidations:
+            self.firebase.cache.invalidate(*self.invalidations)
+        return result
@@ -0,0 +1,105 @@
+"""
+Firebase Transport Module
+Shared, pooled HTTP session used for every Firebase Realtime Database REST call
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+from request_tracing import record_call
+
+# Defaults used when config.py (copied from config.example.py) does not set them
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.3
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Only idempotent methods are retried. PATCH carries the {".sv": {"increment": n}} counter
+# writes, which a retry of a request that did reach the server would apply twice.
+RETRY_METHODS = frozenset(['GET', 'PUT', 'DELETE'])
+
+
+class FirebaseTransport:
+    """Keep-alive connection pool with timeouts and retry/backoff"""
+
+    def __init__(self, pool_size=None, timeout=None, max_retries=None, backoff_factor=None):
+        self.pool_size = pool_size if pool_size is not None else getattr(config, 'FIREBASE_POOL_SIZE', DEFAULT_POOL_SIZE)
+        self.timeout = timeout if timeout is not None else getattr(config, 'FIREBASE_TIMEOUT', DEFAULT_TIMEOUT)
+        self.max_retries = max_retries if max_retries is not None else getattr(config, 'FIREBASE_MAX_RETRIES', DEFAULT_MAX_RETRIES)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else getattr(config, 'FIREBASE_BACKOFF', DEFAULT_BACKOFF)
+
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the pool, applying the default timeout; every call is traced"""
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            record_call(method, url, 0, time.perf_counter() - start)
+            raise
+        body = response.request.body
+        record_call(method, url, response.status_code, time.perf_counter() - start,
+                    len(body) if body else 0, len(response.content))
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+# ========== PER-PROCESS SINGLETON ==========
+
+_transport = None
+_transport_pid = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    Return the transport shared by this process.
+    A new pool is created after fork so workers never share sockets with the parent.
+    """
+    global _transport, _transport_pid
+    pid = os.getpid()
+    if _transport is None or _transport_pid != pid:
+        with _transport_lock:
+            if _transport is None or _transport_pid != pid:
+                _transport = FirebaseTransport()
+                _transport_pid = pid
+    return _transport
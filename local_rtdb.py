@@ -0,0 +1,498 @@
+"""
+Local RTDB Stand-in
+In-memory server speaking the Firebase Realtime Database REST protocol (/<path>.json),
+used to benchmark and develop against FirebaseService without touching the live database.
+
+Supported: GET/PUT/PATCH/DELETE, multi-location PATCH, {".sv": ...} server values,
+shallow=true, orderBy="$key" / "$value" / "<child>" with startAt / endAt / equalTo /
+limitToFirst / limitToLast, print=silent, SSE streaming, optional ".indexOn"
+enforcement from a rules file, and injected latency.
+
+Usage:
+  python local_rtdb.py [--port 9000] [--latency-ms 20] [--data seed.json] [--rules database.rules.json]
+  FIREBASE_DATABASE_URL=http://127.0.0.1:9000 python app.py
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from firebase_service import key_order
+
+
+def _split(path):
+    """Split a database path into its keys"""
+    return [key for key in path.strip('/').split('/') if key]
+
+
+def _normalize(value):
+    """Drop nulls and empty objects the way Firebase does"""
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, child in value.items():
+            child = _normalize(child)
+            if child is not None:
+                cleaned[str(key)] = child
+        return cleaned or None
+    if isinstance(value, list):
+        return _normalize({str(i): v for i, v in enumerate(value)})
+    return value
+
+
+def _as_arrays(value):
+    """Return objects keyed 0..n as lists, as Firebase does when more than half the slots are used"""
+    if not isinstance(value, dict):
+        return value
+    value = {key: _as_arrays(child) for key, child in value.items()}
+    if value and all(key.isdigit() for key in value):
+        size = max(int(key) for key in value) + 1
+        if len(value) * 2 > size:
+            return [value.get(str(i)) for i in range(size)]
+    return value
+
+
+def _query_params(raw_path):
+    """REST query parameters; values are JSON ("$key", 5) apart from a few bare words"""
+    params = {}
+    for name, values in parse_qs(urlsplit(raw_path).query).items():
+        try:
+            params[name] = json.loads(values[0])
+        except ValueError:
+            params[name] = values[0]
+    return params
+
+
+# Characters Firebase does not allow in keys, and the special keys that are allowed anyway
+FORBIDDEN_KEY_CHARS = '.$#[]/'
+SPECIAL_KEYS = ('.sv', '.value', '.priority')
+
+
+def _invalid_key(value, top_level=False):
+    """First key in a write body Firebase would reject, or None"""
+    if not isinstance(value, dict):
+        return None
+    for key, child in value.items():
+        if key in SPECIAL_KEYS:
+            continue
+        # Multi-location PATCH keys are paths, so '/' is allowed at the top level only
+        parts = str(key).strip('/').split('/') if top_level else [str(key)]
+        for part in parts:
+            if not part or any(char in part for char in FORBIDDEN_KEY_CHARS):
+                return str(key)
+        bad = _invalid_key(child)
+        if bad is not None:
+            return bad
+    return None
+
+
+def _value_order(value):
+    """Firebase ordering of child values: null, false, true, numbers, strings, objects"""
+    if value is None:
+        return (0, 0, '')
+    if value is False:
+        return (1, 0, '')
+    if value is True:
+        return (2, 0, '')
+    if isinstance(value, (int, float)):
+        return (3, value, '')
+    if isinstance(value, str):
+        return (4, 0, value)
+    return (5, 0, '')
+
+
+def _child(value, path):
+    for key in _split(path):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _index_rules(rules, prefix=()):
+    """Collect {path pattern (tuple, '$name' wildcards): set of indexed children} from a rules tree"""
+    indexes = {}
+    if not isinstance(rules, dict):
+        return indexes
+    for key, child in rules.items():
+        if key == '.indexOn':
+            indexes[prefix] = {child} if isinstance(child, str) else set(child)
+        elif not key.startswith('.'):
+            indexes.update(_index_rules(child, prefix + (key,)))
+    return indexes
+
+
+class QueryError(ValueError):
+    """A query Firebase would answer with 400"""
+
+
+def _resolve_server_values(value, current):
+    """Replace {".sv": "timestamp"} and {".sv": {"increment": n}} placeholders"""
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1 and '.sv' in value:
+        server_value = value['.sv']
+        if server_value == 'timestamp':
+            return int(time.time() * 1000)
+        if isinstance(server_value, dict) and 'increment' in server_value:
+            base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+            return base + server_value['increment']
+    children = current if isinstance(current, dict) else {}
+    return {key: _resolve_server_values(child, children.get(key)) for key, child in value.items()}
+
+
+class LocalRTDB:
+    """Thread-safe in-memory JSON tree"""
+
+    def __init__(self, data=None, rules=None):
+        self.root = _normalize(data) or {}
+        # Indexes from a rules file; None serves every orderBy without checking .indexOn
+        self.indexes = _index_rules(rules.get('rules', rules)) if rules else None
+        self.lock = threading.RLock()
+        self.request_count = 0
+        self.listeners = []  # (keys, queue) pairs for streaming subscribers
+
+    def _node(self, keys):
+        node = self.root
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                return None
+            node = node[key]
+        return node
+
+    def get(self, path):
+        with self.lock:
+            return _as_arrays(json.loads(json.dumps(self._node(_split(path)))))
+
+    def query(self, path, params):
+        """
+        GET with REST query parameters: shallow=true, or orderBy ("$key", "$value" or a
+        child path) with startAt / endAt / equalTo / limitToFirst / limitToLast. Other
+        parameters are ignored. Raises QueryError where Firebase answers 400.
+        """
+        keys = _split(path)
+        with self.lock:
+            node = json.loads(json.dumps(self._node(keys)))
+        if params.get('shallow') is True:
+            if any(name in params for name in ('orderBy', 'startAt', 'endAt', 'equalTo', 'limitToFirst', 'limitToLast')):
+                raise QueryError("Mixing shallow with other query parameters is not allowed")
+            if isinstance(node, dict):
+                return {key: True if isinstance(child, dict) else child for key, child in node.items()}
+            return node
+
+        order_by = params.get('orderBy')
+        if order_by is None:
+            if any(name in params for name in ('startAt', 'endAt', 'equalTo', 'limitToFirst', 'limitToLast')):
+                raise QueryError("orderBy must be defined when other query parameters are defined")
+            return _as_arrays(node)
+        if not isinstance(order_by, str):
+            raise QueryError("orderBy must be a valid JSON encoded path")
+        if 'limitToFirst' in params and 'limitToLast' in params:
+            raise QueryError("Only one of limitToFirst and limitToLast can be used")
+        self._check_index(keys, order_by)
+        if not isinstance(node, dict):
+            return node
+
+        if order_by == '$key':
+            rank = key_order
+            bound = lambda value: key_order(str(value))
+        elif order_by == '$value':
+            rank = lambda key: _value_order(node[key])
+            bound = _value_order
+        else:
+            rank = lambda key: _value_order(_child(node[key], order_by))
+            bound = _value_order
+
+        ranked = sorted(node, key=lambda key: (rank(key), key_order(key)))
+        if 'equalTo' in params:
+            ranked = [key for key in ranked if rank(key) == bound(params['equalTo'])]
+        if 'startAt' in params:
+            ranked = [key for key in ranked if rank(key) >= bound(params['startAt'])]
+        if 'endAt' in params:
+            ranked = [key for key in ranked if rank(key) <= bound(params['endAt'])]
+        if 'limitToFirst' in params:
+            ranked = ranked[:int(params['limitToFirst'])]
+        if 'limitToLast' in params:
+            ranked = ranked[-int(params['limitToLast']):] if int(params['limitToLast']) else []
+        return {key: _as_arrays(node[key]) for key in ranked}
+
+    def _check_index(self, keys, order_by):
+        """With rules loaded, orderBy a child (or $value) needs a matching .indexOn, as in Firebase"""
+        if self.indexes is None or order_by == '$key':
+            return
+        wanted = '.value' if order_by == '$value' else order_by
+        for pattern, indexed in self.indexes.items():
+            if len(pattern) == len(keys) and all(p.startswith('$') or p == k for p, k in zip(pattern, keys)):
+                if wanted in indexed:
+                    return
+        raise QueryError(f'Index not defined, add ".indexOn": "{wanted}", for path "/{"/".join(keys)}", to the rules')
+
+    def set(self, path, value):
+        keys = _split(path)
+        with self.lock:
+            value = _normalize(_resolve_server_values(value, self._node(keys)))
+            if not keys:
+                self.root = value if isinstance(value, dict) else {}
+                self._notify(keys, value)
+                return
+            parents = [self.root]
+            node = self.root
+            for key in keys[:-1]:
+                child = node.get(key)
+                if not isinstance(child, dict):
+                    child = {}
+                    node[key] = child
+                node = child
+                parents.append(node)
+            if value is None:
+                node.pop(keys[-1], None)
+            else:
+                node[keys[-1]] = value
+            # Remove parents left empty by a delete
+            for depth in range(len(keys) - 1, 0, -1):
+                if parents[depth]:
+                    break
+                parents[depth - 1].pop(keys[depth - 1], None)
+            self._notify(keys, value)
+
+    def update(self, path, values):
+        """PATCH semantics, including multi-location keys such as 'a/b/c'"""
+        base = path.strip('/')
+        with self.lock:
+            for key, value in values.items():
+                self.set(f"{base}/{key}" if base else key, value)
+
+    def delete(self, path):
+        self.set(path, None)
+
+    # ========== STREAMING ==========
+
+    def subscribe(self, path):
+        """Register a listener; its queue first receives the current value as a put at '/'"""
+        keys = _split(path)
+        events = queue.Queue()
+        with self.lock:
+            events.put(('put', '/', self.get(path)))
+            self.listeners.append((keys, events))
+        return events
+
+    def unsubscribe(self, events):
+        with self.lock:
+            self.listeners = [(keys, q) for keys, q in self.listeners if q is not events]
+
+    def close_streams(self):
+        """Drop every open stream (clients are expected to reconnect and resync)"""
+        with self.lock:
+            for _, events in self.listeners:
+                events.put(None)
+            self.listeners = []
+
+    def _notify(self, keys, value):
+        """Queue a put event for every listener whose location overlaps the written path"""
+        for listen_keys, events in self.listeners:
+            if keys[:len(listen_keys)] == listen_keys:
+                relative = '/' + '/'.join(keys[len(listen_keys):])
+                events.put(('put', relative, json.loads(json.dumps(value))))
+            elif listen_keys[:len(keys)] == keys:
+                events.put(('put', '/', self.get('/'.join(listen_keys))))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Emulate the TCP+TLS handshake paid once per new connection
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def _path(self):
+        path = unquote(urlsplit(self.path).path)
+        if not path.endswith('.json'):
+            return None
+        return path[:-len('.json')]
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw) if raw else None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        db = self.server.db
+        with db.lock:
+            db.request_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        path = self._path()
+        if path is None:
+            self._send(404, {'error': 'Not found'})
+            return
+
+        params = _query_params(self.path)
+        if method == 'GET':
+            if 'text/event-stream' in (self.headers.get('Accept') or ''):
+                self._stream(path)
+                return
+            try:
+                self._send(200, db.query(path, params) if params else db.get(path))
+            except QueryError as e:
+                self._send(400, {'error': str(e)})
+            return
+
+        try:
+            value = self._body()
+        except ValueError:
+            self._send(400, {'error': 'Invalid data; couldn\'t parse JSON object, array, or value.'})
+            return
+        bad_key = _invalid_key(value, top_level=(method == 'PATCH'))
+        if bad_key is None and any(char in key for key in _split(path) for char in FORBIDDEN_KEY_CHARS[:-1]):
+            bad_key = path
+        if bad_key is not None:
+            self._send(400, {'error': f'Invalid data; couldn\'t parse key beginning at "{bad_key}".'})
+            return
+
+        if method == 'PUT':
+            db.set(path, value)
+        elif method == 'PATCH':
+            if not isinstance(value, dict):
+                self._send(400, {'error': 'Invalid data; couldn\'t parse JSON object.'})
+                return
+            db.update(path, value)
+        elif method == 'DELETE':
+            db.delete(path)
+            value = None
+        if params.get('print') == 'silent':
+            self._send_empty(204)
+        else:
+            self._send(200, value)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _stream(self, path):
+        """Server-sent events: an initial put, then put events and keep-alives"""
+        db = self.server.db
+        events = db.subscribe(path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while not self.server.closing:
+                try:
+                    event = events.get(timeout=self.server.keepalive_interval)
+                except queue.Empty:
+                    self.wfile.write(b'event: keep-alive\ndata: null\n\n')
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    break
+                name, relative, data = event
+                payload = json.dumps({'path': relative, 'data': data})
+                self.wfile.write(f'event: {name}\ndata: {payload}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            db.unsubscribe(events)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+class LocalRTDBServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, db=None, latency=0.0, connect_latency=0.0, keepalive_interval=30.0):
+        super().__init__(address, _Handler)
+        self.db = db or LocalRTDB()
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.keepalive_interval = keepalive_interval
+        self.closing = False
+
+    def shutdown(self):
+        self.closing = True
+        self.db.close_streams()
+        super().shutdown()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_local_rtdb(data=None, latency=0.0, connect_latency=0.0, keepalive_interval=30.0,
+                     host='127.0.0.1', port=0, rules=None):
+    """Start a stand-in server on a background thread and return it"""
+    server = LocalRTDBServer((host, port), LocalRTDB(data, rules), latency, connect_latency, keepalive_interval)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _load_json(path):
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve an in-memory Firebase RTDB stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="delay added to every request")
+    parser.add_argument('--connect-latency-ms', type=float, default=0.0, help="delay added to every new connection")
+    parser.add_argument('--data', help="JSON file to load as the initial database")
+    parser.add_argument('--rules', help="database.rules.json whose .indexOn entries are enforced")
+    parser.add_argument('--save', help="write the database to this JSON file on exit")
+    args = parser.parse_args(argv)
+
+    server = LocalRTDBServer((args.host, args.port), LocalRTDB(_load_json(args.data), _load_json(args.rules)),
+                             args.latency_ms / 1000, args.connect_latency_ms / 1000)
+    print(f"Local RTDB listening on {server.url}")
+    print(f"  FIREBASE_DATABASE_URL={server.url} python app.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.save:
+            with open(args.save, 'w') as f:
+                json.dump(server.db.root, f)
+            print(f"Saved database to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
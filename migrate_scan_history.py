@@ -0,0 +1,46 @@
+"""
+Move scan history out of the user records. Older versions kept it as a map under
+users/<user_id>/scanned_history/<product_id>, so every read of a user downloaded
+their whole history. Each user's newest SCAN_HISTORY_LIMIT entries are copied into
+their scan_history/<user_id> log (see scan_history.py) and the old map is removed.
+
+Users are read a page at a time (see migrations.py). Progress is checkpointed to
+.migration-migrate_scan_history.json, so an interrupted run picks up where it
+stopped; entry keys are derived from the old scan times, so re-running is safe.
+
+Usage:
+  python migrate_scan_history.py --dry-run   # report how many entries would move
+  python migrate_scan_history.py [--page-size N] [--restart]
+"""
+
+import argparse
+import functools
+import sys
+import config
+import firebase_service
+from migrations import DEFAULT_PAGE_SIZE, run_migration
+from scan_history import migrate_user
+
+MIGRATION_NAME = "migrate_scan_history"
+
+def migrate_all_history(firebase, dry_run=False, page_size=DEFAULT_PAGE_SIZE, keep=config.SCAN_HISTORY_LIMIT,
+                        restart=False, checkpoint=None):
+    print("Moving scan history to scan_history/" + (" (dry run)" if dry_run else "") + "...")
+    state = run_migration(firebase, MIGRATION_NAME, functools.partial(migrate_user, keep=keep), node='users',
+                          page_size=page_size, checkpoint=checkpoint, restart=restart, dry_run=dry_run)
+
+    print(f"Users scanned: {state['records']}")
+    print(f"Patches:       {state['patches']} (entries moved plus one removal per user)")
+    print(f"Bytes read:    {state['bytes_read']}")
+    print(f"Elapsed:       {state['seconds']}s")
+    if not dry_run:
+        print("Migration Complete.")
+    return state['patches']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move users/<id>/scanned_history into scan_history/<id>")
+    parser.add_argument('--dry-run', action='store_true', help="report what would move without writing")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="users per read")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and start from the first user")
+    args = parser.parse_args(sys.argv[1:])
+    migrate_all_history(firebase_service.FirebaseService(), args.dry_run, args.page_size, restart=args.restart)
@@ -0,0 +1,143 @@
+"""
+Migrations Module
+Runs a data migration over every child of a node (stores by default) page by page:
+each page is fetched with one keyed range query, handed to a migrate function
+(optionally in a process pool), and the resulting field patches are written with
+chunked multi-location PATCHes. Progress is checkpointed to a local file after
+every page, so an interrupted run resumes where it stopped.
+
+A migrate function is a module-level function (key, value) -> {path: value}
+returning root-relative patches. It must be idempotent: the page being processed
+when a run is interrupted is migrated again on resume.
+"""
+
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from firebase_service import key_order
+
+DEFAULT_PAGE_SIZE = 100
+
+
+# ========== CHECKPOINTS ==========
+
+def checkpoint_path(name):
+    return f".migration-{name}.json"
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    """Write through a temp file and rename, so a crash never leaves a torn checkpoint"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# ========== PAGING ==========
+
+def fetch_page(firebase, node, start_after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return ([(key, value)] in key order, response bytes) for up to `limit` children
+    of node whose keys sort after start_after
+    """
+    params = {'orderBy': '"$key"', 'limitToFirst': limit + (1 if start_after is not None else 0)}
+    if start_after is not None:
+        params['startAt'] = json.dumps(start_after)
+    response = firebase.http.get(firebase._get_url(node), params=params)
+    response.raise_for_status()
+    children = response.json() or {}
+    if isinstance(children, list):
+        children = {str(index): value for index, value in enumerate(children) if value is not None}
+    # In Firebase's $key order (integer-like keys numerically), the order the pages were queried in
+    items = [(key, children[key]) for key in sorted(children, key=key_order) if key != start_after]
+    return items[:limit], len(response.content)
+
+
+def _migrate_chunk(migrate, items):
+    patches = {}
+    for key, value in items:
+        patches.update(migrate(key, value) or {})
+    return patches
+
+
+def _map_page(migrate, items, pool, workers):
+    if pool is None:
+        return _migrate_chunk(migrate, items)
+    size = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    patches = {}
+    for chunk_patches in pool.map(_migrate_chunk, [migrate] * len(chunks), chunks):
+        patches.update(chunk_patches)
+    return patches
+
+
+# ========== RUNNER ==========
+
+def run_migration(firebase, name, migrate, node='stores', page_size=DEFAULT_PAGE_SIZE, workers=0,
+                  write_workers=4, checkpoint=None, restart=False, dry_run=False, log=print):
+    """
+    Apply migrate to every child of node. Returns the final progress dict
+    (records, patches, bytes_read, bytes_written, seconds, done).
+    """
+    checkpoint = checkpoint or checkpoint_path(name)
+    state = None if (restart or dry_run) else load_checkpoint(checkpoint)
+    if state and state.get('done'):
+        log(f"{name}: already complete ({checkpoint}); use --restart to run again")
+        return state
+    if state:
+        log(f"{name}: resuming after {state['last_key']} ({state['records']} records done)")
+    state = state or {'name': name, 'last_key': None, 'records': 0, 'patches': 0,
+                      'bytes_read': 0, 'bytes_written': 0, 'seconds': 0.0, 'done': False}
+
+    start = time.perf_counter()
+    elapsed_before = state['seconds']
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) if workers > 0 else None
+    try:
+        while True:
+            items, bytes_read = fetch_page(firebase, node, state['last_key'], page_size)
+            if not items:
+                break
+            patches = _map_page(migrate, items, pool, workers)
+            if patches and not dry_run:
+                firebase.update_paths_chunked(patches, write_workers)
+
+            state['last_key'] = items[-1][0]
+            state['records'] += len(items)
+            state['patches'] += len(patches)
+            state['bytes_read'] += bytes_read
+            state['bytes_written'] += sum(len(json.dumps(value)) + len(path) for path, value in patches.items())
+            state['seconds'] = round(elapsed_before + time.perf_counter() - start, 3)
+            if not dry_run:
+                save_checkpoint(checkpoint, state)
+            log(format_progress(state))
+            if len(items) < page_size:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    state['done'] = True
+    if not dry_run:
+        save_checkpoint(checkpoint, state)
+        if firebase.cache is not None:
+            firebase.cache.clear()
+    return state
+
+
+def format_progress(state):
+    seconds = max(state['seconds'], 1e-9)
+    return (f"  {state['records']:>8} records  {state['patches']:>8} patches  "
+            f"{state['records'] / seconds:>8.0f} records/s  {state['bytes_read'] / seconds / 1e6:>6.1f} MB/s read")
@@ -1,13 +1,7 @@
 
-import uuid
 import random
-from datetime import datetime
 from firebase_service import FirebaseService
-from qr_generator import QRGenerator
-
-# Initialize services
-firebase = FirebaseService()
-qr_gen = QRGenerator()
+from seed_engine import print_summary, seed
 
 # Data Constants
 CATEGORIES = [
@@ -66,11 +60,11 @@ PRODUCT_TEMPLATES = {
     ]
 }
 
-def generate_store_name(category):
-    adj = random.choice(ADJECTIVES)
-    loc = random.choice(LOCATIONS)
+def generate_store_name(category, rng=random):
+    adj = rng.choice(ADJECTIVES)
+    loc = rng.choice(LOCATIONS)
     # 30% chance of including category in name
-    if random.random() < 0.3:
+    if rng.random() < 0.3:
         return f"{adj} {category} {loc}"
     else:
         # Use generic names related to category
@@ -83,70 +77,32 @@ def generate_store_name(category):
         else:
             return f"{adj} {loc}"
 
-def populate_database(num_stores=50):
+def generate_store_specs(num_stores, products_per_store=None, rng=random):
+    """Random stores for seed_engine; products_per_store defaults to 3-5 per store"""
+    specs = []
+    for i in range(num_stores):
+        category = rng.choice(list(PRODUCT_TEMPLATES.keys()))
+        store_name = generate_store_name(category, rng)
+        templates = rng.sample(PRODUCT_TEMPLATES[category], len(PRODUCT_TEMPLATES[category]))
+        specs.append({
+            'name': store_name,
+            'category': category,
+            'description': f"Best place for {category.lower()} and more. Quality guaranteed at {store_name}.",
+            'products': templates,
+            'product_count': products_per_store or min(len(templates), rng.randint(3, 5))
+        })
+    return specs
+
+def populate_database(num_stores=50, products_per_store=None, customers=0, orders=0):
     print(f"🚀 Starting database population with {num_stores} stores...")
     
-    created_count = 0
-    
-    for i in range(num_stores):
-        try:
-            # 1. Create Store Owner Profile (Simulated)
-            owner_id = str(uuid.uuid4())
-            owner_email = f"owner_{i+1}@example.com"
-            firebase.create_user(owner_id, owner_email, "store_owner")
-            
-            # 2. Pick Category and Name
-            category = random.choice(list(PRODUCT_TEMPLATES.keys()))
-            store_name = generate_store_name(category)
-            
-            # 3. Create Store
-            store_id = str(uuid.uuid4())
-            store_data = {
-                'name': store_name,
-                'owner_id': owner_id,
-                'description': f"Best place for {category.lower()} and more. Quality guaranteed at {store_name}.",
-                'category': category,
-                'created_at': datetime.now().isoformat(),
-                'products': {}
-            }
-            firebase.create_store(store_id, store_data)
-            
-            # 4. Add Products to Store
-            # Pick 3-5 random products from the category template
-            num_products = random.randint(3, 5)
-            products = random.sample(PRODUCT_TEMPLATES[category], min(len(PRODUCT_TEMPLATES[category]), num_products))
-            
-            for prod in products:
-                product_id = str(uuid.uuid4())
-                
-                # Generate QR
-                qr_path = qr_gen.generate_product_qr(store_id, product_id)
-                
-                product_data = {
-                    'id': product_id,
-                    'name': prod['name'],
-                    'price': prod['price'],
-                    'size': random.choice(['S', 'M', 'L', 'One Size']),
-                    'color': random.choice(['Black', 'White', 'Blue', 'Red', 'Green']),
-                    'description': f"High quality {prod['name'].lower()} from {store_name}",
-                    'stock': random.randint(10, 100),
-                    'image': prod['image'],
-                    'qr_code': qr_path,
-                    'scan_count': random.randint(0, 50), # Simulate existing engagement
-                    'created_at': datetime.now().isoformat()
-                }
-                
-                firebase.add_product(store_id, product_id, product_data)
-            
-            created_count += 1
-            print(f"✅ Created store {i+1}/{num_stores}: {store_name} ({category})")
-            
-        except Exception as e:
-            print(f"❌ Error creating store {i+1}: {e}")
+    summary = seed(FirebaseService(), generate_store_specs(num_stores, products_per_store), customers, orders)
+    print_summary(summary)
 
     print("\n" + "="*50)
-    print(f"🎉 Metadata Population Complete! Created {created_count} stores.")
+    print(f"🎉 Metadata Population Complete! Created {summary['stores']} stores.")
     print("="*50)
 
 if __name__ == "__main__":
+    # Larger datasets: python seed_engine.py --stores 10000 --products 20 ...
     populate_database(50)
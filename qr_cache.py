@@ -0,0 +1,186 @@
+"""
+QR Cache Module
+Renders product QR code PNGs once and serves them from an in-memory LRU, backed by
+an optional on-disk cache shared by every worker process
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+# Render parameters of /api/qr-code; callers may override box_size and border
+DEFAULT_PARAMS = {
+    'version': 1,
+    'error_correction': 'L',
+    'box_size': 10,
+    'border': 4,
+    'fill_color': 'black',
+    'back_color': 'white',
+}
+PARAM_LIMITS = {'box_size': (1, 40), 'border': (0, 10)}
+
+
+def render_params(overrides=None):
+    """Merge validated overrides into DEFAULT_PARAMS; raises ValueError for bad values"""
+    params = dict(DEFAULT_PARAMS)
+    for name, value in (overrides or {}).items():
+        if name not in PARAM_LIMITS:
+            raise ValueError(f"unknown QR parameter: {name}")
+        low, high = PARAM_LIMITS[name]
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer")
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}")
+        params[name] = value
+    return params
+
+
+def _renderer_version():
+    try:
+        from importlib.metadata import version
+        return version('qrcode')
+    except Exception:
+        return 'unknown'
+
+
+RENDERER_VERSION = _renderer_version()
+
+
+def cache_key(data, params):
+    """Content key of a rendered QR: the encoded data, render parameters and qrcode version"""
+    material = '|'.join([RENDERER_VERSION, data] + [f"{name}={params[name]}" for name in sorted(params)])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def build_qr_image(data, params=None):
+    """Build the QR matrix as a PIL image"""
+    import qrcode
+
+    params = params or DEFAULT_PARAMS
+    qr = qrcode.QRCode(
+        version=params['version'],
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{params['error_correction']}"),
+        box_size=params['box_size'],
+        border=params['border'],
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.make_image(fill_color=params['fill_color'], back_color=params['back_color']).get_image()
+
+
+def render_qr_png(data, params):
+    """Build the QR matrix and encode it as PNG bytes"""
+    img = build_qr_image(data, params)
+
+    buf = BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+class QRImageCache:
+    """
+    Thread-safe PNG cache keyed by cache_key(). Lookups go memory -> disk -> render.
+    The key doubles as a strong ETag: the same key always yields the same image.
+    """
+
+    def __init__(self, max_items=512, disk_dir=None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.evictions = 0
+        self.disk_errors = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, data, params=None):
+        """Return (png_bytes, key) for data rendered with params"""
+        params = params or DEFAULT_PARAMS
+        key = cache_key(data, params)
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png, key
+
+        png = self._read_disk(key)
+        if png is not None:
+            self._count('disk_hits')
+        else:
+            png = render_qr_png(data, params)
+            self._count('renders')
+            self._write_disk(key, png)
+        self._remember(key, png)
+        return png, key
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _remember(self, key, png):
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._entries[key] = png
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # ========== DISK ==========
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.png")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self._count('disk_errors')
+            return None
+
+    def _write_disk(self, key, png):
+        """Write through a temp file and rename, so other processes never see a partial PNG"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._count('disk_errors')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_items': self.max_items,
+                'bytes': sum(len(png) for png in self._entries.values()),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'renders': self.renders,
+                'evictions': self.evictions,
+                'disk_errors': self.disk_errors,
+                'disk_dir': self.disk_dir,
+            }
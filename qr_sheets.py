@@ -0,0 +1,236 @@
+"""
+QR Sheets Module
+Renders every product QR of a store into one printable label sheet, either a paged
+PDF or a tiled PNG. Pages/strips are rendered in a process pool and written out as
+they complete, so memory stays bounded by a few pages however large the store is.
+"""
+
+import atexit
+import struct
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from PIL import Image, ImageDraw, ImageFont
+
+from qr_cache import build_qr_image
+
+# A4 at 150 dpi, 4 x 6 labels per page
+PAGE_SIZE = (1240, 1754)
+PAGE_SIZE_PT = (595.28, 841.89)
+PAGE_MARGIN = 60
+PAGE_GRID = (4, 6)
+LABEL_SIZE = ((PAGE_SIZE[0] - 2 * PAGE_MARGIN) // PAGE_GRID[0], (PAGE_SIZE[1] - 2 * PAGE_MARGIN) // PAGE_GRID[1])
+QR_SIZE = 200
+PNG_COLUMNS = 6
+PNG_STRIP_ROWS = 4
+MAX_CAPTION = 28
+
+FORMATS = {
+    'pdf': ('application/pdf', 'pdf'),
+    'png': ('image/png', 'png'),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Process pool shared by all sheet requests of this process (spawned, so it is safe
+    to create from a threaded server)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def sheet_labels(products):
+    """(product_id, caption lines) for every product, in name order"""
+    labels = []
+    products = {product_id: product for product_id, product in (products if isinstance(products, dict) else {}).items()
+                if isinstance(product, dict)}
+    for product_id, product in sorted(products.items(), key=lambda item: str(item[1].get('name', '')).lower()):
+        name = str(product.get('name', 'Unknown'))
+        if len(name) > MAX_CAPTION:
+            name = name[:MAX_CAPTION - 3] + '...'
+        price = product.get('price')
+        labels.append((product_id, [name, f"Rs. {price}" if price is not None else '']))
+    return labels
+
+
+# ========== RENDERING (runs in worker processes) ==========
+
+_font = None
+
+
+def _caption_font():
+    global _font
+    if _font is None:
+        try:
+            _font = ImageFont.load_default(size=18)
+        except TypeError:
+            # Pillow < 10.1 only has the fixed-size bitmap font
+            _font = ImageFont.load_default()
+    return _font
+
+
+def _drawable(line, font):
+    """The bitmap fallback font only covers Latin-1; other characters become '?'"""
+    if isinstance(font, ImageFont.FreeTypeFont):
+        return line
+    return line.encode('latin-1', errors='replace').decode('latin-1')
+
+
+def render_grid(labels, columns, rows, size, margin=0):
+    """Render up to columns x rows labels onto one grayscale image"""
+    width, height = size
+    image = Image.new('L', size, 255)
+    draw = ImageDraw.Draw(image)
+    label_w = (width - 2 * margin) // columns
+    label_h = (height - 2 * margin) // rows
+    font = _caption_font()
+
+    for index, (product_id, caption) in enumerate(labels):
+        x = margin + (index % columns) * label_w
+        y = margin + (index // columns) * label_h
+        qr = build_qr_image(product_id).convert('L').resize((QR_SIZE, QR_SIZE), Image.NEAREST)
+        image.paste(qr, (x + (label_w - QR_SIZE) // 2, y + 8))
+        for line_no, line in enumerate(caption):
+            line = _drawable(line, font)
+            text_w = draw.textlength(line, font=font)
+            draw.text((x + (label_w - text_w) / 2, y + QR_SIZE + 14 + line_no * 24), line, fill=0, font=font)
+        draw.rectangle([x, y, x + label_w - 1, y + label_h - 1], outline=200)
+    return image
+
+
+def render_pdf_page(labels):
+    """One A4 page, Flate-compressed grayscale pixels ready for the PDF writer"""
+    image = render_grid(labels, PAGE_GRID[0], PAGE_GRID[1], PAGE_SIZE, PAGE_MARGIN)
+    return zlib.compress(image.tobytes(), 6)
+
+
+def render_png_strip(labels):
+    """PNG_STRIP_ROWS rows of PNG_COLUMNS labels as raw grayscale pixels"""
+    rows = -(-len(labels) // PNG_COLUMNS)
+    size = (PNG_COLUMNS * LABEL_SIZE[0], rows * LABEL_SIZE[1])
+    return render_grid(labels, PNG_COLUMNS, rows, size).tobytes()
+
+
+# ========== STREAMING ==========
+
+def _bounded_map(fn, chunks, workers):
+    """Like pool.map, but with at most 2 x workers chunks in flight; workers=0 runs inline"""
+    if not workers:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+    pool = get_pool(workers)
+    pending = deque()
+    chunks = iter(chunks)
+    for chunk in chunks:
+        pending.append(pool.submit(fn, chunk))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def pdf_sheet(labels, workers=0):
+    """Yield a PDF with one A4 page per 24 labels"""
+    writer = _PDFWriter()
+    yield writer.header()
+    per_page = PAGE_GRID[0] * PAGE_GRID[1]
+    for compressed in _bounded_map(render_pdf_page, _chunks(labels, per_page), workers):
+        yield writer.page(compressed)
+    yield writer.trailer()
+
+
+def png_sheet(labels, workers=0):
+    """Yield one tall PNG with PNG_COLUMNS labels per row"""
+    width = PNG_COLUMNS * LABEL_SIZE[0]
+    height = -(-len(labels) // PNG_COLUMNS) * LABEL_SIZE[1]
+    yield b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+
+    compressor = zlib.compressobj(6)
+    for pixels in _bounded_map(render_png_strip, _chunks(labels, PNG_COLUMNS * PNG_STRIP_ROWS), workers):
+        # Every scanline starts with filter type 0 (None)
+        scanlines = b''.join(b'\x00' + pixels[i:i + width] for i in range(0, len(pixels), width))
+        data = compressor.compress(scanlines)
+        if data:
+            yield _png_chunk(b'IDAT', data)
+    yield _png_chunk(b'IDAT', compressor.flush()) + _png_chunk(b'IEND', b'')
+
+
+def render_sheet(products, fmt='pdf', workers=0):
+    """
+    Stream a label sheet for {product_id: product} in the given format.
+    Raises ValueError when there is no product to label (an empty sheet is not a valid PNG)
+    """
+    labels = sheet_labels(products)
+    if not labels:
+        raise ValueError("No products to print")
+    return pdf_sheet(labels, workers) if fmt == 'pdf' else png_sheet(labels, workers)
+
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+
+class _PDFWriter:
+    """
+    Minimal streaming PDF writer for full-page images. Objects are emitted as pages
+    arrive; the catalog (1), page tree (2) and xref table are written at the end.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.offsets = {}
+        self.next_id = 3
+        self.page_ids = []
+
+    def _emit(self, data):
+        self.offset += len(data)
+        return data
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.offset
+        return self._emit(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def header(self):
+        return self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def page(self, compressed):
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+        width, height = PAGE_SIZE
+        out = self._object(image_id, (
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (width, height, len(compressed))
+        ) + compressed + b"\nendstream")
+        content = b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % PAGE_SIZE_PT
+        out += self._object(content_id, b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        out += self._object(page_id, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] " % PAGE_SIZE_PT +
+            b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>" % (image_id, content_id)
+        ))
+        self.page_ids.append(page_id)
+        return out
+
+    def trailer(self):
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        out = self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        out += self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref_offset = self.offset
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id
+        out += b"".join(b"%010d 00000 n \n" % self.offsets[obj_id] for obj_id in range(1, self.next_id))
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, xref_offset)
+        return out
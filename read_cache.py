@@ -0,0 +1,104 @@
+"""
+Read Cache Module
+In-process read-through cache (LRU bounded, per-entity TTL) used by FirebaseService
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by get() on a miss, so cached None (a missing Firebase node) is still a hit
+MISSING = object()
+
+DEFAULT_TTL = 30.0
+
+
+class ReadCache:
+    """
+    Thread-safe LRU cache with per-entity TTLs.
+    Keys are tuples whose first element names the entity ('store', 'product', ...),
+    which selects the TTL and lets invalidate_prefix() drop related entries.
+    """
+
+    def __init__(self, max_size=1024, ttls=None, default_ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, copy_value=True):
+        """
+        Return a copy of the cached value, or MISSING. With copy_value=False the shared
+        cached object is returned; the caller must not modify it
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value) if copy_value else value
+
+    def set(self, key, value, ttl=None):
+        """Store a copy of value, evicting the least recently used entries when full"""
+        if ttl is None:
+            ttl = self.ttls.get(key[0], self.default_ttl)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        """Drop specific entries"""
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def invalidate_prefix(self, prefix):
+        """Drop every entry whose key starts with prefix, e.g. ('product', store_id)"""
+        size = len(prefix)
+        with self._lock:
+            stale = [key for key in self._entries if key[:size] == prefix]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
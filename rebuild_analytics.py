@@ -0,0 +1,56 @@
+"""
+Rebuild or verify the analytics rollups the app maintains at write time:
+  analytics/<store_id>   -> {total_orders, most_scanned, most_requested}
+  scan_counts/<store_id> -> {product_id: scans}
+
+Run once after upgrading (stores that predate the rollups show empty analytics
+until then) and whenever the rollups may have drifted, e.g. after manual edits.
+
+Usage:
+  python rebuild_analytics.py           # rewrite missing/stale entries, drop orphans
+  python rebuild_analytics.py --verify  # report differences only
+"""
+
+import sys
+from firebase_service import FirebaseService, build_store_analytics
+from rebuild_indexes import rebuild_index
+
+def expected_analytics(stores, requests_data):
+    """Compute store_id -> rollup from the raw stores and requests trees"""
+    stores = stores if isinstance(stores, dict) else {}
+    requests_data = requests_data if isinstance(requests_data, dict) else {}
+    expected = {}
+    for store_id in set(stores) | set(requests_data):
+        store_data = stores.get(store_id)
+        store_data = store_data if isinstance(store_data, dict) else {}
+        rollup = build_store_analytics(
+            store_data.get('products'), requests_data.get(store_id), store_data.get('orders'))
+        # Firebase does not store empty lists
+        expected[store_id] = {key: value for key, value in rollup.items() if value != []}
+    return expected
+
+def expected_scan_counts(stores):
+    """Compute store_id -> {product_id: scan_count} for scanned products"""
+    expected = {}
+    if not isinstance(stores, dict):
+        return expected
+    for store_id, store_data in stores.items():
+        if not isinstance(store_data, dict) or not isinstance(store_data.get('products'), dict):
+            continue
+        counts = {product_id: product['scan_count']
+                  for product_id, product in store_data['products'].items()
+                  if isinstance(product, dict) and product.get('scan_count', 0) > 0}
+        if counts:
+            expected[store_id] = counts
+    return expected
+
+def rebuild_analytics(firebase, verify_only=False):
+    stores = firebase.get_all_stores()
+    requests_data = firebase.http.get(firebase._get_url("requests")).json()
+    ok = rebuild_index(firebase, "scan_counts", expected_scan_counts(stores), verify_only)
+    ok = rebuild_index(firebase, "analytics", expected_analytics(stores, requests_data), verify_only) and ok
+    return ok
+
+if __name__ == "__main__":
+    ok = rebuild_analytics(FirebaseService(), verify_only='--verify' in sys.argv)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,91 @@
+"""
+Rebuild or verify the secondary index nodes derived from the stores tree:
+  product_index/<product_id> -> store_id
+  owner_index/<owner_id>     -> store_id
+  store_summaries/<store_id> -> {name, description, ...}
+
+Usage:
+  python rebuild_indexes.py           # rewrite missing/stale entries, drop orphans
+  python rebuild_indexes.py --verify  # report differences only
+"""
+
+import sys
+from firebase_service import FirebaseService, store_summary
+
+CHUNK_SIZE = 500
+
+def expected_product_index(stores):
+    """Compute product_id -> store_id from the stores tree"""
+    index = {}
+    if not isinstance(stores, dict):
+        return index
+    for store_id, store_data in stores.items():
+        if not isinstance(store_data, dict):
+            continue
+        products = store_data.get('products', {})
+        if not isinstance(products, dict):
+            continue
+        for product_id in products:
+            index[product_id] = store_id
+    return index
+
+def expected_owner_index(stores):
+    """Compute owner_id -> store_id. The first store (in key order) wins, like the old scan."""
+    index = {}
+    if not isinstance(stores, dict):
+        return index
+    for store_id in sorted(stores):
+        store_data = stores[store_id]
+        if not isinstance(store_data, dict) or not store_data.get('owner_id'):
+            continue
+        index.setdefault(store_data['owner_id'], store_id)
+    return index
+
+def expected_store_summaries(stores):
+    """Compute store_id -> summary fields"""
+    if not isinstance(stores, dict):
+        return {}
+    return {store_id: store_summary(store_data)
+            for store_id, store_data in stores.items() if isinstance(store_data, dict)}
+
+def diff_index(expected, current):
+    """Return (missing, stale, orphaned) keys"""
+    current = current if isinstance(current, dict) else {}
+    missing = [key for key in expected if key not in current]
+    stale = [key for key in expected if key in current and current[key] != expected[key]]
+    orphaned = [key for key in current if key not in expected]
+    return missing, stale, orphaned
+
+def rebuild_index(firebase, node, expected, verify_only=False):
+    """Compare one index node with its expected contents and optionally repair it"""
+    current = firebase.http.get(firebase._get_url(node)).json()
+    missing, stale, orphaned = diff_index(expected, current)
+
+    print(f"/{node}")
+    print(f"  Expected entries: {len(expected)}")
+    print(f"  Missing entries:  {len(missing)}")
+    print(f"  Stale entries:    {len(stale)}")
+    print(f"  Orphaned entries: {len(orphaned)}")
+
+    if verify_only:
+        return not (missing or stale or orphaned)
+
+    updates = {key: expected[key] for key in missing + stale}
+    updates.update({key: None for key in orphaned})
+    items = list(updates.items())
+    for start in range(0, len(items), CHUNK_SIZE):
+        firebase.http.patch(firebase._get_url(node), json=dict(items[start:start + CHUNK_SIZE]))
+
+    print(f"  Rewrote {len(items)} entries.")
+    return True
+
+def rebuild_indexes(firebase, verify_only=False):
+    stores = firebase.get_all_stores()
+    ok = rebuild_index(firebase, "product_index", expected_product_index(stores), verify_only)
+    ok = rebuild_index(firebase, "owner_index", expected_owner_index(stores), verify_only) and ok
+    ok = rebuild_index(firebase, "store_summaries", expected_store_summaries(stores), verify_only) and ok
+    return ok
+
+if __name__ == "__main__":
+    ok = rebuild_indexes(FirebaseService(), verify_only='--verify' in sys.argv)
+    sys.exit(0 if ok else 1)
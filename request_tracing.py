@@ -0,0 +1,202 @@
+"""
+Request Tracing Module
+Records every Firebase REST call (method, path template, bytes, duration) under the
+request that made it, and aggregates requests and calls per route for the
+Prometheus-style /metrics endpoint and the optional Server-Timing header
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from urllib.parse import unquote, urlsplit
+
+import config
+
+# Route label for calls made outside a request (background tasks, scan flushes)
+BACKGROUND_ROUTE = '(background)'
+
+# Upper bounds of the request duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Node names of the database schema, kept in path templates. Every other segment (ids,
+# product request names, bucket keys) becomes {id}, so /metrics label values stay bounded.
+SCHEMA_NODES = frozenset((
+    # top-level nodes
+    'stores', 'users', 'orders', 'email_index', 'product_index', 'owner_index', 'store_summaries',
+    'requests', 'scan_counts', 'analytics', 'analytics_buckets', 'scan_history',
+    # children read or written by path
+    'products', 'name', 'scan_count', 'cart', 'scanned_history', 'count',
+    'total_orders', 'most_scanned', 'most_requested',
+    # analytics bucket granularities and metrics
+    'h', 'd', 's', 'u', 'r', 'o',
+))
+
+_current = ContextVar('request_trace', default=None)
+
+
+def path_template(url):
+    """'https://db/stores/8f3a.../products/9c1b.../name.json' -> 'stores/{id}/products/{id}/name'"""
+    path = unquote(urlsplit(url).path)
+    if path.endswith('.json'):
+        path = path[:-len('.json')]
+    segments = [segment if segment in SCHEMA_NODES else '{id}' for segment in path.strip('/').split('/') if segment]
+    return '/'.join(segments) or '/'
+
+
+class RequestTrace:
+    """Backend calls made while serving one request"""
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.start = time.perf_counter()
+        self.calls = 0
+        self.backend_seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds, sent, received):
+        # Concurrent fan-out calls of one request may finish on other threads
+        with self._lock:
+            self.calls += 1
+            self.backend_seconds += seconds
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def server_timing(self):
+        """Server-Timing header value: backend time and total time in ms"""
+        total_ms = (time.perf_counter() - self.start) * 1000
+        size_kb = (self.bytes_sent + self.bytes_received) / 1024
+        return (f'db;dur={self.backend_seconds * 1000:.1f};desc="{self.calls} calls, {size_kb:.1f} KB", '
+                f'app;dur={total_ms:.1f}')
+
+
+def start_trace(route, method):
+    """Begin tracing the current request; returns a token for finish_trace"""
+    return _current.set(RequestTrace(route, method))
+
+
+def current_trace():
+    return _current.get()
+
+
+def finish_trace(token):
+    _current.reset(token)
+
+
+class Metrics:
+    """Thread-safe per-route counters, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)                   # (route, method, status) -> count
+        self.durations = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))  # (route, method) -> buckets
+        self.duration_sums = defaultdict(float)            # (route, method) -> seconds
+        self.route_backend = defaultdict(lambda: [0, 0.0, 0, 0])  # (route, method) -> calls, seconds, sent, received
+        self.calls = defaultdict(lambda: [0, 0.0, 0, 0])   # (route, method, path, status) -> count, seconds, sent, received
+
+    def observe_request(self, trace, status):
+        key = (trace.route, trace.method)
+        seconds = time.perf_counter() - trace.start
+        bucket = next((i for i, bound in enumerate(DURATION_BUCKETS) if seconds <= bound), len(DURATION_BUCKETS))
+        with self._lock:
+            self.requests[(trace.route, trace.method, str(status))] += 1
+            self.durations[key][bucket] += 1
+            self.duration_sums[key] += seconds
+            totals = self.route_backend[key]
+            totals[0] += trace.calls
+            totals[1] += trace.backend_seconds
+            totals[2] += trace.bytes_sent
+            totals[3] += trace.bytes_received
+
+    def observe_call(self, route, method, path, status, seconds, sent, received):
+        with self._lock:
+            totals = self.calls[(route, method, path, str(status))]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += sent
+            totals[3] += received
+
+    def summary(self):
+        """{route method: {requests, backend_calls, backend_seconds, bytes}} per route"""
+        with self._lock:
+            counts = defaultdict(int)
+            for (route, method, _), count in self.requests.items():
+                counts[(route, method)] += count
+            return {f"{method} {route}": {
+                'requests': counts[(route, method)],
+                'backend_calls': calls,
+                'backend_seconds': round(seconds, 4),
+                'bytes_sent': sent,
+                'bytes_received': received,
+            } for (route, method), (calls, seconds, sent, received) in sorted(self.route_backend.items())}
+
+    def render(self):
+        """Prometheus text exposition of every counter"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family('app_requests_total', 'counter', 'Requests served, by route, method and status.')
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f"app_requests_total{_labels(route=route, method=method, status=status)} {count}")
+
+            family('app_request_duration_seconds', 'histogram', 'Request duration, by route and method.')
+            for (route, method), buckets in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ('+Inf',), buckets):
+                    cumulative += count
+                    lines.append(f"app_request_duration_seconds_bucket"
+                                 f"{_labels(route=route, method=method, le=str(bound))} {cumulative}")
+                lines.append(f"app_request_duration_seconds_sum{_labels(route=route, method=method)} "
+                             f"{self.duration_sums[(route, method)]:.6f}")
+                lines.append(f"app_request_duration_seconds_count{_labels(route=route, method=method)} {cumulative}")
+
+            family('app_request_backend_calls_total', 'counter', 'Firebase calls made while serving requests.')
+            family('app_request_backend_seconds_total', 'counter', 'Time spent in Firebase calls while serving requests.')
+            family('app_request_backend_bytes_total', 'counter', 'Firebase payload bytes while serving requests.')
+            for (route, method), (calls, seconds, sent, received) in sorted(self.route_backend.items()):
+                labels = _labels(route=route, method=method)
+                lines.append(f"app_request_backend_calls_total{labels} {calls}")
+                lines.append(f"app_request_backend_seconds_total{labels} {seconds:.6f}")
+                lines.append(f"app_request_backend_bytes_total{_labels(route=route, method=method, direction='sent')} {sent}")
+                lines.append(f"app_request_backend_bytes_total"
+                             f"{_labels(route=route, method=method, direction='received')} {received}")
+
+            family('firebase_calls_total', 'counter', 'Firebase REST calls, by calling route, method, path template and status.')
+            family('firebase_call_seconds_total', 'counter', 'Time spent in Firebase REST calls.')
+            family('firebase_call_bytes_total', 'counter', 'Firebase REST payload bytes.')
+            for (route, method, path, status), (count, seconds, sent, received) in sorted(self.calls.items()):
+                labels = _labels(route=route, method=method, path=path, status=status)
+                lines.append(f"firebase_calls_total{labels} {count}")
+                lines.append(f"firebase_call_seconds_total{labels} {seconds:.6f}")
+                lines.append(f"firebase_call_bytes_total"
+                             f"{_labels(route=route, method=method, path=path, status=status, direction='sent')} {sent}")
+                lines.append(f"firebase_call_bytes_total"
+                             f"{_labels(route=route, method=method, path=path, status=status, direction='received')} {received}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+# Process-wide registry fed by the Firebase clients
+metrics = Metrics()
+
+
+def record_call(method, url, status, seconds, sent=0, received=0):
+    """Called by the Firebase clients after every REST call"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(seconds, sent, received)
+    if config.METRICS_ENABLED:
+        metrics.observe_call(trace.route if trace else BACKGROUND_ROUTE, method, path_template(url),
+                             status, seconds, sent, received)
@@ -1,13 +1,12 @@
-
 import firebase_service
-import requests
 import sys
+from bulk_maintenance import ROOT_NODES, delete_paths, report, reset_paths
 
-def reset_database():
+def reset_database(dry_run=False):
     print("⚠️  WARNING: This will DELETE ALL DATA from the database.")
-    print("Nodes to be deleted: users, stores, orders, requests, customers")
+    print(f"Nodes to be deleted: {', '.join(ROOT_NODES)}")
     
-    confirm = input("Are you sure you want to proceed? (yes/no): ")
+    confirm = 'yes' if dry_run else input("Are you sure you want to proceed? (yes/no): ")
     if confirm.lower() != 'yes':
         print("Operation cancelled.")
         return
@@ -16,28 +15,12 @@ def reset_database():
     
     firebase = firebase_service.FirebaseService()
     
-    # List of root nodes to clear
-    nodes = ['users', 'stores', 'orders', 'requests']
-    
-    deleted_count = 0
-    
-    for node in nodes:
-        try:
-            url = firebase._get_url(node)
-            print(f"Deleting /{node}...")
-            response = requests.delete(url)
-            
-            if response.status_code == 200:
-                print(f"✅ Successfully deleted /{node}")
-                deleted_count += 1
-            else:
-                print(f"❌ Failed to delete /{node}. Status: {response.status_code}")
-                
-        except Exception as e:
-            print(f"❌ Error deleting /{node}: {e}")
+    # Children of every root node, deleted in chunked concurrent multi-location updates
+    result = delete_paths(firebase, reset_paths(firebase), dry_run)
+    report(result, dry_run)
             
     print("\n" + "="*50)
-    print(f"🎉 Database Reset Complete. Cleared {deleted_count}/{len(nodes)} nodes.")
+    print(f"🎉 Database Reset Complete. Cleared {len(ROOT_NODES)} nodes.")
     print("="*50)
 
 if __name__ == "__main__":
@@ -46,4 +29,4 @@ if __name__ == "__main__":
         # Mock input
         input = lambda _: "yes"
         
-    reset_database()
+    reset_database(dry_run='--dry-run' in sys.argv)
@@ -0,0 +1,107 @@
+"""
+Scan Counter Module
+Buffers product scan increments in-process, coalesces them per product and flushes
+them periodically as one multi-path PATCH of server-side increments
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class ScanCounter:
+    """
+    Thread-safe increment buffer.
+    flush_fn receives {(store_id, product_id): count} and must apply it atomically
+    (FirebaseService.apply_scan_increments). Counts that fail to flush are put back
+    and retried on the next flush.
+    """
+
+    def __init__(self, flush_fn, flush_interval=2.0, max_pending=1000):
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.flushed_scans = 0
+        self.failed_flushes = 0
+
+    def increment(self, store_id, product_id, amount=1):
+        """Record scans without any network call"""
+        with self._lock:
+            self._pending[(store_id, product_id)] += amount
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write all buffered increments; returns the number of scans flushed"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(dict(batch))
+            except Exception:
+                # Put the counts back so they are retried rather than lost
+                with self._lock:
+                    self._pending.update(batch)
+                    self.failed_flushes += 1
+                raise
+            self.flushes += 1
+            self.flushed_scans += sum(batch.values())
+            return sum(batch.values())
+
+    # ========== BACKGROUND FLUSHING ==========
+
+    def start(self):
+        """Flush every flush_interval seconds (or sooner when max_pending is hit) and at exit"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scan-counter', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the flush thread after a final flush"""
+        atexit.unregister(self.stop)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final scan count flush failed; %d buffered scans were not written",
+                             self.stats()['pending_scans'])
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Scan count flush failed; the counts are kept for the next flush")
+
+    def stats(self):
+        with self._lock:
+            pending_products = len(self._pending)
+            pending_scans = sum(self._pending.values())
+        return {
+            'pending_products': pending_products,
+            'pending_scans': pending_scans,
+            'flushes': self.flushes,
+            'flushed_scans': self.flushed_scans,
+            'failed_flushes': self.failed_flushes,
+        }
@@ -0,0 +1,137 @@
+"""
+Scan History Module
+Each customer's scans are an append-only log under scan_history/<user_id>, kept
+out of the user record so reading a user never downloads their history. Entry keys
+are time-ordered push-style ids, so the newest scans are a limitToLast query away
+and the scan time is decoded from the key instead of being stored. Every
+HISTORY_COMPACT_EVERY-th append of a user trims the log back to its retention cap.
+"""
+
+import hashlib
+import json
+import random
+import threading
+from datetime import datetime
+
+HISTORY_NODE = "scan_history"
+
+# Entries kept per user, and how many appends of a user go by between compactions
+HISTORY_LIMIT = 200
+HISTORY_COMPACT_EVERY = 20
+
+# Entries per page of /api/history (default and upper bound)
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+# Firebase's push id alphabet, in ASCII order so keys sort by time
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+TIME_CHARS = 8
+SUFFIX_CHARS = 6
+
+_lock = threading.Lock()
+_last = [0, 0]  # last (timestamp ms, suffix) handed out by this process
+
+
+def _encode(number, length):
+    chars = []
+    for _ in range(length):
+        number, digit = divmod(number, 64)
+        chars.append(PUSH_CHARS[digit])
+    return ''.join(reversed(chars))
+
+
+def history_key(timestamp_ms=None):
+    """A new time-ordered key; keys made by one process are strictly increasing"""
+    if timestamp_ms is None:
+        timestamp_ms = int(datetime.now().timestamp() * 1000)
+    with _lock:
+        if timestamp_ms <= _last[0]:
+            timestamp_ms, suffix = _last[0], _last[1] + 1
+        else:
+            suffix = random.getrandbits(6 * SUFFIX_CHARS - 1)
+        _last[0], _last[1] = timestamp_ms, suffix
+    return _encode(timestamp_ms, TIME_CHARS) + _encode(suffix, SUFFIX_CHARS)
+
+
+def key_time(key):
+    """Local scan time of a history key, as an ISO string (None if it is not a history key)"""
+    timestamp_ms = 0
+    for char in key[:TIME_CHARS]:
+        digit = PUSH_CHARS.find(char)
+        if digit < 0:
+            return None
+        timestamp_ms = timestamp_ms * 64 + digit
+    return datetime.fromtimestamp(timestamp_ms / 1000).isoformat()
+
+
+def history_entry(store_id, product_id, product_name):
+    """Stored form of one scan; the scan time lives in the key"""
+    return {'s': store_id, 'p': product_id, 'n': product_name}
+
+
+def expand_entry(key, entry):
+    """API form of a stored entry"""
+    return {
+        'id': key,
+        'product_id': entry.get('p'),
+        'store_id': entry.get('s'),
+        'product_name': entry.get('n'),
+        'scanned_at': key_time(key)
+    }
+
+
+def page_query(limit, cursor=None):
+    """REST query for the newest `limit` entries older than cursor, plus one to detect more"""
+    # endAt is inclusive, so the cursor entry itself comes back as well
+    params = {'orderBy': '"$key"', 'limitToLast': limit + (2 if cursor is not None else 1)}
+    if cursor is not None:
+        params['endAt'] = json.dumps(cursor)
+    return params
+
+
+def history_page(entries, limit, cursor=None):
+    """
+    Newest-first page of {key: entry}: ([expanded entry], next_cursor), where
+    next_cursor is None on the last page
+    """
+    keys = sorted((key for key, entry in entries.items()
+                   if isinstance(entry, dict) and (cursor is None or key < cursor)), reverse=True)
+    page = [expand_entry(key, entries[key]) for key in keys[:limit]]
+    return page, (page[-1]['id'] if len(keys) > limit else None)
+
+
+def trim_updates(user_id, keys, keep=HISTORY_LIMIT):
+    """Deletes for all but the newest `keep` keys of a user's log"""
+    keys = sorted(keys)
+    return {f"{HISTORY_NODE}/{user_id}/{key}": None for key in keys[:max(0, len(keys) - keep)]}
+
+
+# ========== LEGACY HISTORY ==========
+
+def legacy_key(scanned_at, product_id):
+    """
+    Deterministic key for a scan at a known time (entries moved from users/<id>/scanned_history,
+    or seeded ones), so re-runs rewrite the same key
+    """
+    try:
+        timestamp_ms = int(datetime.fromisoformat(scanned_at).timestamp() * 1000)
+    except (TypeError, ValueError):
+        timestamp_ms = 0
+    suffix = int.from_bytes(hashlib.sha1(str(product_id).encode()).digest()[:5], 'big') >> (40 - 6 * SUFFIX_CHARS + 1)
+    return _encode(timestamp_ms, TIME_CHARS) + _encode(suffix, SUFFIX_CHARS)
+
+
+def migrate_user(user_id, user_data, keep=HISTORY_LIMIT):
+    """
+    Patches moving one user's users/<id>/scanned_history map ({product_id: {store_id,
+    product_name, scanned_at}}) into their scan_history log, newest `keep` entries only
+    """
+    legacy = user_data.get('scanned_history') if isinstance(user_data, dict) else None
+    if not isinstance(legacy, dict):
+        return {}
+    entries = sorted(((legacy_key(entry.get('scanned_at'), product_id),
+                       history_entry(entry.get('store_id'), product_id, entry.get('product_name')))
+                      for product_id, entry in legacy.items() if isinstance(entry, dict)), reverse=True)
+    updates = {f"{HISTORY_NODE}/{user_id}/{key}": entry for key, entry in entries[:keep]}
+    updates[f"users/{user_id}/scanned_history"] = None
+    return updates
@@ -0,0 +1,400 @@
+"""
+Search Index Module
+In-process inverted index over product name, category and description with prefix
+matching and ranked results, kept up to date by FirebaseService product writes
+"""
+
+import bisect
+import logging
+import math
+import re
+import sys
+import threading
+import time
+from array import array
+
+import numpy as np
+
+from migrations import DEFAULT_PAGE_SIZE, fetch_page
+
+logger = logging.getLogger(__name__)
+
+# A posting is doc << 3 | field mask, so one 32-bit entry per (term, product)
+FIELD_NAME = 1
+FIELD_CATEGORY = 2
+FIELD_DESCRIPTION = 4
+FIELD_BITS = 3
+
+# Score of a posting: the weight of the best field the term appears in
+FIELD_WEIGHTS = np.array([0.0 if not mask else 3.0 if mask & FIELD_NAME else 2.0 if mask & FIELD_CATEGORY else 1.0
+                          for mask in range(1 << FIELD_BITS)])
+
+# A query token matching the start of a longer term counts this much of an exact match
+PREFIX_WEIGHT = 0.5
+
+# Prefix expansion and query length limits, so one short token cannot scan the whole vocabulary
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_TERMS = 64
+MAX_QUERY_TOKENS = 8
+
+# Memory the index should stay under per million products (see benchmarks/bench_search.py)
+MEMORY_TARGET_MB_PER_MILLION = 256
+
+# Compact once this share of the documents are deleted or replaced
+COMPACT_RATIO = 0.25
+
+STOP_WORDS = frozenset(('a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with'))
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lower-cased word tokens of text without stop words"""
+    if not isinstance(text, str):
+        return []
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class SearchIndex:
+    """
+    Inverted index of products. Documents are append-only: updating a product adds a new
+    document and tombstones the old one, and compact() drops tombstoned postings.
+    Not thread-safe on its own; ProductSearch serializes access
+    """
+
+    def __init__(self):
+        self.postings = {}                  # term -> array('I') of doc << 3 | mask, ascending doc
+        self._terms = []                    # sorted vocabulary for prefix lookups (None while bulk loading)
+        self.doc_ids = []                   # doc -> product_id (None once deleted)
+        self.docs = {}                      # product_id -> live doc
+        self.alive = bytearray()            # doc -> 1 while live
+        self.stores = array('I')            # doc -> index into store_ids
+        self.store_ids = []
+        self._store_lookup = {}
+        self.categories = array('I')        # doc -> index into category_names
+        self.category_names = []
+        self._category_lookup = {}
+        self.prices = array('d')
+        self.names = bytearray()            # UTF-8 names, one after another
+        self.name_offsets = array('Q', [0])
+        self.deleted = 0
+        self.id_bytes = 0                   # memory of the live product_id strings
+
+    def __len__(self):
+        return len(self.docs)
+
+    @staticmethod
+    def _intern(value, values, lookup):
+        index = lookup.get(value)
+        if index is None:
+            index = lookup[value] = len(values)
+            values.append(value)
+        return index
+
+    def add(self, store_id, product_id, product):
+        """Index a product, replacing any earlier version of it"""
+        self.remove(product_id)
+        if not isinstance(product, dict):
+            return
+
+        fields = {}
+        for field, text in ((FIELD_NAME, product.get('name')), (FIELD_CATEGORY, product.get('category')),
+                            (FIELD_DESCRIPTION, product.get('description'))):
+            for token in tokenize(text):
+                fields[token] = fields.get(token, 0) | field
+
+        doc = len(self.doc_ids)
+        self.doc_ids.append(product_id)
+        self.docs[product_id] = doc
+        self.id_bytes += sys.getsizeof(product_id)
+        self.alive.append(1)
+        self.stores.append(self._intern(store_id, self.store_ids, self._store_lookup))
+        self.categories.append(self._intern(str(product.get('category') or ''), self.category_names,
+                                            self._category_lookup))
+        self.prices.append(_number(product.get('price')))
+        self.names += str(product.get('name') or '').encode('utf-8')
+        self.name_offsets.append(len(self.names))
+
+        for term, mask in fields.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array('I')
+                if self._terms is not None:
+                    bisect.insort(self._terms, term)
+            postings.append(doc << FIELD_BITS | mask)
+
+    def remove(self, product_id):
+        """Tombstone a product's document; its postings go at the next compaction"""
+        doc = self.docs.pop(product_id, None)
+        if doc is not None:
+            self.id_bytes -= sys.getsizeof(product_id)
+            self.alive[doc] = 0
+            self.doc_ids[doc] = None
+            self.deleted += 1
+
+    def bulk_load(self):
+        """Skip keeping the vocabulary sorted during a large build; finish_load() sorts it once"""
+        self._terms = None
+
+    def finish_load(self):
+        self._terms = sorted(self.postings)
+
+    def needs_compaction(self):
+        return self.deleted > COMPACT_RATIO * max(len(self.doc_ids), 1)
+
+    def compact(self):
+        """Renumber live documents and drop tombstoned postings and unused terms"""
+        alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+        remap = np.cumsum(alive, dtype=np.int64) - 1
+        live = np.flatnonzero(alive)
+
+        postings = {}
+        for term, entries in self.postings.items():
+            entries = np.frombuffer(entries, dtype=np.uint32)
+            docs = entries >> FIELD_BITS
+            keep = alive[docs]
+            if keep.any():
+                renumbered = (remap[docs[keep]] << FIELD_BITS) | (entries[keep] & ((1 << FIELD_BITS) - 1))
+                postings[term] = array('I', renumbered.astype(np.uint32).tobytes())
+        self.postings = postings
+        self._terms = sorted(postings)
+
+        offsets = np.frombuffer(self.name_offsets, dtype=np.uint64)
+        names, name_offsets = bytearray(), array('Q', [0])
+        for doc in live:
+            names += self.names[offsets[doc]:offsets[doc + 1]]
+            name_offsets.append(len(names))
+        self.names, self.name_offsets = names, name_offsets
+
+        self.doc_ids = [self.doc_ids[doc] for doc in live]
+        self.docs = {product_id: doc for doc, product_id in enumerate(self.doc_ids)}
+        self.alive = bytearray(b'\x01') * len(live)
+        self.stores = array('I', np.frombuffer(self.stores, dtype=np.uint32)[live].tobytes())
+        self.categories = array('I', np.frombuffer(self.categories, dtype=np.uint32)[live].tobytes())
+        self.prices = array('d', np.frombuffer(self.prices, dtype=np.float64)[live].tobytes())
+        self.deleted = 0
+
+    def _expand(self, token):
+        """[(term, match weight)]: the token itself and up to MAX_PREFIX_TERMS longer terms it starts"""
+        matches = [(token, 1.0)] if token in self.postings else []
+        if len(token) >= MIN_PREFIX_LENGTH:
+            if self._terms is None:
+                self.finish_load()
+            start = bisect.bisect_right(self._terms, token)
+            for term in self._terms[start:start + MAX_PREFIX_TERMS]:
+                if not term.startswith(token):
+                    break
+                matches.append((term, PREFIX_WEIGHT))
+        return matches
+
+    def _token_scores(self, terms, total, member=None):
+        """
+        (docs, scores) of the documents matching one query token, best match per document,
+        in doc order; with a member mask only documents already matching earlier tokens
+        """
+        docs, scores = [], []
+        for term, weight in terms:
+            entries = np.frombuffer(self.postings[term], dtype=np.uint32)
+            idf = math.log(1 + total / len(entries))
+            term_docs = entries >> FIELD_BITS
+            if member is not None:
+                keep = member[term_docs]
+                entries, term_docs = entries[keep], term_docs[keep]
+            docs.append(term_docs)
+            scores.append(FIELD_WEIGHTS[entries & ((1 << FIELD_BITS) - 1)] * (weight * idf))
+        if not docs:
+            return np.empty(0, dtype=np.uint32), np.empty(0)
+        if len(docs) == 1:
+            # One term's postings are already unique and in doc order
+            return docs[0], scores[0]
+        docs, scores = np.concatenate(docs), np.concatenate(scores)
+        order = np.lexsort((-scores, docs))
+        docs, scores = docs[order], scores[order]
+        first = np.ones(len(docs), dtype=bool)
+        first[1:] = docs[1:] != docs[:-1]
+        return docs[first], scores[first]
+
+    def search(self, query, limit=20, offset=0, store_id=None):
+        """
+        Products matching every query token (exactly or as a prefix), best first.
+        Returns ([(product_id, store_id, name, category, price, score)], total matches)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+        if not tokens or not self.docs:
+            return [], 0
+
+        # Rarest token first, so later tokens only look at documents that can still match
+        expansions = sorted((self._expand(token) for token in tokens),
+                            key=lambda terms: sum(len(self.postings[term]) for term, _ in terms))
+        total = max(len(self.docs), 1)
+        docs = scores = None
+        for terms in expansions:
+            member = None
+            if docs is not None:
+                member = np.zeros(len(self.doc_ids), dtype=bool)
+                member[docs] = True
+            token_docs, token_scores = self._token_scores(terms, total, member)
+            if docs is None:
+                docs, scores = token_docs, token_scores
+            else:
+                scores = scores[np.searchsorted(docs, token_docs)] + token_scores
+                docs = token_docs
+            if not len(docs):
+                return [], 0
+
+        keep = np.frombuffer(self.alive, dtype=np.uint8)[docs].astype(bool)
+        if store_id is not None:
+            store = self._store_lookup.get(store_id)
+            if store is None:
+                return [], 0
+            keep &= np.frombuffer(self.stores, dtype=np.uint32)[docs] == store
+        docs, scores = docs[keep], scores[keep]
+
+        # Best score first, earlier documents first among equals; only the top offset + limit are sorted
+        top = offset + limit
+        if top < len(docs):
+            cutoff = -np.partition(-scores, top - 1)[top - 1]
+            candidates = np.flatnonzero(scores >= cutoff)
+        else:
+            candidates = np.arange(len(docs))
+        ranked = candidates[np.lexsort((docs[candidates], -scores[candidates]))][offset:top]
+        offsets = self.name_offsets
+        results = []
+        for i in ranked:
+            doc = int(docs[i])
+            name = self.names[offsets[doc]:offsets[doc + 1]].decode('utf-8')
+            price = self.prices[doc]
+            results.append((self.doc_ids[doc], self.store_ids[self.stores[doc]], name,
+                            self.category_names[self.categories[doc]],
+                            None if math.isnan(price) else price, round(float(scores[i]), 4)))
+        return results, len(docs)
+
+    def memory_bytes(self):
+        """Approximate memory held by the index"""
+        postings = sum(sys.getsizeof(term) + sys.getsizeof(entries) for term, entries in self.postings.items())
+        postings += sys.getsizeof(self.postings) + sys.getsizeof(self._terms or [])
+        ids = self.id_bytes + sys.getsizeof(self.docs) + sys.getsizeof(self.doc_ids)
+        columns = sum(sys.getsizeof(column) for column in (self.alive, self.stores, self.categories, self.prices,
+                                                          self.names, self.name_offsets))
+        return postings + ids + columns
+
+    def stats(self):
+        return {
+            'products': len(self.docs),
+            'deleted': self.deleted,
+            'terms': len(self.postings),
+            'postings': sum(len(entries) for entries in self.postings.values()),
+            'memory_mb': round(self.memory_bytes() / 2**20, 1),
+        }
+
+
+# ========== LIVE INDEX ==========
+
+def build_index(firebase, page_size=DEFAULT_PAGE_SIZE):
+    """Index every product of every store, reading the stores a page at a time"""
+    index = SearchIndex()
+    index.bulk_load()
+    last_key = None
+    while True:
+        items, _ = fetch_page(firebase, 'stores', last_key, page_size)
+        for store_id, store in items:
+            products = store.get('products') if isinstance(store, dict) else None
+            if isinstance(products, dict):
+                for product_id, product in products.items():
+                    index.add(store_id, product_id, product)
+        if len(items) < page_size:
+            break
+        last_key = items[-1][0]
+    index.finish_load()
+    return index
+
+
+class ProductSearch:
+    """
+    The search index of this process. start() builds it on a daemon thread and rebuilds it
+    every refresh_interval seconds (picking up writes made by other processes); product
+    writes made here while a rebuild runs are replayed onto the new index before it is used
+    """
+
+    def __init__(self, firebase, refresh_interval=0, page_size=DEFAULT_PAGE_SIZE):
+        self.firebase = firebase
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.index = SearchIndex()
+        self.ready = False
+        self.builds = 0
+        self.build_seconds = None
+        self.last_error = None
+        self._replay = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='search-index', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                self.rebuild()
+            except Exception as e:  # keep serving the previous index; retry next interval
+                self.last_error = str(e)
+                logger.exception("Search index build failed")
+            if self.refresh_interval <= 0:
+                return
+            time.sleep(self.refresh_interval)
+
+    def rebuild(self):
+        """Build a fresh index from the database and swap it in"""
+        start = time.perf_counter()
+        with self._lock:
+            self._replay = []
+        try:
+            index = build_index(self.firebase, self.page_size)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            for op, args in self._replay:
+                getattr(index, op)(*args)
+            self._replay = None
+            self.index = index
+            self.ready = True
+        self.builds += 1
+        self.build_seconds = round(time.perf_counter() - start, 3)
+        self.last_error = None
+
+    def _apply(self, op, *args):
+        with self._lock:
+            getattr(self.index, op)(*args)
+            if self._replay is not None:
+                self._replay.append((op, args))
+            if self.index.needs_compaction():
+                self.index.compact()
+
+    def add(self, store_id, product_id, product):
+        """Index a new or updated product"""
+        self._apply('add', store_id, product_id, product)
+
+    def remove(self, product_id):
+        self._apply('remove', product_id)
+
+    def search(self, query, limit=20, offset=0, store_id=None):
+        with self._lock:
+            return self.index.search(query, limit, offset, store_id)
+
+    def stats(self):
+        with self._lock:
+            stats = self.index.stats()
+        stats.update({'ready': self.ready, 'builds': self.builds, 'build_seconds': self.build_seconds,
+                      'last_error': self.last_error})
+        return stats
@@ -0,0 +1,258 @@
+"""
+Seed Engine Module
+Builds a complete dataset (users, stores, products, orders, scan history and
+every index and rollup the app maintains) in memory and commits it with chunked multi-location
+PATCHes sent concurrently. populate_db.py and seed_indian_stores.py are thin
+wrappers that supply the store catalogues.
+
+Usage:
+  python seed_engine.py [--stores N] [--products N] [--customers N] [--orders N]
+                        [--workers N] [--qr-cache-dir DIR] [--qr-workers N]
+                        [--seed N] [--dry-run]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from analytics_engine import local_now, order_bucket_updates
+from firebase_service import FirebaseService, email_index_key, product_record, user_record
+from rebuild_analytics import expected_analytics, expected_scan_counts
+from rebuild_indexes import expected_owner_index, expected_product_index, expected_store_summaries
+from scan_history import HISTORY_LIMIT, HISTORY_NODE, history_entry, legacy_key
+
+# Orders are spread over this many days before now, so the analytics ranges have data
+ORDER_HISTORY_DAYS = 90
+MAX_ORDER_ITEMS = 3
+QR_CHUNK_SIZE = 64
+
+
+# ========== BUILDING ==========
+
+def _new_id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def build_products(store_name, templates, count, rng, now):
+    """count products for a store, cycling through its templates ({name, price, image, ...})"""
+    products = {}
+    for index in range(count):
+        template = templates[index % len(templates)]
+        name = template['name'] if index < len(templates) else f"{template['name']} #{index // len(templates) + 1}"
+        product_id = _new_id(rng)
+        products[product_id] = product_record({
+            'id': product_id,
+            'name': name,
+            'price': template['price'],
+            'size': template.get('size', rng.choice(['S', 'M', 'L', 'One Size'])),
+            'color': template.get('color', rng.choice(['Black', 'White', 'Blue', 'Red', 'Green'])),
+            'description': template.get('description', f"High quality {name.lower()} from {store_name}"),
+            'stock': template.get('stock', rng.randint(10, 100)),
+            'image': template.get('image', ''),
+            'scan_count': rng.randint(0, 50),
+            'created_at': now.isoformat()
+        })
+    return products
+
+
+def _add_increments(totals, updates):
+    """Sum {path: {".sv": {"increment": n}}} into plain {path: total}"""
+    for path, value in updates.items():
+        totals[path] += value['.sv']['increment']
+
+
+def _nest(flat):
+    """{"a/b/c": 1} -> {"a": {"b": {"c": 1}}}"""
+    tree = {}
+    for path, value in flat.items():
+        node = tree
+        *parents, leaf = path.split('/')
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    return tree
+
+
+def build_dataset(store_specs, customers=0, orders=0, rng=None, now=None):
+    """
+    Build the whole database as {path: value} with one path per top-level record.
+    store_specs: [{name, category, description, products: [template, ...], product_count?}]
+    """
+    rng = rng or random.Random()
+    now = now or local_now()
+    users, stores = {}, {}
+
+    for index, spec in enumerate(store_specs):
+        owner_id, store_id = _new_id(rng), _new_id(rng)
+        users[owner_id] = user_record(spec.get('owner_email', f"owner_{index + 1}@example.com"), 'store_owner')
+        stores[store_id] = {
+            'name': spec['name'],
+            'owner_id': owner_id,
+            'description': spec['description'],
+            'category': spec['category'],
+            'created_at': now.isoformat(),
+            'products': build_products(spec['name'], spec['products'],
+                                       spec.get('product_count', len(spec['products'])), rng, now),
+            'orders': {}
+        }
+
+    customer_ids = [_new_id(rng) for _ in range(customers)]
+    for index, user_id in enumerate(customer_ids):
+        users[user_id] = user_record(f"customer_{index + 1}@example.com", 'customer')
+
+    top_level_orders, bucket_totals, scans = {}, defaultdict(int), defaultdict(dict)
+    store_ids = [store_id for store_id in stores if stores[store_id]['products']]
+    for _ in range(orders if customer_ids and store_ids else 0):
+        order_id, user_id, store_id = _new_id(rng), rng.choice(customer_ids), rng.choice(store_ids)
+        store_data = stores[store_id]
+        picks = rng.sample(list(store_data['products']), min(len(store_data['products']), rng.randint(1, MAX_ORDER_ITEMS)))
+        items = [{
+            'product_id': product_id,
+            'store_id': store_id,
+            'product_name': store_data['products'][product_id]['name'],
+            'price': store_data['products'][product_id]['price'],
+            'quantity': rng.randint(1, 3)
+        } for product_id in picks]
+        total = round(sum(item['price'] * item['quantity'] for item in items), 2)
+        when = now - timedelta(seconds=rng.randrange(ORDER_HISTORY_DAYS * 86400))
+        created_at = when.isoformat()
+
+        top_level_orders[order_id] = {
+            'order_id': order_id, 'user_id': user_id, 'items': items, 'total': total,
+            'delivery_method': rng.choice(['pickup', 'delivery']), 'address': '',
+            'status': 'confirmed', 'created_at': created_at
+        }
+        users[user_id]['orders'][order_id] = {'total': total, 'created_at': created_at}
+        store_data['orders'][order_id] = {
+            'user_id': user_id, 'customer_email': users[user_id]['email'], 'items': items,
+            'total': total, 'status': 'confirmed', 'created_at': created_at
+        }
+        _add_increments(bucket_totals, order_bucket_updates(store_id, items, when))
+        # Customers scan what they buy
+        for item in items:
+            scans[user_id][legacy_key(created_at, item['product_id'])] = history_entry(
+                store_id, item['product_id'], item['product_name'])
+
+    updates = {}
+    for user_id, user_data in users.items():
+        updates[f"users/{user_id}"] = user_data
+        updates[f"email_index/{email_index_key(user_data['email'])}"] = {'user_id': user_id, 'role': user_data['role']}
+    for store_id, store_data in stores.items():
+        updates[f"stores/{store_id}"] = store_data
+    for order_id, order_data in top_level_orders.items():
+        updates[f"orders/{order_id}"] = order_data
+    for user_id, entries in scans.items():
+        updates[f"{HISTORY_NODE}/{user_id}"] = dict(sorted(entries.items())[-HISTORY_LIMIT:])
+
+    derived = {
+        'store_summaries': expected_store_summaries(stores),
+        'owner_index': expected_owner_index(stores),
+        'product_index': expected_product_index(stores),
+        'scan_counts': expected_scan_counts(stores),
+        'analytics': expected_analytics(stores, {}),
+    }
+    derived.update(_nest(bucket_totals))
+    for node, entries in derived.items():
+        for key, value in entries.items():
+            updates[f"{node}/{key}"] = value
+    return updates
+
+
+# ========== QR PRE-RENDERING ==========
+
+def _render_qr_chunk(product_ids, disk_dir):
+    """Render product QRs into the shared disk cache (runs in a worker process)"""
+    from qr_cache import QRImageCache
+    cache = QRImageCache(max_items=0, disk_dir=disk_dir)
+    for product_id in product_ids:
+        cache.get(product_id)
+    return cache.renders
+
+
+def warm_qr_cache(product_ids, disk_dir, workers=4):
+    """Pre-render every product QR into QR_CACHE_DIR with a process pool; returns renders"""
+    product_ids = list(product_ids)
+    chunks = [product_ids[i:i + QR_CHUNK_SIZE] for i in range(0, len(product_ids), QR_CHUNK_SIZE)]
+    if workers <= 0:
+        return sum(_render_qr_chunk(chunk, disk_dir) for chunk in chunks)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        return sum(pool.map(_render_qr_chunk, chunks, [disk_dir] * len(chunks)))
+
+
+# ========== COMMITTING ==========
+
+def seed(firebase, store_specs, customers=0, orders=0, workers=8, qr_cache_dir=None, qr_workers=4,
+         rng=None, dry_run=False):
+    """Build and commit a dataset; returns a summary dict"""
+    start = time.perf_counter()
+    updates = build_dataset(store_specs, customers, orders, rng)
+    built = time.perf_counter()
+
+    summary = {
+        'stores': len(store_specs),
+        'products': sum(1 for path in updates if path.startswith('product_index/')),
+        'users': sum(1 for path in updates if path.startswith('users/')),
+        'orders': sum(1 for path in updates if path.startswith('orders/')),
+        'scans': sum(len(value) for path, value in updates.items() if path.startswith(f"{HISTORY_NODE}/")),
+        'paths': len(updates),
+        'bytes': sum(len(json.dumps(value, separators=(',', ':'))) for value in updates.values()),
+        'build_seconds': round(built - start, 2),
+    }
+    if dry_run:
+        return summary
+
+    summary['chunks'] = firebase.update_paths_chunked(updates, workers)
+    summary['commit_seconds'] = round(time.perf_counter() - built, 2)
+
+    if qr_cache_dir:
+        qr_start = time.perf_counter()
+        product_ids = [path.split('/', 1)[1] for path in updates if path.startswith('product_index/')]
+        summary['qr_renders'] = warm_qr_cache(product_ids, qr_cache_dir, qr_workers)
+        summary['qr_seconds'] = round(time.perf_counter() - qr_start, 2)
+    return summary
+
+
+def print_summary(summary):
+    print(f"Stores:    {summary['stores']}")
+    print(f"Products:  {summary['products']}")
+    print(f"Users:     {summary['users']}")
+    print(f"Orders:    {summary['orders']}")
+    print(f"Scans:     {summary['scans']}")
+    print(f"Paths:     {summary['paths']} ({summary['bytes'] / 1e6:.1f} MB) built in {summary['build_seconds']}s")
+    if 'chunks' in summary:
+        print(f"Committed: {summary['chunks']} PATCHes in {summary['commit_seconds']}s")
+    if 'qr_renders' in summary:
+        print(f"QR cache:  {summary['qr_renders']} images rendered in {summary['qr_seconds']}s")
+
+
+def main(argv=None):
+    from populate_db import generate_store_specs
+
+    parser = argparse.ArgumentParser(description="Seed the database with a generated dataset")
+    parser.add_argument('--stores', type=int, default=50)
+    parser.add_argument('--products', type=int, default=None, help="products per store (default: 3-5)")
+    parser.add_argument('--customers', type=int, default=0)
+    parser.add_argument('--orders', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=8, help="concurrent PATCH requests")
+    parser.add_argument('--qr-cache-dir', default=None, help="pre-render every product QR into this QR_CACHE_DIR")
+    parser.add_argument('--qr-workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=None, help="random seed for a reproducible dataset")
+    parser.add_argument('--dry-run', action='store_true', help="build the dataset and report its size only")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    specs = generate_store_specs(args.stores, args.products, rng)
+    summary = seed(FirebaseService(), specs, args.customers, args.orders, args.workers,
+                   args.qr_cache_dir, args.qr_workers, rng, args.dry_run)
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
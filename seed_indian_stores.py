@@ -1,9 +1,6 @@
 
-import uuid
-import random
-from datetime import datetime
 from firebase_service import FirebaseService
-from qr_generator import QRGenerator
+from seed_engine import print_summary, seed
 
 # India-Specific Data
 INDIAN_STORES = [
@@ -69,67 +66,29 @@ INDIAN_STORES = [
     }
 ]
 
+def store_specs():
+    """INDIAN_STORES in the shape seed_engine expects"""
+    specs = []
+    for store_info in INDIAN_STORES:
+        specs.append({
+            'name': store_info['name'],
+            'category': store_info['category'],
+            'description': store_info['description'],
+            # Creating a predictable email for testing if needed
+            'owner_email': f"owner_{store_info['name'].lower().replace(' ', '_')}@example.com",
+            'products': [dict(prod, size='Standard', color='Standard', description=f"Best quality {prod['name']}")
+                         for prod in store_info['products']]
+        })
+    return specs
+
 def seed_database():
     print("🚀 Starting Database Seeding (Indian Stores)...")
     
-    firebase = FirebaseService()
-    qr_gen = QRGenerator()
-    
-    created_count = 0
-    
-    for i, store_info in enumerate(INDIAN_STORES):
-        try:
-            # 1. Create Store Owner Profile
-            owner_id = str(uuid.uuid4())
-            owner_email = f"owner_{store_info['name'].lower().replace(' ', '_')}@example.com"
-            # Creating a predictable email for testing if needed
-            
-            print(f"Creating Owner: {owner_email}")
-            firebase.create_user(owner_id, owner_email, "store_owner")
-            
-            # 2. Create Store
-            store_id = str(uuid.uuid4())
-            store_data = {
-                'name': store_info['name'],
-                'owner_id': owner_id,
-                'description': store_info['description'],
-                'category': store_info['category'],
-                'created_at': datetime.now().isoformat(),
-                'products': {}
-            }
-            firebase.create_store(store_id, store_data)
-            
-            # 3. Add Products
-            for prod in store_info['products']:
-                product_id = str(uuid.uuid4())
-                
-                # Generate QR
-                qr_path = qr_gen.generate_product_qr(store_id, product_id)
-                
-                product_data = {
-                    'id': product_id,
-                    'name': prod['name'],
-                    'price': prod['price'],
-                    'size': 'Standard',
-                    'color': 'Standard',
-                    'description': f"Best quality {prod['name']}",
-                    'stock': prod['stock'],
-                    'image': prod['image'],
-                    'qr_code': qr_path,
-                    'scan_count': random.randint(0, 10),
-                    'created_at': datetime.now().isoformat()
-                }
-                
-                firebase.add_product(store_id, product_id, product_data)
-                
-            created_count += 1
-            print(f"✅ Created Store: {store_info['name']}")
-            
-        except Exception as e:
-            print(f"❌ Error creating {store_info['name']}: {e}")
+    summary = seed(FirebaseService(), store_specs())
+    print_summary(summary)
             
     print("\n" + "="*50)
-    print(f"🎉 Seeding Complete! Created {created_count} stores.")
+    print(f"🎉 Seeding Complete! Created {summary['stores']} stores.")
     print("="*50)
 
 if __name__ == "__main__":
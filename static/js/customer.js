@@ -7,7 +7,7 @@ if (window.location.pathname === '/customer/dashboard') {
 
 // Load scanned history
 if (window.location.pathname === '/history') {
-    loadHistory();
+    loadScanHistory();
 }
 
 async function loadStores() {
@@ -90,6 +90,43 @@ async function loadHistory() {
     }
 }
 
+// Scanned history: newest first from /api/history, a page at a time
+let historyCursor = null;
+
+async function loadScanHistory(more = false) {
+    const list = document.getElementById('history-list');
+    const moreBtn = document.getElementById('history-more');
+    if (!list) return;
+    try {
+        const params = new URLSearchParams({ limit: 20 });
+        if (more && historyCursor) params.set('cursor', historyCursor);
+        const res = await fetch(`/api/history?${params}`);
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+
+        if (!more) list.innerHTML = '';
+        historyCursor = data.next_cursor;
+        if (moreBtn) moreBtn.style.display = historyCursor ? 'inline-block' : 'none';
+        const empty = document.getElementById('no-history');
+        if (empty) empty.style.display = (!more && data.history.length === 0) ? 'block' : 'none';
+
+        data.history.forEach(scan => {
+            const card = document.createElement('div');
+            card.className = 'card';
+            card.style.cursor = 'pointer';
+            card.onclick = () => window.location.href = `/store/${scan.store_id}/product/${scan.product_id}`;
+            const when = scan.scanned_at ? new Date(scan.scanned_at).toLocaleString('en-IN') : '';
+            card.innerHTML = `
+                <h3>${scan.product_name || 'Unknown product'}</h3>
+                <p style="color: rgba(0,0,0,0.5); font-size: 0.9rem;">Scanned ${when}</p>
+            `;
+            list.appendChild(card);
+        });
+    } catch (e) {
+        console.error('loadScanHistory error:', e);
+    }
+}
+
 function createOrderCard(order) {
     const card = document.createElement('div');
     card.className = 'border border-gray-100 rounded-xl p-4 bg-white shadow-sm';
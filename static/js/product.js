@@ -35,7 +35,7 @@ async function loadProductDetails() {
         const qrCodeSection = document.getElementById('qr-code-section');
         const qrCodeImg = document.getElementById('product-qr-code');
         if (qrCodeSection && qrCodeImg) {
-            qrCodeImg.src = `/api/qr/${storeId}/${productId}`;
+            qrCodeImg.src = `/api/qr-code/${productId}`;
             qrCodeSection.classList.remove('hidden');
         }
 
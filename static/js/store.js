@@ -187,32 +187,74 @@ function showQrModal(data) {
 }
 
 // ─── LOAD PRODUCTS ────────────────────────────────────────────
+// Products are fetched a page at a time; scrolling to the end of the list loads the next page
+const PRODUCT_PAGE_SIZE = 24;
+let productsCursor = null;
+let productsLoaded = 0;
+let productsRequest = 0;
+let productsObserver = null;
+
+function productRow(p) {
+    return `
+            <div class="flex items-center gap-4 p-4 rounded-xl border border-gray-100 hover:bg-gray-50 transition-colors group">
+                ${p.image
+                    ? `<img src="${p.image}" class="w-14 h-14 rounded-xl object-cover bg-gray-100 flex-shrink-0"/>`
+                    : `<div class="w-14 h-14 rounded-xl bg-green-50 flex items-center justify-center text-green-600 flex-shrink-0"><span class="material-symbols-outlined">inventory_2</span></div>`
+                }
+                <div class="flex-1 min-w-0">
+                    <p class="font-bold text-gray-800 truncate">${p.name || 'Unknown'}</p>
+                    <p class="text-xs text-gray-500">${p.category || ''} ${p.size ? '· ' + p.size : ''}</p>
+                    <p class="text-sm font-bold text-green-700">₹${parseFloat(p.price || 0).toFixed(2)} · Stock: ${p.stock || 0}</p>
+                </div>
+                <div class="flex items-center gap-2 opacity-0 group-hover:opacity-100 sm:flex transition-opacity">
+                    <a href="/api/qr-code/${p.id || p.product_id}" target="_blank" title="View QR"
+                       class="w-9 h-9 rounded-full bg-green-50 text-green-600 hover:bg-green-100 flex items-center justify-center transition-colors">
+                        <span class="material-symbols-outlined text-sm">qr_code</span>
+                    </a>
+                    <button onclick="deleteProduct('${p.id || p.product_id}')" title="Delete"
+                       class="w-9 h-9 rounded-full bg-red-50 text-red-500 hover:bg-red-500 hover:text-white flex items-center justify-center transition-colors">
+                        <span class="material-symbols-outlined text-sm">delete</span>
+                    </button>
+                </div>
+            </div>`;
+}
+
 async function loadProducts() {
     const container = document.getElementById('products-container');
     if (!container) { console.warn('products-container not found'); return; }
     if (!currentStoreId) { console.warn('currentStoreId not set'); return; }
 
     container.innerHTML = '<div class="text-center py-8 text-gray-400"><span class="material-symbols-outlined text-3xl block mb-2">hourglass_top</span><p class="text-sm">Loading products...</p></div>';
+    productsCursor = null;
+    productsLoaded = 0;
+    await loadProductPage(true);
+}
+
+async function loadProductPage(firstPage = false) {
+    const container = document.getElementById('products-container');
+    if (!firstPage && (!productsCursor || productsRequest)) return;
+    const request = ++productsRequest;
 
     try {
-        const res = await fetch(`/api/stores/${currentStoreId}/products`);
+        const params = new URLSearchParams({ limit: PRODUCT_PAGE_SIZE });
+        if (productsCursor) params.set('cursor', productsCursor);
+        const res = await fetch(`/api/stores/${currentStoreId}/products?${params}`);
         const raw = await res.json();
-        console.log('Products raw:', raw);
+        if (request !== productsRequest) return;  // superseded by a reload
+        if (!res.ok || raw.error) throw new Error(raw.error || `HTTP ${res.status}`);
 
-        let products = [];
-        if (Array.isArray(raw)) {
-            products = raw.map(p => ({ id: p.id || p.product_id, ...p }));
-        } else if (raw && typeof raw === 'object' && !raw.error) {
-            products = Object.entries(raw).map(([id, val]) => ({ id, product_id: id, ...val }));
-        }
+        const products = Object.entries(raw.products || {}).map(([id, val]) => ({ id, product_id: id, ...val }));
+        productsCursor = raw.next_cursor;
+        productsLoaded += products.length;
 
-        // Update stat badges
+        // Update stat badges ("+" while more pages remain)
+        const total = `${productsLoaded}${productsCursor ? '+' : ''}`;
         const statEl = document.getElementById('total-products-stat');
         const qrEl  = document.getElementById('total-qrs-stat');
-        if (statEl) statEl.textContent = products.length;
-        if (qrEl)   qrEl.textContent   = products.length;
+        if (statEl) statEl.textContent = total;
+        if (qrEl)   qrEl.textContent   = total;
 
-        if (products.length === 0) {
+        if (firstPage && products.length === 0) {
             container.innerHTML = `
                 <div class="text-center py-12 text-gray-400">
                     <span class="material-symbols-outlined text-5xl block mb-3">inventory_2</span>
@@ -222,31 +264,21 @@ async function loadProducts() {
             return;
         }
 
-        container.innerHTML = `<div class="space-y-3">${products.map(p => `
-            <div class="flex items-center gap-4 p-4 rounded-xl border border-gray-100 hover:bg-gray-50 transition-colors group">
-                ${p.image
-                    ? `<img src="${p.image}" class="w-14 h-14 rounded-xl object-cover bg-gray-100 flex-shrink-0"/>`
-                    : `<div class="w-14 h-14 rounded-xl bg-green-50 flex items-center justify-center text-green-600 flex-shrink-0"><span class="material-symbols-outlined">inventory_2</span></div>`
-                }
-                <div class="flex-1 min-w-0">
-                    <p class="font-bold text-gray-800 truncate">${p.name || 'Unknown'}</p>
-                    <p class="text-xs text-gray-500">${p.category || ''} ${p.size ? '· ' + p.size : ''}</p>
-                    <p class="text-sm font-bold text-green-700">₹${parseFloat(p.price || 0).toFixed(2)} · Stock: ${p.stock || 0}</p>
-                </div>
-                <div class="flex items-center gap-2 opacity-0 group-hover:opacity-100 sm:flex transition-opacity">
-                    <a href="/api/qr-code/${p.id || p.product_id}" target="_blank" title="View QR"
-                       class="w-9 h-9 rounded-full bg-green-50 text-green-600 hover:bg-green-100 flex items-center justify-center transition-colors">
-                        <span class="material-symbols-outlined text-sm">qr_code</span>
-                    </a>
-                    <button onclick="deleteProduct('${p.id || p.product_id}')" title="Delete"
-                       class="w-9 h-9 rounded-full bg-red-50 text-red-500 hover:bg-red-500 hover:text-white flex items-center justify-center transition-colors">
-                        <span class="material-symbols-outlined text-sm">delete</span>
-                    </button>
-                </div>
-            </div>`).join('')}</div>`;
+        if (firstPage) {
+            container.innerHTML = '<div id="products-list" class="space-y-3"></div><div id="products-more" class="h-8"></div>';
+            if (productsObserver) productsObserver.disconnect();
+            productsObserver = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) loadProductPage();
+            }, { rootMargin: '300px' });
+            productsObserver.observe(document.getElementById('products-more'));
+        }
+        document.getElementById('products-list').insertAdjacentHTML('beforeend', products.map(productRow).join(''));
     } catch (err) {
         console.error('loadProducts error:', err);
-        container.innerHTML = '<p class="text-center text-red-400 py-8 text-sm">Failed to load products.</p>';
+        productsCursor = null;
+        if (firstPage) container.innerHTML = '<p class="text-center text-red-400 py-8 text-sm">Failed to load products.</p>';
+    } finally {
+        if (request === productsRequest) productsRequest = 0;
     }
 }
 
@@ -265,20 +297,73 @@ async function deleteProduct(productId) {
     }
 }
 
+function downloadQRSheet() {
+    if (!currentStoreId) return;
+    window.location.href = `/api/stores/${currentStoreId}/qr-sheet?format=pdf`;
+}
+
 // ─── ANALYTICS ───────────────────────────────────────────────
-async function loadAnalytics() {
+let analyticsRange = '7d';
+
+async function loadAnalytics(range) {
+    if (range) analyticsRange = range;
     try {
         if (!currentStoreId) return;
-        const res = await fetch(`/api/stores/${currentStoreId}/analytics`);
+        const res = await fetch(`/api/stores/${currentStoreId}/analytics?range=${analyticsRange}`);
         if (!res.ok) return;
         const analytics = await res.json();
         const el = document.getElementById('total-orders');
         if (el) el.textContent = analytics.total_orders || 0;
+        if (analytics.timeseries) renderTimeseries(analytics.timeseries);
     } catch (e) {
         console.error('Analytics error:', e);
     }
 }
 
+function renderTimeseries(ts) {
+    document.querySelectorAll('.range-btn').forEach(btn => {
+        const active = btn.dataset.range === analyticsRange;
+        btn.classList.toggle('bg-white', active);
+        btn.classList.toggle('text-primary', active);
+        btn.classList.toggle('shadow-sm', active);
+        btn.classList.toggle('text-gray-500', !active);
+    });
+
+    const revenueEl = document.getElementById('revenue-stat');
+    if (revenueEl) revenueEl.textContent = `₹${Math.round(ts.totals.revenue).toLocaleString('en-IN')}`;
+    const revenueLabel = document.getElementById('revenue-stat-label');
+    if (revenueLabel) revenueLabel.textContent = `Revenue (${analyticsRange})`;
+
+    const chart = document.getElementById('timeseries-chart');
+    if (chart) {
+        const maxScans = Math.max(1, ...ts.scans);
+        const maxRevenue = Math.max(1, ...ts.revenue);
+        chart.innerHTML = ts.labels.map((label, i) => `
+            <div class="flex-1 h-full flex items-end gap-px" title="${label}: ${ts.scans[i]} scans, ₹${ts.revenue[i]}">
+                <div class="flex-1 bg-primary/70 rounded-t-sm" style="height: ${ts.scans[i] / maxScans * 100}%"></div>
+                <div class="flex-1 bg-secondary/70 rounded-t-sm" style="height: ${ts.revenue[i] / maxRevenue * 100}%"></div>
+            </div>
+        `).join('');
+        document.getElementById('timeseries-start').textContent = ts.labels[0] || '';
+        document.getElementById('timeseries-end').textContent = ts.labels[ts.labels.length - 1] || '';
+    }
+
+    const top = document.getElementById('top-products');
+    if (top) {
+        top.innerHTML = ts.products.length ? ts.products.slice(0, 5).map(p => `
+            <div class="flex items-center justify-between p-2.5 rounded-xl bg-gray-50 border border-gray-100">
+                <span class="font-bold text-xs text-gray-800 truncate">${p.name || 'Deleted product'}</span>
+                <span class="text-[10px] text-gray-500 flex-shrink-0 ml-2">${p.scans} scans · ₹${Math.round(p.revenue)}</span>
+            </div>
+        `).join('') : '<p class="text-xs text-gray-300 italic">No activity in this range.</p>';
+    }
+}
+
+document.addEventListener('click', (e) => {
+    const btn = e.target.closest('.range-btn');
+    if (btn) loadAnalytics(btn.dataset.range);
+});
+
 // ─── REQUESTS ────────────────────────────────────────────────
 async function loadRequests() {
     const container = document.getElementById('requests-container');
@@ -0,0 +1,219 @@
+"""
+Store Mirror Module
+Optional background listener that keeps an in-memory copy of /stores consistent with
+the Realtime Database through its server-sent-events streaming REST API
+"""
+
+import copy
+import json
+import threading
+import time
+import urllib.request
+
+from read_cache import MISSING
+
+
+def _split(path):
+    return [key for key in path.strip('/').split('/') if key]
+
+
+def _put(root, keys, value):
+    """Set value at keys inside root (None deletes) and return the new root"""
+    if not keys:
+        return value
+    if not isinstance(root, dict):
+        root = {}
+    node = root
+    for key in keys[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            child = {}
+            node[key] = child
+        node = child
+    if value is None:
+        node.pop(keys[-1], None)
+    else:
+        node[keys[-1]] = value
+    return root
+
+
+class StoreMirror:
+    """
+    Streams a database location (stores/ by default) into memory.
+    The stream's initial put resyncs the whole location, so a reconnect after any
+    failure simply replaces the mirror. Reads are refused (MISSING) when the mirror
+    has never synced or has been disconnected for longer than max_staleness seconds.
+    """
+
+    def __init__(self, db_url, path='stores', max_staleness=5.0, read_timeout=90.0,
+                 min_backoff=1.0, max_backoff=30.0):
+        self.url = f"{db_url.rstrip('/')}/{path.strip('/')}.json"
+        self.keys = _split(path)
+        self.max_staleness = max_staleness
+        self.read_timeout = read_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self._data = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.connected = False
+        self.synced = False
+        self.disconnected_at = None
+        self.last_event_at = None
+        self.events = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.last_error = None
+
+    # ========== LIFECYCLE ==========
+
+    def start(self):
+        """Start the background listener thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='store-mirror', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_until_synced(self, timeout=10.0):
+        """Block until the first full snapshot has arrived"""
+        deadline = time.monotonic() + timeout
+        while not self.synced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.synced
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            events_before = self.events
+            try:
+                self._listen()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = repr(e)
+            finally:
+                if self.connected:
+                    self.connected = False
+                    self.disconnected_at = time.monotonic()
+            if self._stop.is_set():
+                break
+            # Back off exponentially, starting over once a stream has delivered data
+            if self.events > events_before:
+                backoff = self.min_backoff
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+            self.reconnects += 1
+
+    def _listen(self):
+        """Read one SSE stream until it ends"""
+        request = urllib.request.Request(self.url, headers={'Accept': 'text/event-stream'})
+        with urllib.request.urlopen(request, timeout=self.read_timeout) as response:
+            event, data = None, []
+            for raw in response:
+                if self._stop.is_set():
+                    return
+                line = raw.decode('utf-8').rstrip('\r\n')
+                if not line:
+                    if event and not self._dispatch(event, '\n'.join(data)):
+                        return
+                    event, data = None, []
+                elif line.startswith('event:'):
+                    event = line[len('event:'):].strip()
+                elif line.startswith('data:'):
+                    data.append(line[len('data:'):].lstrip())
+
+    def _dispatch(self, event, data):
+        """Apply one event; returns False when the stream should be reopened"""
+        now = time.monotonic()
+        if event in ('put', 'patch'):
+            message = json.loads(data)
+            keys = _split(message.get('path', '/'))
+            value = message.get('data')
+            with self._lock:
+                if event == 'put':
+                    self._data = _put(self._data, keys, value)
+                    if not keys:
+                        # Full snapshot: the mirror is live again
+                        self.synced = True
+                        self.connected = True
+                        self.resyncs += 1
+                elif isinstance(value, dict):
+                    for key, child in value.items():
+                        self._data = _put(self._data, keys + _split(key), child)
+            self.events += 1
+            self.last_event_at = now
+        elif event == 'keep-alive':
+            self.last_event_at = now
+        elif event == 'cancel':
+            raise RuntimeError(f"Stream cancelled by server: {data}")
+        elif event == 'auth_revoked':
+            return False
+        return True
+
+    # ========== READS AND LOCAL WRITES ==========
+
+    def is_fresh(self):
+        """True when reads can be served from memory"""
+        if not self.synced:
+            return False
+        if self.connected:
+            return True
+        return self.disconnected_at is not None and time.monotonic() - self.disconnected_at <= self.max_staleness
+
+    def get(self, path):
+        """Return a copy of the mirrored node at a database path, or MISSING"""
+        keys = _split(path)
+        if keys[:len(self.keys)] != self.keys or not self.is_fresh():
+            return MISSING
+        with self._lock:
+            node = self._data
+            for key in keys[len(self.keys):]:
+                if not isinstance(node, dict) or key not in node:
+                    return None
+                node = node[key]
+            return copy.deepcopy(node)
+
+    def apply_write(self, path, value):
+        """
+        Apply a write this process just made, so it can read its own writes
+        before the stream echoes them back.
+        """
+        keys = _split(path)
+        if keys[:len(self.keys)] != self.keys or not self.synced:
+            return
+        with self._lock:
+            self._data = _put(self._data, keys[len(self.keys):], copy.deepcopy(value))
+
+    # ========== MONITORING ==========
+
+    def staleness(self):
+        """Seconds the mirror may be behind the database (0 while streaming, None before the first sync)"""
+        if not self.synced:
+            return None
+        if self.connected:
+            return 0.0
+        return round(time.monotonic() - self.disconnected_at, 3)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            'connected': self.connected,
+            'synced': self.synced,
+            'fresh': self.is_fresh(),
+            'staleness_seconds': self.staleness(),
+            'last_event_age_seconds': round(now - self.last_event_at, 3) if self.last_event_at else None,
+            'events': self.events,
+            'resyncs': self.resyncs,
+            'reconnects': self.reconnects,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing app.py must not start indexing the configured database for search
+os.environ.setdefault('SEARCH_INDEX', '0')
+
+from firebase_service import FirebaseService  # noqa: E402
+from local_rtdb import LocalRTDB, start_local_rtdb  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def rtdb_server():
+    server = start_local_rtdb()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def rtdb(rtdb_server):
+    """The local RTDB stand-in with an empty database; call load() to seed it"""
+    rtdb_server.db = LocalRTDB()
+    return rtdb_server
+
+
+@pytest.fixture
+def load(rtdb):
+    """Replace the stand-in's database with data (and optionally enforce a rules file)"""
+    def load(data, rules=None):
+        rtdb.db = LocalRTDB(data, rules)
+        return rtdb
+    return load
+
+
+@pytest.fixture
+def firebase(rtdb):
+    return FirebaseService(rtdb.url)
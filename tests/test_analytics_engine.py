@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timedelta
+
+from analytics_engine import METRIC_CODES, aggregate, bucket_keys
+
+
+def make_buckets(keys, products, rng):
+    buckets = {}
+    for key in keys:
+        bucket = {code: {f"p{rng.randrange(products)}": rng.randint(1, 500) for _ in range(rng.randint(0, 6))}
+                  for code in METRIC_CODES}
+        bucket['o'] = rng.randint(0, 9)
+        buckets[key] = bucket
+    return buckets
+
+
+def test_aggregate_matches_plain_sums():
+    rng = random.Random(7)
+    start = datetime(2026, 3, 1)
+    keys = bucket_keys('hour', start, start + timedelta(hours=47))
+    buckets = make_buckets(keys, 30, rng)
+    buckets['not-a-key'] = {'s': {'p0': 1000}}
+
+    result = aggregate(buckets, 'hour', keys, limit=50)
+
+    for metric, code in zip(('scans', 'units'), ('s', 'u')):
+        assert result[metric] == [sum(buckets[key][code].values()) for key in keys]
+    assert result['revenue'] == [sum(buckets[key]['r'].values()) / 100 for key in keys]
+    assert result['totals']['orders'] == sum(buckets[key]['o'] for key in keys)
+    totals = {}
+    for key in keys:
+        for code in METRIC_CODES:
+            for product_id, value in buckets[key][code].items():
+                totals.setdefault(product_id, dict.fromkeys(METRIC_CODES, 0))[code] += value
+    assert {entry['product_id']: (entry['scans'], entry['units'], entry['revenue']) for entry in result['products']} == \
+        {product_id: (t['s'], t['u'], t['r'] / 100) for product_id, t in totals.items()}
+    revenues = [entry['revenue'] for entry in result['products']]
+    assert revenues == sorted(revenues, reverse=True)
+
+
+def test_aggregate_of_a_month_over_a_large_catalogue():
+    """744 hourly buckets x 10k products would be a 180 MB dense cube"""
+    rng = random.Random(1)
+    start = datetime(2026, 1, 1)
+    keys = bucket_keys('hour', start, start + timedelta(hours=743))
+    buckets = make_buckets(keys, 10_000, rng)
+
+    result = aggregate(buckets, 'hour', keys)
+    assert len(result['scans']) == 744 and len(result['products']) == 10
+    assert result['totals']['scans'] == sum(sum(bucket['s'].values()) for bucket in buckets.values())
@@ -0,0 +1,65 @@
+import json
+import threading
+
+
+def test_multi_location_patch_writes_and_deletes_in_one_call(rtdb, firebase):
+    firebase.update_paths({'stores/s1/name': 'One', 'stores/s1/products/p1': {'name': 'Tea'},
+                           'product_index/p1': 's1'})
+    before = rtdb.db.request_count
+    firebase.update_paths({'stores/s1/products/p1': None, 'product_index/p1': None, 'stores/s2/name': 'Two'})
+
+    assert rtdb.db.request_count == before + 1
+    assert firebase.get_all_stores() == {'s1': {'name': 'One'}, 's2': {'name': 'Two'}}
+    # Deleting the last child removes the emptied parent, as in Firebase
+    assert firebase.http.get(firebase._get_url('product_index')).json() is None
+
+
+def test_concurrent_server_side_increments_are_not_lost(firebase):
+    threads, per_thread = 8, 25
+
+    def increment():
+        for _ in range(per_thread):
+            firebase.update_paths({'scan_counts/s1/p1': {'.sv': {'increment': 1}},
+                                   'scan_counts/s1/p2': {'.sv': {'increment': 2}}})
+
+    workers = [threading.Thread(target=increment) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    counts = firebase.http.get(firebase._get_url('scan_counts/s1')).json()
+    assert counts == {'p1': threads * per_thread, 'p2': 2 * threads * per_thread}
+
+
+def query(firebase, path, **params):
+    params = {name: json.dumps(value) if name != 'shallow' else value for name, value in params.items()}
+    return firebase.http.get(firebase._get_url(path), params=params)
+
+
+def test_key_range_queries(firebase):
+    firebase.update_paths({f"log/k{i:02d}": i for i in range(10)})
+
+    assert list(query(firebase, 'log', orderBy='$key', startAt='k03', limitToFirst=3).json()) == ['k03', 'k04', 'k05']
+    assert list(query(firebase, 'log', orderBy='$key', endAt='k03', limitToLast=2).json()) == ['k02', 'k03']
+    assert list(query(firebase, 'log', shallow='true').json()) == [f"k{i:02d}" for i in range(10)]
+    assert query(firebase, 'log', orderBy='$key', limitToFirst=1, limitToLast=1).status_code == 400
+
+
+def test_key_order_matches_firebase(firebase):
+    """32-bit integer keys first, numerically; '007' is not an integer key, so it sorts as a string"""
+    firebase.update_paths({f"log/{key}": 1 for key in ('a', '007', '10', '-1', '7', '2147483648')})
+
+    assert list(query(firebase, 'log', orderBy='$key', limitToFirst=6).json()) == \
+        ['-1', '7', '10', '007', '2147483648', 'a']
+    assert list(query(firebase, 'log', orderBy='$key', startAt='10', limitToFirst=2).json()) == ['10', '007']
+
+
+def test_child_queries_need_an_index_when_rules_are_loaded(load, firebase):
+    products = {'p1': {'category': 'Dairy', 'price': 3}, 'p2': {'category': 'Bakery', 'price': 1}}
+    load({'stores': {'s1': {'products': products}}},
+         rules={'rules': {'stores': {'$store_id': {'products': {'.indexOn': ['category']}}}}})
+
+    dairy = query(firebase, 'stores/s1/products', orderBy='category', equalTo='Dairy')
+    assert list(dairy.json()) == ['p1']
+    assert query(firebase, 'stores/s1/products', orderBy='price', startAt=2).status_code == 400
@@ -0,0 +1,43 @@
+import pytest
+
+from migrations import fetch_page, run_migration
+
+KEYS = ['-Nb', '1', '2', '10', '99', 'a', 'b10', 'b9']
+
+
+def page_through(firebase, limit):
+    keys, last = [], None
+    while True:
+        items, _ = fetch_page(firebase, 'stores', last, limit)
+        if not items:
+            return keys
+        keys += [key for key, _ in items]
+        last = items[-1][0]
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 100])
+def test_pages_follow_firebase_key_order(rtdb, firebase, limit):
+    firebase.update_paths({f"stores/{key}": {'name': key} for key in KEYS})
+    assert page_through(firebase, limit) == ['1', '2', '10', '99', '-Nb', 'a', 'b10', 'b9']
+
+
+def mark_migrated(key, value):
+    return {f"stores/{key}/migrated": True}
+
+
+def test_resumed_migration_processes_every_record_once(firebase, tmp_path):
+    firebase.update_paths({f"stores/{key}": {'name': key} for key in KEYS})
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    seen = []
+
+    def stop_after_two_pages(line):
+        seen.append(line)
+        if len(seen) == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_migration(firebase, 'test', mark_migrated, page_size=2, checkpoint=checkpoint, log=stop_after_two_pages)
+    state = run_migration(firebase, 'test', mark_migrated, page_size=2, checkpoint=checkpoint, log=lambda line: None)
+
+    assert state['records'] == len(KEYS)
+    assert all(store.get('migrated') for store in firebase.get_all_stores().values())
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from firebase_service import FirebaseService
+from read_cache import ReadCache
+
+CATEGORIES = ('Dairy', 'Bakery', 'Snacks')
+RULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database.rules.json')
+
+
+def make_products(count):
+    return {f"p{i:03d}": {'name': f"Product {i}", 'category': CATEGORIES[i % 3], 'price': i, 'stock': i % 4}
+            for i in range(count)}
+
+
+@pytest.fixture
+def store(load):
+    """A 50-product store on a stand-in enforcing the repo's database.rules.json"""
+    with open(RULES) as f:
+        rules = json.load(f)
+    products = make_products(50)
+    return load({'stores': {'s1': {'name': 'Store', 'products': products}}}, rules), products
+
+
+def walk(firebase, limit, **filters):
+    """Product ids of every page, in order"""
+    pages, cursor = [], None
+    while True:
+        page, cursor = firebase.get_products_page('s1', limit, cursor, **filters)
+        pages.append(list(page))
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('cached', [False, True])
+@pytest.mark.parametrize('limit', [1, 7, 50, 100])
+def test_cursor_walk_returns_every_product_once_in_key_order(store, cached, limit):
+    server, products = store
+    firebase = FirebaseService(server.url, cache=ReadCache(64, {'products': 60}) if cached else None)
+    pages = walk(firebase, limit)
+
+    assert [pid for page in pages for pid in page] == sorted(products)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+@pytest.mark.parametrize('filters', [
+    {'category': 'Dairy'},
+    {'min_price': 10, 'max_price': 30},
+    {'in_stock': True},
+    {'category': 'Bakery', 'min_price': 5, 'in_stock': True},
+])
+def test_filtered_walk_matches_a_full_scan(store, filters):
+    server, products = store
+    firebase = FirebaseService(server.url)
+    pages = walk(firebase, 4, **filters)
+
+    expected = sorted(pid for pid, p in products.items()
+                      if p['category'] == filters.get('category', p['category'])
+                      and filters.get('min_price', 0) <= p['price'] <= filters.get('max_price', 10**9)
+                      and (p['stock'] > 0 or not filters.get('in_stock')))
+    assert [pid for page in pages for pid in page] == expected
+
+
+def test_uncached_unfiltered_page_is_one_keyed_query(store):
+    server, _ = store
+    firebase = FirebaseService(server.url)
+    before = server.db.request_count
+    page, cursor = firebase.get_products_page('s1', 24)
+    page, cursor = firebase.get_products_page('s1', 24, cursor)
+
+    assert server.db.request_count == before + 2
+    assert list(page) == [f"p{i:03d}" for i in range(24, 48)]
+    assert cursor == 'p047'
+
+
+@pytest.mark.parametrize('query', ['min_price=nan', 'max_price=inf', 'min_price=-Infinity', 'max_price=abc'])
+def test_products_api_rejects_non_finite_prices(store, monkeypatch, query):
+    import app as app_module
+    server, _ = store
+    monkeypatch.setattr(app_module, 'firebase', FirebaseService(server.url))
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'u1'
+        session['role'] = 'customer'
+
+    assert client.get(f"/api/stores/s1/products?{query}").status_code == 400
+    assert client.get('/api/stores/s1/products?min_price=10&max_price=12').get_json()['products']
@@ -0,0 +1,24 @@
+def test_product_writes_drop_embedded_qr_blobs(firebase):
+    firebase.add_product('s1', 'p1', {'name': 'Tea', 'price': 5, 'qr_code': 'data:image/png;base64,AAAA'})
+    assert 'qr_code' not in firebase.get_product('s1', 'p1')
+
+    firebase.update_product('s1', 'p1', {'price': 6, 'qr_code': 'data:image/png;base64,BBBB'})
+    assert firebase.get_product('s1', 'p1') == {'name': 'Tea', 'price': 6}
+
+
+def test_store_summary_endpoint_skips_products_and_orders(load, firebase, monkeypatch):
+    import app as app_module
+    load({
+        'stores': {'s1': {'name': 'Corner Shop', 'products': {'p1': {'name': 'Tea'}}, 'orders': {'o1': {}}},
+                   's2': {'name': 'Old Shop', 'products': {'p2': {'name': 'Milk'}}}},
+        'store_summaries': {'s1': {'name': 'Corner Shop', 'description': 'Fresh'}},
+    })
+    monkeypatch.setattr(app_module, 'firebase', firebase)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'u1'
+        session['role'] = 'customer'
+
+    assert client.get('/api/stores/s1/summary').get_json() == {'name': 'Corner Shop', 'description': 'Fresh'}
+    assert client.get('/api/stores/s2/summary').get_json() == {'name': 'Old Shop'}
+    assert client.get('/api/stores/missing/summary').status_code == 404
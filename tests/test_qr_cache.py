@@ -0,0 +1,46 @@
+import pytest
+
+import app as app_module
+from qr_cache import QRImageCache, cache_key, render_params
+
+PNG = b'\x89PNG'
+
+
+def test_memory_then_disk_then_render(tmp_path):
+    cache = QRImageCache(max_items=1, disk_dir=str(tmp_path))
+    png, key = cache.get('p1')
+    assert png.startswith(PNG) and key == cache_key('p1', render_params())
+    assert cache.get('p1') == (png, key)
+
+    cache.get('p2')  # evicts p1 from memory; its PNG is still on disk
+    assert QRImageCache(disk_dir=str(tmp_path)).get('p1') == (png, key)
+    stats = cache.stats()
+    assert (stats['renders'], stats['hits'], stats['evictions']) == (2, 1, 1)
+
+
+def test_render_params_are_validated_and_keyed():
+    assert cache_key('p1', render_params({'box_size': '4'})) != cache_key('p1', render_params())
+    for overrides in ({'box_size': 0}, {'border': 'wide'}, {'color': 'red'}):
+        with pytest.raises(ValueError):
+            render_params(overrides)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module, 'qr_cache', QRImageCache())
+    return app_module.app.test_client()
+
+
+def test_qr_endpoint_etag_and_revalidation(client):
+    response = client.get('/api/qr-code/p1')
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and response.data.startswith(PNG)
+    assert etag == f'"{cache_key("p1", render_params())}"'
+    assert 'immutable' in response.headers['Cache-Control']
+
+    revalidated = client.get('/api/qr-code/p1', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304 and revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+    assert client.get('/api/qr-code/p1?box_size=4', headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/api/qr-code/p1?box_size=99').status_code == 400
+    assert app_module.qr_cache.stats()['renders'] == 2
@@ -0,0 +1,46 @@
+import zlib
+
+import pytest
+from PIL import ImageFont
+
+import qr_sheets
+
+PRODUCTS = {
+    'p1': {'name': 'चाय', 'price': 10},
+    'p2': {'name': 'A very long product name that goes on and on', 'price': 5},
+    'p3': {'name': 'Bread'},
+    'p4': 'not a product',
+}
+
+
+def bitmap_font():
+    # Pillow >= 10.1 returns a FreeType font from load_default() when it can
+    return getattr(ImageFont, 'load_default_imagefont', ImageFont.load_default)()
+
+
+def test_labels_are_name_ordered_with_ascii_truncation():
+    labels = qr_sheets.sheet_labels(PRODUCTS)
+    assert [product_id for product_id, _ in labels] == ['p2', 'p3', 'p1']
+    assert labels[0][1] == ['A very long product name ...', 'Rs. 5']
+    assert len(labels[0][1][0]) == qr_sheets.MAX_CAPTION
+    assert labels[1][1] == ['Bread', '']
+
+
+@pytest.mark.parametrize('fmt, magic', [('pdf', b'%PDF'), ('png', b'\x89PNG')])
+def test_sheets_render_with_the_bitmap_font(monkeypatch, fmt, magic):
+    """Pillow 10.0 falls back to the Latin-1 bitmap font; non-Latin-1 captions must not break the stream"""
+    monkeypatch.setattr(qr_sheets, '_font', bitmap_font())
+    data = b''.join(qr_sheets.render_sheet(PRODUCTS, fmt))
+    assert data.startswith(magic)
+
+
+def test_png_sheet_holds_one_label_per_product():
+    data = b''.join(qr_sheets.render_sheet(PRODUCTS, 'png'))
+    width, height = int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+    assert (width, height) == (qr_sheets.PNG_COLUMNS * qr_sheets.LABEL_SIZE[0], qr_sheets.LABEL_SIZE[1])
+    assert zlib.crc32(data[-8:-4]) == int.from_bytes(data[-4:], 'big')  # ends with a valid IEND chunk
+
+
+def test_empty_sheet_is_rejected():
+    with pytest.raises(ValueError):
+        qr_sheets.render_sheet({'p1': None}, 'png')
@@ -0,0 +1,71 @@
+from read_cache import MISSING, ReadCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_their_entity_ttl():
+    clock = Clock()
+    cache = ReadCache(ttls={'store_name': 300, 'product': 30}, clock=clock)
+    cache.set(('store_name', 's1'), 'One')
+    cache.set(('product', 's1', 'p1'), {'name': 'Tea'})
+
+    clock.now = 31
+    assert cache.get(('product', 's1', 'p1')) is MISSING
+    assert cache.get(('store_name', 's1')) == 'One'
+    assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReadCache(max_size=2)
+    cache.set(('product', 's1', 'p1'), 1)
+    cache.set(('product', 's1', 'p2'), 2)
+    cache.get(('product', 's1', 'p1'))
+    cache.set(('product', 's1', 'p3'), 3)
+
+    assert cache.get(('product', 's1', 'p2')) is MISSING
+    assert cache.get(('product', 's1', 'p1')) == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cached_none_is_a_hit_and_values_are_copied():
+    cache = ReadCache()
+    cache.set(('store', 'gone'), None)
+    product = {'name': 'Tea'}
+    cache.set(('product', 's1', 'p1'), product)
+    product['name'] = 'Changed'
+    cache.get(('product', 's1', 'p1'))['name'] = 'Also changed'
+
+    assert cache.get(('store', 'gone')) is None
+    assert cache.get(('product', 's1', 'p1')) == {'name': 'Tea'}
+
+
+def test_invalidation():
+    cache = ReadCache()
+    for key in (('product', 's1', 'p1'), ('product', 's1', 'p2'), ('product', 's2', 'p3'), ('store', 's1')):
+        cache.set(key, 1)
+    cache.invalidate(('store', 's1'), ('store', 'unknown'))
+    cache.invalidate_prefix(('product', 's1'))
+
+    assert [cache.get(key) for key in (('store', 's1'), ('product', 's1', 'p1'), ('product', 's2', 'p3'))] == \
+        [MISSING, MISSING, 1]
+    assert cache.stats()['invalidations'] == 3
+
+
+def test_service_writes_invalidate_cached_reads(firebase):
+    firebase.cache = ReadCache()
+    firebase.add_product('s1', 'p1', {'name': 'Tea', 'price': 5})
+    assert firebase.get_product('s1', 'p1')['price'] == 5
+    assert firebase.get_products('s1') == {'p1': {'name': 'Tea', 'price': 5}}
+    assert firebase.get_product('s1', 'p1')['price'] == 5
+    assert firebase.cache.stats()['hits'] == 1
+
+    firebase.update_product('s1', 'p1', {'price': 6})
+    assert firebase.get_product('s1', 'p1')['price'] == 6
+    assert firebase.get_products('s1')['p1']['price'] == 6
+    assert firebase.cache.stats()['hits'] == 1
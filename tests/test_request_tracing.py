@@ -0,0 +1,45 @@
+import app as app_module
+import config
+import request_tracing
+from request_tracing import Metrics, path_template
+
+
+def test_path_template_keeps_only_schema_nodes():
+    assert path_template('requests/s1/bread/count') == 'requests/{id}/{id}/count'
+    assert path_template('stores/s1/products/p1/scan_count') == 'stores/{id}/products/{id}/scan_count'
+    assert path_template('email_index/bob@example,com') == 'email_index/{id}'
+
+
+def test_metrics_need_the_token(monkeypatch):
+    client = app_module.app.test_client()
+    monkeypatch.setattr(config, 'METRICS_ENABLED', True)
+    monkeypatch.setattr(config, 'METRICS_TOKEN', None)
+    assert client.get('/metrics').status_code == 404
+
+    monkeypatch.setattr(config, 'METRICS_TOKEN', 'secret')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/api/trace-summary', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+    assert client.get('/api/trace-summary', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_cache_stats_need_the_token(monkeypatch):
+    client = app_module.app.test_client()
+    monkeypatch.setattr(config, 'METRICS_TOKEN', None)
+    assert client.get('/api/cache-stats').status_code == 404
+
+    monkeypatch.setattr(config, 'METRICS_TOKEN', 'secret')
+    assert client.get('/api/cache-stats').status_code == 401
+    response = client.get('/api/cache-stats', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200 and 'background_tasks' in response.get_json()
+
+
+def test_disabled_metrics_record_no_calls(monkeypatch):
+    monkeypatch.setattr(request_tracing, 'metrics', Metrics())
+    monkeypatch.setattr(config, 'METRICS_ENABLED', False)
+    request_tracing.record_call('GET', 'https://db/stores/s1.json', 200, 0.01, 0, 10)
+    assert not request_tracing.metrics.calls
+
+    monkeypatch.setattr(config, 'METRICS_ENABLED', True)
+    request_tracing.record_call('GET', 'https://db/stores/s1.json', 200, 0.01, 0, 10)
+    assert list(request_tracing.metrics.calls) == [('(background)', 'GET', 'stores/{id}', '200')]
@@ -0,0 +1,66 @@
+import pytest
+
+from scan_counter import ScanCounter
+
+
+@pytest.fixture
+def store(firebase):
+    firebase.update_paths({
+        'stores/s1/products/p1': {'name': 'Tea', 'scan_count': 0},
+        'stores/s1/products/p2': {'name': 'Milk', 'scan_count': 0},
+    })
+    return firebase
+
+
+def failing_refresh(store_id):
+    raise RuntimeError("rollup read failed")
+
+
+def test_scan_increments_update_counts_and_rollup(store):
+    store.scan_rollup_interval = 0
+    store.apply_scan_increments({('s1', 'p1'): 3, ('s1', 'p2'): 1})
+    store.apply_scan_increments({('s1', 'p2'): 4})
+
+    assert store.get_product('s1', 'p1')['scan_count'] == 3
+    assert store.get_product('s1', 'p2')['scan_count'] == 5
+    assert store.get_store_analytics('s1')['most_scanned'] == [
+        {'name': 'Milk', 'count': 5}, {'name': 'Tea', 'count': 3}]
+
+
+def test_scan_rollup_is_refreshed_at_most_once_per_interval(rtdb, store):
+    store.apply_scan_increments({('s1', 'p1'): 1})
+    before = rtdb.db.request_count
+    for _ in range(5):
+        store.apply_scan_increments({('s1', 'p2'): 1})
+
+    assert rtdb.db.request_count == before + 5
+    assert store.get_store_analytics('s1')['most_scanned'] == [{'name': 'Tea', 'count': 1}]
+    store.scan_rollup_interval = 0
+    store.apply_scan_increments({('s1', 'p2'): 1})
+    assert store.get_store_analytics('s1')['most_scanned'][0] == {'name': 'Milk', 'count': 6}
+
+
+def test_failed_rollup_refresh_does_not_requeue_applied_increments(store, monkeypatch):
+    monkeypatch.setattr(store, 'refresh_scan_rollup', failing_refresh)
+    counter = ScanCounter(store.apply_scan_increments)
+    counter.increment('s1', 'p1', 2)
+
+    assert counter.flush() == 2
+    assert counter.flush() == 0
+    assert counter.failed_flushes == 0
+    assert store.get_product('s1', 'p1')['scan_count'] == 2
+
+
+def test_failed_request_rollup_refresh_still_counts_the_request(store, monkeypatch):
+    monkeypatch.setattr(store, 'refresh_request_rollup', failing_refresh)
+    store.add_product_request('s1', 'Bread')
+    store.add_product_request('s1', 'Bread')
+
+    assert store.get_store_requests('s1') == {'Bread': {'count': 2}}
+
+
+def test_failed_rollup_refresh_does_not_fail_a_product_delete(store, monkeypatch):
+    monkeypatch.setattr(store, 'refresh_scan_rollup', failing_refresh)
+
+    assert store.delete_product('s1', 'p1') is True
+    assert store.get_product('s1', 'p1') is None
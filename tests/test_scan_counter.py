@@ -0,0 +1,107 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from scan_counter import ScanCounter
+
+THREADS = 16
+SCANS_PER_THREAD = 2000
+PRODUCTS = 7
+
+
+def scan_concurrently(counter):
+    barrier = threading.Barrier(THREADS)
+
+    def scan(thread):
+        barrier.wait()
+        for i in range(SCANS_PER_THREAD):
+            counter.increment('store0', f"p{(thread + i) % PRODUCTS}")
+
+    threads = [threading.Thread(target=scan, args=(t,)) for t in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def expected_totals():
+    totals = Counter()
+    for thread in range(THREADS):
+        for i in range(SCANS_PER_THREAD):
+            totals[('store0', f"p{(thread + i) % PRODUCTS}")] += 1
+    return totals
+
+
+def test_concurrent_scans_are_not_lost_across_a_failed_flush():
+    applied = Counter()
+    calls = []
+
+    def flush_fn(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("PATCH failed")
+        applied.update(batch)
+
+    counter = ScanCounter(flush_fn)
+    scan_concurrently(counter)
+
+    with pytest.raises(RuntimeError):
+        counter.flush()
+    assert counter.failed_flushes == 1
+    assert not applied
+
+    # Scans recorded after the failure are merged with the ones put back
+    counter.increment('store0', 'p0', 5)
+    flushed = counter.flush()
+
+    totals = expected_totals()
+    totals[('store0', 'p0')] += 5
+    assert applied == totals
+    assert flushed == THREADS * SCANS_PER_THREAD + 5
+    assert counter.stats()['pending_scans'] == 0
+
+
+def test_scans_during_a_flush_are_kept_for_the_next_one():
+    applied = Counter()
+    flushing = threading.Event()
+    release = threading.Event()
+
+    def flush_fn(batch):
+        flushing.set()
+        release.wait(5)
+        applied.update(batch)
+
+    counter = ScanCounter(flush_fn)
+    counter.increment('store0', 'p0')
+    flusher = threading.Thread(target=counter.flush)
+    flusher.start()
+    flushing.wait(5)
+    scan_concurrently(counter)
+    release.set()
+    flusher.join()
+    counter.flush()
+
+    totals = expected_totals()
+    totals[('store0', 'p0')] += 1
+    assert applied == totals
+
+
+def test_failed_background_and_final_flushes_are_logged(caplog):
+    flushed = threading.Event()
+
+    def failing_flush(counts):
+        flushed.set()
+        raise RuntimeError("backend down")
+
+    counter = ScanCounter(failing_flush, flush_interval=0.01)
+    counter.increment('store0', 'p1', 3)
+    with caplog.at_level('ERROR', logger='scan_counter'):
+        counter.start()
+        assert flushed.wait(2)
+        counter.stop()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("Scan count flush failed") for message in messages)
+    assert "Final scan count flush failed; 3 buffered scans were not written" in messages
+    assert counter.stats()['failed_flushes'] >= 2
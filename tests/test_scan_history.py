@@ -0,0 +1,85 @@
+import pytest
+
+from bulk_maintenance import ROOT_NODES, history_paths, user_paths
+from scan_history import HISTORY_NODE, history_key, page_query
+
+
+@pytest.fixture
+def scans(firebase):
+    """30 scans of user u1, one a minute"""
+    for i in range(30):
+        firebase.add_to_history('u1', 's1', f"p{i:02d}", f"Product {i}", history_key(1_780_000_000_000 + i * 60_000))
+    return firebase
+
+
+@pytest.mark.parametrize('limit', [1, 7, 30, 100])
+def test_history_pages_run_newest_first_without_gaps(scans, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = scans.get_history_page('u1', limit, cursor)
+        assert len(page) <= limit
+        seen += page
+        if cursor is None:
+            break
+
+    assert [entry['product_id'] for entry in seen] == [f"p{i:02d}" for i in reversed(range(30))]
+    assert [entry['scanned_at'] for entry in seen] == sorted((entry['scanned_at'] for entry in seen), reverse=True)
+    assert seen[0] == {'id': seen[0]['id'], 'product_id': 'p29', 'store_id': 's1', 'product_name': 'Product 29',
+                       'scanned_at': seen[0]['scanned_at']}
+
+
+def test_history_page_is_one_bounded_query(rtdb, scans):
+    before = rtdb.db.request_count
+    page, cursor = scans.get_history_page('u1', 5)
+    page, cursor = scans.get_history_page('u1', 5, cursor)
+
+    assert rtdb.db.request_count == before + 2
+    assert [entry['product_id'] for entry in page] == ['p24', 'p23', 'p22', 'p21', 'p20']
+
+
+def test_history_api(scans, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'firebase', scans)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'u1'
+        session['role'] = 'customer'
+
+    first = client.get('/api/history?limit=10').get_json()
+    second = client.get(f"/api/history?limit=10&cursor={first['next_cursor']}").get_json()
+    assert [entry['product_id'] for entry in first['history'] + second['history']] == \
+        [f"p{i:02d}" for i in reversed(range(10, 30))]
+    assert client.get('/api/history?limit=ten').status_code == 400
+
+
+def test_every_nth_append_trims_the_oldest_entries(rtdb, firebase):
+    firebase.history_limit = 3
+    firebase.history_compact_every = 5
+    before = rtdb.db.request_count
+    for i in range(4):
+        firebase.add_to_history('u3', 's1', f"p{i}", f"Product {i}", history_key(1_780_000_000_000 + i * 60_000))
+    assert rtdb.db.request_count == before + 4  # one write per scan
+
+    firebase.add_to_history('u3', 's1', 'p4', 'Product 4', history_key(1_780_000_000_000 + 4 * 60_000))
+    page, cursor = firebase.get_history_page('u3', 100)
+    assert [entry['product_id'] for entry in page] == ['p4', 'p3', 'p2']
+    assert firebase.compact_history('u3') == 0
+
+
+def test_cursor_is_json_encoded_in_the_query():
+    assert page_query(5, 'a"b\\c')['endAt'] == '"a\\"b\\\\c"'
+
+
+def test_reset_and_user_deletes_cover_scan_history(scans):
+    assert HISTORY_NODE in ROOT_NODES
+    assert f"{HISTORY_NODE}/u1" in user_paths(scans, ['u1'])
+
+
+def test_bulk_history_trim(scans):
+    scans.add_to_history('u2', 's1', 'p00', 'Product 0', history_key(1_780_000_000_000))
+    paths = history_paths(scans, keep=10)
+
+    assert len(paths) == 20 and all(path.startswith(f"{HISTORY_NODE}/u1/") for path in paths)
+    scans.update_paths(paths)
+    page, cursor = scans.get_history_page('u1', 100)
+    assert [entry['product_id'] for entry in page] == [f"p{i:02d}" for i in reversed(range(20, 30))]
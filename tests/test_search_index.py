@@ -0,0 +1,109 @@
+import pytest
+
+from search_index import ProductSearch, SearchIndex, tokenize
+
+PRODUCTS = {
+    's1': {'name': 'Corner Shop', 'products': {
+        'p1': {'name': 'Green Tea', 'category': 'Beverages', 'description': 'Loose leaf', 'price': 120},
+        'p2': {'name': 'Milk', 'category': 'Dairy', 'description': 'Fresh toned milk for tea', 'price': 30},
+        'p3': {'name': 'Masala Chai Tea Bags', 'category': 'Beverages', 'price': 95},
+    }},
+    's2': {'name': 'Village Mart', 'products': {
+        'p4': {'name': 'Tea Cake', 'category': 'Bakery', 'price': 'n/a'},
+    }},
+}
+
+
+def ids(results):
+    return [result[0] for result in results]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    for store_id, store in PRODUCTS.items():
+        for product_id, product in store['products'].items():
+            index.add(store_id, product_id, product)
+    return index
+
+
+def test_tokenize_drops_stop_words():
+    assert tokenize('The Tea of the Day!') == ['tea', 'day']
+    assert tokenize(None) == []
+
+
+def test_name_matches_rank_above_description_matches(index):
+    results, total = index.search('tea')
+    assert total == 4
+    assert ids(results)[-1] == 'p2'  # 'tea' only in its description
+    assert results[0][1:5] == ('s1', 'Green Tea', 'Beverages', 120.0)
+    assert [result[4] for result in results if result[0] == 'p4'] == [None]
+
+
+def test_every_token_must_match_and_prefixes_count(index):
+    assert ids(index.search('masala te')[0]) == ['p3']
+    assert ids(index.search('green milk')[0]) == []
+    assert ids(index.search('the and')[0]) == []
+
+
+def test_store_filter_and_paging(index):
+    assert ids(index.search('tea', store_id='s2')[0]) == ['p4']
+    assert index.search('tea', store_id='unknown') == ([], 0)
+    first, total = index.search('tea', limit=2)
+    second, _ = index.search('tea', limit=2, offset=2)
+    assert ids(first + second) == ids(index.search('tea')[0]) and total == 4
+
+
+def test_updates_and_removals(index):
+    index.add('s1', 'p1', {'name': 'Black Coffee', 'category': 'Beverages'})
+    index.remove('p4')
+
+    assert ids(index.search('coffee')[0]) == ['p1']
+    assert set(ids(index.search('tea')[0])) == {'p2', 'p3'}
+    index.compact()
+    assert set(ids(index.search('tea')[0])) == {'p2', 'p3'}
+    assert index.stats()['products'] == 3
+
+
+def test_product_search_builds_from_the_database_and_follows_writes(load, firebase):
+    load({'stores': PRODUCTS})
+    search = ProductSearch(firebase, page_size=1)
+    firebase.search = search
+    search.rebuild()
+    assert search.ready and search.search('tea')[1] == 4
+
+    firebase.add_product('s2', 'p5', {'name': 'Tea Strainer', 'category': 'Kitchen'})
+    firebase.delete_product('s1', 'p1')
+    assert set(ids(search.search('tea')[0])) == {'p2', 'p3', 'p4', 'p5'}
+
+
+def failing_build(firebase, page_size):
+    raise RuntimeError("database down")
+
+
+def test_failed_build_is_logged_and_keeps_serving(firebase, monkeypatch, caplog):
+    monkeypatch.setattr('search_index.build_index', failing_build)
+    search = ProductSearch(firebase)
+    with caplog.at_level('ERROR', logger='search_index'):
+        search._run()
+
+    assert not search.ready and search.last_error == "database down"
+    assert caplog.records[0].getMessage() == "Search index build failed" and caplog.records[0].exc_info
+
+
+def test_search_api(load, firebase, monkeypatch):
+    import app as app_module
+    load({'stores': PRODUCTS, 'store_summaries': {'s1': {'name': 'Corner Shop'}, 's2': {'name': 'Village Mart'}}})
+    firebase.search = ProductSearch(firebase)
+    firebase.search.rebuild()
+    monkeypatch.setattr(app_module, 'firebase', firebase)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'u1'
+        session['role'] = 'customer'
+
+    page = client.get('/api/search?q=tea&limit=3').get_json()
+    assert page['total'] == 4 and page['next_cursor'] == '3' and len(page['results']) == 3
+    assert page['results'][0]['store_name'] == 'Corner Shop'
+    rest = client.get(f"/api/search?q=tea&limit=3&cursor={page['next_cursor']}").get_json()
+    assert [r['product_id'] for r in rest['results']] == ['p2'] and rest['next_cursor'] is None
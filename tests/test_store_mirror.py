@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from firebase_service import FirebaseService
+from read_cache import MISSING
+from store_mirror import StoreMirror
+
+
+def eventually(check, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def mirror(load):
+    server = load({'stores': {'s1': {'name': 'One', 'products': {'p1': {'name': 'Tea', 'price': 5}}}},
+                   'users': {'u1': {'email': 'u1@example.com'}}})
+    mirror = StoreMirror(server.url, min_backoff=0.05).start()
+    assert mirror.wait_until_synced(5)
+    yield mirror
+    server.db.close_streams()
+    mirror.stop()
+
+
+def test_reads_are_served_from_memory(rtdb, mirror):
+    firebase = FirebaseService(rtdb.url, mirror=mirror)
+    before = rtdb.db.request_count
+
+    assert firebase.get_store_name('s1') == 'One'
+    assert firebase.get_product('s1', 'p1') == {'name': 'Tea', 'price': 5}
+    assert firebase.get_product('s1', 'missing') is None
+    assert rtdb.db.request_count == before
+    assert mirror.get('users/u1') is MISSING
+
+
+def test_other_writers_are_streamed_in(rtdb, mirror):
+    FirebaseService(rtdb.url).update_paths({'stores/s1/products/p1/price': 6, 'stores/s2/name': 'Two'})
+
+    eventually(lambda: mirror.get('stores/s2/name') == 'Two')
+    assert mirror.get('stores/s1/products/p1') == {'name': 'Tea', 'price': 6}
+
+
+def test_own_writes_are_visible_immediately(rtdb, mirror):
+    firebase = FirebaseService(rtdb.url, mirror=mirror)
+    firebase.update_product('s1', 'p1', {'price': 7})
+
+    assert mirror.get('stores/s1/products/p1/price') == 7
+
+
+def test_reconnect_resyncs_missed_writes(rtdb, mirror):
+    rtdb.db.close_streams()
+    eventually(lambda: mirror.reconnects > 0 or not mirror.connected)
+    rtdb.db.set('stores/s3', {'name': 'Three'})
+
+    eventually(lambda: mirror.get('stores/s3/name') == 'Three')
+    assert mirror.stats()['resyncs'] >= 2
+
+
+def test_unsynced_mirror_serves_nothing():
+    mirror = StoreMirror('http://127.0.0.1:9')
+    assert mirror.get('stores/s1') is MISSING
+    assert mirror.stats()['fresh'] is False
@@ -0,0 +1,57 @@
+import pytest
+
+from backfill_email_index import backfill_email_index
+from firebase_service import EMAIL_TAKEN, email_index_key
+
+EMAILS = ['a$b@x.com', 'a_24b@x.com', 'a_b@x.com', 'a.b@x.com', 'a,b@x.com', 'a_2cb@x.com', 'a_2eb@x.com']
+
+
+def test_email_index_keys_are_distinct_and_valid():
+    keys = [email_index_key(email) for email in EMAILS]
+    assert len(set(keys)) == len(keys)
+    assert not any(char in key for key in keys for char in '.$#[]/')
+
+
+def test_lookup_by_email(firebase):
+    firebase.create_user('u1', 'a_b@x.com', 'customer')
+    firebase.create_user('u2', 'a$b@x.com', 'store_owner')
+
+    assert firebase.get_user_by_email('a_b@x.com') == {'user_id': 'u1', 'email': 'a_b@x.com', 'role': 'customer'}
+    assert firebase.get_user_by_email('a$b@x.com')['user_id'] == 'u2'
+    assert firebase.get_user_by_email('a_24b@x.com') is None
+
+
+def test_registered_email_cannot_be_taken_over(firebase):
+    firebase.create_user('u1', 'a$b@x.com', 'customer')
+
+    assert firebase.create_user('u2', 'a$b@x.com', 'store_owner') == {'error': EMAIL_TAKEN}
+    assert firebase.get_user_by_email('a$b@x.com')['user_id'] == 'u1'
+    assert firebase.get_user('u2') is None
+
+
+@pytest.fixture
+def client(firebase, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'firebase', firebase)
+    return app_module.app.test_client()
+
+
+def test_register_conflict_and_login(client):
+    body = {'email': 'a_b@x.com', 'password': 'pw', 'role': 'customer'}
+    assert client.post('/api/register', json=body).status_code == 200
+    assert client.post('/api/register', json=body).status_code == 409
+    assert client.post('/api/login', json={'email': 'a_b@x.com', 'password': 'pw'}).status_code == 200
+    assert client.post('/api/login', json={'email': 'a_5fb@x.com', 'password': 'pw'}).status_code == 401
+
+
+def test_backfill_rekeys_entries_from_the_old_encoding(load, firebase):
+    load({
+        'users': {'u1': {'email': 'a_24b@x.com', 'role': 'customer'}},
+        # 'a_24b@x.com' under the old encoding, which 'a$b@x.com' now maps to as well
+        'email_index': {'a_24b@x,com': {'user_id': 'u1', 'role': 'customer'}},
+    })
+    assert backfill_email_index(firebase) == 1
+
+    assert firebase.get_keys('email_index') == [email_index_key('a_24b@x.com')]
+    assert firebase.get_user_by_email('a_24b@x.com')['user_id'] == 'u1'
+    assert firebase.get_user_by_email('a$b@x.com') is None